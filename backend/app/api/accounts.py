@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, Account
-from app.middleware.auth import get_current_user
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.models import User, Account, UserRole
+from app.middleware.auth import Principal, get_current_principal
+from app.middleware.query_stats import query_budget
+from app.services import balance_history
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -10,13 +17,14 @@ router = APIRouter(prefix="/accounts", tags=["Accounts"])
 
 
 @router.get("/me")
+@query_budget(2)
 async def get_my_account(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get current user's account information"""
     try:
-        account = db.query(Account).filter(Account.user_id == current_user.id).first()
+        account = await db.scalar(select(Account).where(Account.user_id == current_user.id))
         
         if not account:
             raise HTTPException(
@@ -45,3 +53,82 @@ async def get_my_account(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch account"
         )
+
+
+async def _visible_account(db: AsyncSession, current_user: Principal, user_id: Optional[int]) -> Account:
+    """The account of `user_id` (default: the caller), if the caller may see it."""
+    query = select(Account).join(User, Account.user_id == User.id)
+    if user_id is None or user_id == current_user.id:
+        query = query.where(Account.user_id == current_user.id)
+    elif current_user.role == UserRole.CLIENT:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Clients can only view their own balance"
+        )
+    else:
+        query = query.where(Account.user_id == user_id)
+        if current_user.role == UserRole.ADMIN:
+            query = query.where(User.branch_id == current_user.branch_id)
+
+    account = await db.scalar(query.order_by(Account.id).limit(1))
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found"
+        )
+    return account
+
+
+@router.get("/balance-at")
+@query_budget(5)
+async def get_balance_at(
+    at: datetime,
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Get an account's balances at a point in time (own account, or a client's for staff)"""
+    try:
+        account = await _visible_account(db, current_user, user_id)
+        return await balance_history.balance_at(db, account, at)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to compute balance at {at}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to compute balance"
+        )
+
+
+@router.get("/balance-history")
+@query_budget(3)
+async def get_balance_history(
+    start: datetime,
+    end: Optional[datetime] = None,
+    points: int = Query(200, ge=1, le=settings.BALANCE_HISTORY_MAX_POINTS),
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Get an equity chart series from balance snapshots, downsampled to at most `points` points"""
+    start = balance_history.to_utc(start)
+    end = balance_history.to_utc(end) if end else datetime.now(timezone.utc)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start"
+        )
+    try:
+        account = await _visible_account(db, current_user, user_id)
+        return await balance_history.balance_series(db, account.id, start, end, points)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to fetch balance history: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch balance history"
+        )
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, Account, Branch, UserRole
-from app.middleware.auth import get_current_user
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_read_db
+from app.models import User, Branch, UserRole
+from app.middleware.auth import Principal, get_current_principal
+from app.middleware.query_stats import query_budget
+from app.services.clients import client_listing
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/admin", tags=["Admin Operations"])
 
 
-def require_admin(current_user: User = Depends(get_current_user)):
+def require_admin(current_user: Principal = Depends(get_current_principal)):
     """Dependency to ensure user is an admin."""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -20,9 +23,10 @@ def require_admin(current_user: User = Depends(get_current_user)):
 
 
 @router.get("/branch-clients")
+@query_budget(2)
 async def get_branch_clients(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Get all clients in admin's branch."""
     
@@ -32,16 +36,14 @@ async def get_branch_clients(
             detail="Admin is not assigned to a branch"
         )
     
-    clients = db.query(User).filter(
-        User.role == UserRole.CLIENT,
-        User.branch_id == current_user.branch_id
-    ).all()
+    rows = (await db.execute(
+        client_listing()
+        .where(User.role == UserRole.CLIENT, User.branch_id == current_user.branch_id)
+        .order_by(User.id)
+    )).all()
     
-    result = []
-    for client in clients:
-        account = db.query(Account).filter(Account.user_id == client.id).first()
-        
-        result.append({
+    return [
+        {
             "id": client.id,
             "name": client.name,
             "email": client.email,
@@ -51,15 +53,16 @@ async def get_branch_clients(
             "trading_balance": float(account.trading_balance if account else 0),
             "is_active": client.is_active,
             "created_at": client.created_at
-        })
-    
-    return result
+        }
+        for client, account in rows
+    ]
 
 
 @router.get("/branch-info")
+@query_budget(4)
 async def get_branch_info(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Get admin's branch information."""
     
@@ -69,7 +72,7 @@ async def get_branch_info(
             detail="Admin is not assigned to a branch"
         )
     
-    branch = db.query(Branch).filter(Branch.id == current_user.branch_id).first()
+    branch = await db.scalar(select(Branch).where(Branch.id == current_user.branch_id))
     
     if not branch:
         raise HTTPException(
@@ -78,10 +81,11 @@ async def get_branch_info(
         )
     
     # Count clients in branch
-    client_count = db.query(User).filter(
+    client_count = await db.scalar(select(func.count()).select_from(User).where(
         User.role == UserRole.CLIENT,
         User.branch_id == current_user.branch_id
-    ).count()
+    ))
+    admin_balance = await db.scalar(select(User.admin_balance).where(User.id == current_user.id))
     
     return {
         "id": branch.id,
@@ -90,5 +94,5 @@ async def get_branch_info(
         "client_count": client_count,
         "commission_per_lot": float(branch.commission_per_lot),
         "leverage": branch.leverage,
-        "admin_balance": float(current_user.admin_balance or 0)
+        "admin_balance": float(admin_balance or 0)
     }
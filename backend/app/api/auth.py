@@ -1,33 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from app.database import get_db
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token, RefreshTokenRequest
 from app.models.user import User, UserRole
 from app.models.branch import Branch
 from app.models.account import Account
 from app.middleware.auth import get_current_user
+from app.middleware.query_stats import query_budget
+from app.services.account_numbers import account_numbers
 from app.utils.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    hash_password_async,
     create_access_token,
+    access_token_claims,
     create_refresh_token,
-    generate_account_number,
     decode_token,
     validate_password_strength
 )
 from app.utils.logging import log_security_event, get_logger
+from app.utils.rate_limit import rate_limit, check_login_lockout, record_login_failure, clear_login_failures
 
 logger = get_logger(__name__)
-limiter = Limiter(key_func=get_remote_address)
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit("5/hour")  # Limit to 5 registration attempts per hour
-async def register(request: Request, user_data: UserCreate, db: Session = Depends(get_db)):
+@router.post(
+    "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("register", 5, 3600))]  # 5 registration attempts per hour
+)
+@query_budget(6)  # 3, plus 1-2 when this worker reserves a new block of account numbers, plus 1 for a retried collision
+async def register(request: Request, user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user (client). Rate limited to 5 attempts per hour."""
 
     # Validate password strength
@@ -38,17 +43,8 @@ async def register(request: Request, user_data: UserCreate, db: Session = Depend
             detail=error_msg
         )
 
-    # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
-        log_security_event("registration", user_email=user_data.email, success=False, details="Email already registered")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-
     # Validate referral code and get branch
-    branch = db.query(Branch).filter(Branch.referral_code == user_data.referral_code).first()
+    branch = await db.scalar(select(Branch).where(Branch.referral_code == user_data.referral_code))
     if not branch:
         log_security_event("registration", user_email=user_data.email, success=False, details="Invalid referral code")
         raise HTTPException(
@@ -56,92 +52,102 @@ async def register(request: Request, user_data: UserCreate, db: Session = Depend
             detail="Invalid referral code"
         )
 
-    # Generate unique account number with collision detection
-    max_attempts = 5
-    account_number = None
-    for attempt in range(max_attempts):
-        account_number = generate_account_number()
-        # Check if account number already exists
-        existing_account = db.query(Account).filter(Account.account_number == account_number).first()
-        if not existing_account:
-            break
-    else:
-        # If we exhausted all attempts, raise an error
-        log_security_event("registration", user_email=user_data.email, success=False,
-                          details="Failed to generate unique account number")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Unable to generate unique account number. Please try again."
-        )
-
-    try:
-        # Create user
-        new_user = User(
-            email=user_data.email,
-            hashed_password=get_password_hash(user_data.password),
-            name=user_data.name,
-            phone=user_data.phone,
-            role=UserRole.CLIENT,
-            account_type=user_data.account_type,
-            account_number=account_number,
-            branch_id=branch.id,
-            referral_code=user_data.referral_code,
-            is_active=True,
-            is_verified=False
-        )
-
-        db.add(new_user)
-        db.flush()  # Get the user ID without committing
+    hashed_password = None
+    for attempt in range(2):
+        account_number = await account_numbers.allocate_async()
+        try:
+            if hashed_password is None:
+                hashed_password = await hash_password_async(user_data.password)
+            # Create user and account; both rows are inserted by a single commit
+            new_user = User(
+                email=user_data.email,
+                hashed_password=hashed_password,
+                name=user_data.name,
+                phone=user_data.phone,
+                role=UserRole.CLIENT,
+                account_type=user_data.account_type,
+                account_number=account_number,
+                branch_id=branch.id,
+                referral_code=user_data.referral_code,
+                is_active=True,
+                is_verified=False
+            )
+            new_user.accounts.append(Account(
+                account_number=account_number,
+                balance=0.0,
+                wallet_balance=0.0,
+                trading_balance=0.0,
+                leverage=branch.leverage
+            ))
 
-        # Create account for the user
-        account = Account(
-            user_id=new_user.id,
-            account_number=account_number,
-            balance=0.0,
-            wallet_balance=0.0,
-            trading_balance=0.0,
-            leverage=branch.leverage
-        )
+            db.add(new_user)
+            await db.commit()
 
-        db.add(account)
-        db.commit()  # Commit both user and account together
-        db.refresh(new_user)
+            # Log successful registration
+            log_security_event("registration", user_email=new_user.email, user_id=new_user.id, success=True,
+                              details=f"Account created: {account_number}")
+            logger.info(f"New user registered: {new_user.email} (ID: {new_user.id})")
 
-        # Log successful registration
-        log_security_event("registration", user_email=new_user.email, user_id=new_user.id, success=True,
-                          details=f"Account created: {account_number}")
-        logger.info(f"New user registered: {new_user.email} (ID: {new_user.id})")
+            return new_user
 
-        return new_user
+        except IntegrityError as e:
+            await db.rollback()
+            constraint = str(e.orig).lower()
+            if "email" in constraint:
+                log_security_event("registration", user_email=user_data.email, success=False,
+                                  details="Email already registered")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
+            if "account_number" in constraint and attempt == 0:
+                # The number was already taken (e.g. rows inserted outside the allocator); try a fresh one
+                logger.warning(f"Account number {account_number} already in use; retrying registration")
+                continue
+            error = e
+        except Exception as e:
+            await db.rollback()
+            error = e
 
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Registration failed for {user_data.email}: {str(e)}")
+        logger.error(f"Registration failed for {user_data.email}: {str(error)}")
         log_security_event("registration", user_email=user_data.email, success=False,
-                          details=f"Database error: {type(e).__name__}")
+                          details=f"Database error: {type(error).__name__}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration failed. Please try again later."
         )
 
 
-@router.post("/login", response_model=Token)
-@limiter.limit("10/minute")  # Limit to 10 login attempts per minute
-async def login(request: Request, credentials: UserLogin, db: Session = Depends(get_db)):
-    """Login and get access token. Rate limited to 10 attempts per minute."""
+@router.post(
+    "/login", response_model=Token,
+    dependencies=[Depends(rate_limit("login", 10, 60))]  # 10 login attempts per minute
+)
+async def login(request: Request, credentials: UserLogin, db: AsyncSession = Depends(get_db)):
+    """
+    Login and get access token. Rate limited to 10 attempts per minute per
+    address; an account is locked out after LOGIN_LOCKOUT_THRESHOLD failures.
+    """
+    try:
+        await check_login_lockout(credentials.email)
+    except HTTPException:
+        log_security_event("login", user_email=credentials.email, success=False, details="Account locked out")
+        raise
 
     try:
         # Find user
-        user = db.query(User).filter(User.email == credentials.email).first()
+        user = await db.scalar(select(User).where(User.email == credentials.email))
         if not user:
+            await record_login_failure(credentials.email)
             log_security_event("login", user_email=credentials.email, success=False, details="User not found")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
             )
 
-        # Verify password
-        if not verify_password(credentials.password, user.hashed_password):
+        # Verify password (off the event loop)
+        password_ok, upgraded_hash = await verify_password_async(credentials.password, user.hashed_password)
+        if not password_ok:
+            await record_login_failure(credentials.email)
             log_security_event("login", user_email=credentials.email, user_id=user.id, success=False, details="Invalid password")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -156,16 +162,15 @@ async def login(request: Request, credentials: UserLogin, db: Session = Depends(
                 detail="User account is inactive"
             )
 
-        # Update last login
+        # Update last login, rehashing if the configured bcrypt cost changed
         user.last_login = datetime.utcnow()
-        db.commit()
+        if upgraded_hash:
+            user.hashed_password = upgraded_hash
+        await db.commit()
+        await clear_login_failures(credentials.email)
 
         # Create tokens
-        access_token = create_access_token(data={
-            "user_id": user.id,
-            "email": user.email,
-            "role": user.role
-        })
+        access_token = create_access_token(data=access_token_claims(user))
 
         refresh_token = create_refresh_token(data={
             "user_id": user.id,
@@ -187,7 +192,7 @@ async def login(request: Request, credentials: UserLogin, db: Session = Depends(
         # Re-raise HTTPExceptions (validation errors, auth errors, etc.)
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Login failed for {credentials.email}: {str(e)}")
         log_security_event("login", user_email=credentials.email, success=False,
                           details=f"System error: {type(e).__name__}")
@@ -198,9 +203,10 @@ async def login(request: Request, credentials: UserLogin, db: Session = Depends(
 
 
 @router.post("/refresh", response_model=Token)
+@query_budget(1)
 async def refresh_access_token(
     refresh_token_data: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Refresh access token using refresh token."""
     try:
@@ -208,6 +214,7 @@ async def refresh_access_token(
         payload = decode_token(refresh_token_data.refresh_token)
         
         if payload is None:
+            log_security_event("token_refresh", success=False, details="Invalid refresh token")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid refresh token"
@@ -215,6 +222,7 @@ async def refresh_access_token(
         
         # Verify it's a refresh token
         if payload.get("type") != "refresh":
+            log_security_event("token_refresh", user_id=payload.get("user_id"), success=False, details="Invalid token type")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token type"
@@ -228,21 +236,19 @@ async def refresh_access_token(
             )
         
         # Get user from database
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User).where(User.id == user_id))
         
         if not user or not user.is_active:
+            log_security_event("token_refresh", user_id=user_id, success=False, details="User not found or inactive")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found or inactive"
             )
         
         # Create new access token
-        new_access_token = create_access_token(data={
-            "user_id": user.id,
-            "email": user.email,
-            "role": user.role
-        })
+        new_access_token = create_access_token(data=access_token_claims(user))
         
+        log_security_event("token_refresh", user_email=user.email, user_id=user.id, success=True)
         logger.info(f"Token refreshed for user: {user.email}")
         
         return {
@@ -262,8 +268,9 @@ async def refresh_access_token(
 
 
 @router.get("/me", response_model=UserResponse)
+@query_budget(1)
 async def get_current_user_info(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get current user information."""
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-import psutil
-from app.database import get_db
+import time
+from app.database import get_db, get_pool_stats
 from app.utils.monitoring import get_system_metrics
 
 router = APIRouter(tags=["Health"])
@@ -19,7 +19,7 @@ async def health_check():
 
 
 @router.get("/health/detailed")
-async def detailed_health_check(db: Session = Depends(get_db)):
+async def detailed_health_check(db: AsyncSession = Depends(get_db)):
     """Detailed health check with database and system metrics."""
     health_status = {
         "status": "healthy",
@@ -31,10 +31,12 @@ async def detailed_health_check(db: Session = Depends(get_db)):
     # Check database
     try:
         from sqlalchemy import text
-        db.execute(text("SELECT 1"))
+        start = time.perf_counter()
+        await db.execute(text("SELECT 1"))
         health_status["checks"]["database"] = {
             "status": "healthy",
-            "latency_ms": 0  # Could measure actual latency
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            "pools": get_pool_stats()
         }
     except Exception as e:
         health_status["status"] = "degraded"
@@ -66,11 +68,11 @@ async def detailed_health_check(db: Session = Depends(get_db)):
 
 
 @router.get("/health/ready")
-async def readiness_check(db: Session = Depends(get_db)):
+async def readiness_check(db: AsyncSession = Depends(get_db)):
     """Kubernetes readiness probe."""
     try:
         from sqlalchemy import text
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {"status": "ready"}
     except Exception:
         return {"status": "not_ready"}, status.HTTP_503_SERVICE_UNAVAILABLE
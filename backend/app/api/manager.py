@@ -1,23 +1,30 @@
+from datetime import date, datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.config import settings
+from app.database import get_db, get_read_db
 from app.schemas.manager import (
     ProductSpreadCreate,
     ProductSpreadUpdate,
     ProductSpreadResponse,
     BranchCommissionUpdate,
-    BranchResponse
+    BranchResponse,
+    BranchDailyFlow
 )
 from app.models.product_spread import ProductSpread
 from app.models.branch import Branch
 from app.models.user import User, UserRole
-from app.middleware.auth import get_current_user
+from app.middleware.auth import Principal, get_current_principal
+from app.middleware.query_stats import query_budget
+from app.services.clients import client_listing
+from app.services.rollups import branch_daily_flows
 
 router = APIRouter(prefix="/manager", tags=["Manager Operations"])
 
 
-def require_manager(current_user: User = Depends(get_current_user)):
+def require_manager(current_user: Principal = Depends(get_current_principal)):
     """Dependency to ensure user is a manager."""
     if current_user.role != UserRole.MANAGER:
         raise HTTPException(
@@ -30,23 +37,25 @@ def require_manager(current_user: User = Depends(get_current_user)):
 # ==================== Product Spreads Endpoints ====================
 
 @router.get("/spreads", response_model=List[ProductSpreadResponse])
+@query_budget(2)
 async def get_all_spreads(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Get all product spreads (manager only)."""
-    spreads = db.query(ProductSpread).all()
+    spreads = (await db.scalars(select(ProductSpread))).all()
     return spreads
 
 
 @router.get("/spreads/{symbol}", response_model=ProductSpreadResponse)
+@query_budget(2)
 async def get_spread_by_symbol(
     symbol: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Get spread for a specific product symbol (manager only)."""
-    spread = db.query(ProductSpread).filter(ProductSpread.symbol == symbol.upper()).first()
+    spread = await db.scalar(select(ProductSpread).where(ProductSpread.symbol == symbol.upper()))
     if not spread:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -58,15 +67,15 @@ async def get_spread_by_symbol(
 @router.post("/spreads", response_model=ProductSpreadResponse, status_code=status.HTTP_201_CREATED)
 async def create_spread(
     spread_data: ProductSpreadCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Create a new product spread (manager only)."""
 
     # Check if spread already exists for this symbol
-    existing_spread = db.query(ProductSpread).filter(
+    existing_spread = await db.scalar(select(ProductSpread).where(
         ProductSpread.symbol == spread_data.symbol.upper()
-    ).first()
+    ))
 
     if existing_spread:
         raise HTTPException(
@@ -85,8 +94,8 @@ async def create_spread(
     )
 
     db.add(new_spread)
-    db.commit()
-    db.refresh(new_spread)
+    await db.commit()
+    await db.refresh(new_spread)
 
     return new_spread
 
@@ -95,12 +104,12 @@ async def create_spread(
 async def update_spread(
     symbol: str,
     spread_data: ProductSpreadUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Update product spread (manager only)."""
 
-    spread = db.query(ProductSpread).filter(ProductSpread.symbol == symbol.upper()).first()
+    spread = await db.scalar(select(ProductSpread).where(ProductSpread.symbol == symbol.upper()))
     if not spread:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -115,8 +124,8 @@ async def update_spread(
     if spread_data.is_active is not None:
         spread.is_active = spread_data.is_active
 
-    db.commit()
-    db.refresh(spread)
+    await db.commit()
+    await db.refresh(spread)
 
     return spread
 
@@ -124,20 +133,20 @@ async def update_spread(
 @router.delete("/spreads/{symbol}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_spread(
     symbol: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Delete a product spread (manager only)."""
 
-    spread = db.query(ProductSpread).filter(ProductSpread.symbol == symbol.upper()).first()
+    spread = await db.scalar(select(ProductSpread).where(ProductSpread.symbol == symbol.upper()))
     if not spread:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Product spread for {symbol} not found"
         )
 
-    db.delete(spread)
-    db.commit()
+    await db.delete(spread)
+    await db.commit()
 
     return None
 
@@ -145,23 +154,25 @@ async def delete_spread(
 # ==================== Branch Commissions Endpoints ====================
 
 @router.get("/branches", response_model=List[BranchResponse])
+@query_budget(2)
 async def get_all_branches(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Get all branches with their commissions (manager only)."""
-    branches = db.query(Branch).all()
+    branches = (await db.scalars(select(Branch))).all()
     return branches
 
 
 @router.get("/branches/{branch_id}", response_model=BranchResponse)
+@query_budget(2)
 async def get_branch(
     branch_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Get a specific branch (manager only)."""
-    branch = db.query(Branch).filter(Branch.id == branch_id).first()
+    branch = await db.scalar(select(Branch).where(Branch.id == branch_id))
     if not branch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -174,12 +185,12 @@ async def get_branch(
 async def update_branch_commission(
     branch_id: int,
     commission_data: BranchCommissionUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Update commission for a specific branch (manager only)."""
 
-    branch = db.query(Branch).filter(Branch.id == branch_id).first()
+    branch = await db.scalar(select(Branch).where(Branch.id == branch_id))
     if not branch:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -189,33 +200,58 @@ async def update_branch_commission(
     # Update commission
     branch.commission_per_lot = commission_data.commission_per_lot
 
-    db.commit()
-    db.refresh(branch)
+    await db.commit()
+    await db.refresh(branch)
 
     return branch
 
 
+# ==================== Branch Dashboard Endpoints ====================
+
+@router.get("/daily-flows", response_model=List[BranchDailyFlow])
+@query_budget(2)
+async def get_branch_daily_flows(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    branch_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """Deposits, withdrawals, transfers and net flow per branch per day, from the daily rollups (manager only)."""
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+    if (end - start).days >= settings.BRANCH_FLOWS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BRANCH_FLOWS_MAX_DAYS} days per request"
+        )
+    return await branch_daily_flows(db, start, end, branch_id)
+
+
 # ==================== User Management Endpoints ====================
 
 @router.get("/admins")
+@query_budget(2)
 async def get_all_admins(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Get all admin users (manager only)."""
-    from app.models.user import UserRole
-    
-    admins = db.query(User).filter(User.role == UserRole.ADMIN).all()
+    # Branch names come back in the same row: one query for the whole list
+    rows = (await db.execute(
+        select(User, Branch.name)
+        .outerjoin(Branch, User.branch_id == Branch.id)
+        .where(User.role == UserRole.ADMIN)
+        .order_by(User.branch_id, User.id)
+    )).all()
     
-    result = []
-    for admin in admins:
-        branch_name = None
-        if admin.branch_id:
-            branch = db.query(Branch).filter(Branch.id == admin.branch_id).first()
-            if branch:
-                branch_name = branch.name
-        
-        result.append({
+    return [
+        {
             "id": admin.id,
             "name": admin.name,
             "email": admin.email,
@@ -224,32 +260,27 @@ async def get_all_admins(
             "admin_balance": float(admin.admin_balance or 0),
             "is_active": admin.is_active,
             "created_at": admin.created_at
-        })
-    
-    return result
+        }
+        for admin, branch_name in rows
+    ]
 
 
 @router.get("/clients")
+@query_budget(2)
 async def get_all_clients(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Get all client users with their accounts (manager only)."""
-    from app.models.user import UserRole
-    from app.models.account import Account
-    
-    clients = db.query(User).filter(User.role == UserRole.CLIENT).all()
+    rows = (await db.execute(
+        client_listing().add_columns(Branch.name)
+        .outerjoin(Branch, User.branch_id == Branch.id)
+        .where(User.role == UserRole.CLIENT)
+        .order_by(User.branch_id, User.id)  # the order of ix_users_role_branch_id
+    )).all()
     
-    result = []
-    for client in clients:
-        account = db.query(Account).filter(Account.user_id == client.id).first()
-        branch_name = None
-        if client.branch_id:
-            branch = db.query(Branch).filter(Branch.id == client.branch_id).first()
-            if branch:
-                branch_name = branch.name
-        
-        result.append({
+    return [
+        {
             "id": client.id,
             "name": client.name,
             "email": client.email,
@@ -261,6 +292,6 @@ async def get_all_clients(
             "trading_balance": float(account.trading_balance if account else 0),
             "is_active": client.is_active,
             "created_at": client.created_at
-        })
-    
-    return result
+        }
+        for client, account, branch_name in rows
+    ]
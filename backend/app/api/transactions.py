@@ -1,21 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from datetime import datetime
-from decimal import Decimal
+import csv
+import io
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, contains_eager
+from datetime import datetime, timezone
 from typing import List, Optional
 
-from app.database import get_db
-from app.models import User, Account, Transaction, TransactionRequest, UserRole, TransactionType, TransactionStatus, RequestStatus
+from app.config import settings
+from app.database import get_db, get_read_db
+from app.models import (
+    User, Transaction, TransactionRequest, UserRole, TransactionType, TransactionStatus, RequestStatus, RequestType
+)
 from app.schemas.transaction_request import (
+    BulkPostingEntry,
+    BulkPostingRequest,
     DepositWithdrawRequest,
     TransactionRequestApprove,
+    TransactionRequestBatchApprove,
+    TransactionRequestRelease,
     TransactionRequestResponse,
     TransactionRequestCreate,
     ProfitTransferRequest,
     TransactionHistoryResponse
 )
-from app.middleware.auth import get_current_user
+from app.middleware.auth import Principal, get_current_principal
+from app.middleware.idempotency import idempotent, idempotency_reference
+from app.middleware.query_stats import query_budget
+from app.services import exports, ledger, request_queue
+from app.services.ledger import BalanceChanged, BalanceNotFound, DuplicatePosting, InsufficientFunds
 from app.utils.logging import get_logger
+from app.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, cursor_key, paginate, split_page
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
@@ -23,7 +41,7 @@ router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 # ==================== Manager Transaction Endpoints ====================
 
-def require_manager(current_user: User = Depends(get_current_user)):
+def require_manager(current_user: Principal = Depends(get_current_principal)):
     """Dependency to ensure user is a manager"""
     if current_user.role != UserRole.MANAGER:
         raise HTTPException(
@@ -33,7 +51,7 @@ def require_manager(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-def require_admin(current_user: User = Depends(get_current_user)):
+def require_admin(current_user: Principal = Depends(get_current_principal)):
     """Dependency to ensure user is an admin"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -43,7 +61,7 @@ def require_admin(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-def require_client(current_user: User = Depends(get_current_user)):
+def require_client(current_user: Principal = Depends(get_current_principal)):
     """Dependency to ensure user is a client"""
     if current_user.role != UserRole.CLIENT:
         raise HTTPException(
@@ -54,55 +72,46 @@ def require_client(current_user: User = Depends(get_current_user)):
 
 
 @router.post("/manager/deposit-admin", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(4)
 async def manager_deposit_to_admin(
     request: DepositWithdrawRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Manager deposits money to admin account"""
     try:
-        admin_user = db.query(User).filter(
-            User.id == request.target_user_id,
-            User.role == UserRole.ADMIN
-        ).first()
-        
-        if not admin_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Admin user not found"
-            )
-        
-        old_balance = admin_user.admin_balance or Decimal('0.0')
-        admin_user.admin_balance = old_balance + request.amount
-        
-        transaction = Transaction(
-            user_id=admin_user.id,
-            account_id=None,
+        posting = await ledger.post_to_admin_balance(
+            db, request.target_user_id, request.amount,
             transaction_type=TransactionType.DEPOSIT,
-            amount=request.amount,
-            balance_before=old_balance,
-            balance_after=admin_user.admin_balance,
             description=f"Deposit by Manager: {request.notes}",
-            status=TransactionStatus.COMPLETED,
             performed_by_id=current_user.id,
-            to_user_id=admin_user.id
+            reference=idempotency_reference(),
+            to_user_id=request.target_user_id
         )
+        await db.commit()
         
-        db.add(transaction)
-        db.commit()
-        
-        logger.info(f"Manager {current_user.email} deposited ${request.amount} to Admin {admin_user.email}")
+        logger.info(f"Manager {current_user.email} deposited ${request.amount} to Admin {posting.owner_email}")
         
         return {
             "success": True,
-            "message": f"Successfully deposited ${request.amount} to {admin_user.name}",
-            "new_balance": float(admin_user.admin_balance)
+            "message": f"Successfully deposited ${request.amount} to {posting.owner_name}",
+            "new_balance": float(posting.balance_after)
         }
         
-    except HTTPException:
-        raise
+    except BalanceNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Admin user not found"
+        )
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Deposit to admin failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -111,62 +120,51 @@ async def manager_deposit_to_admin(
 
 
 @router.post("/manager/withdraw-admin", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(4)
 async def manager_withdraw_from_admin(
     request: DepositWithdrawRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Manager withdraws money from admin account"""
     try:
-        admin_user = db.query(User).filter(
-            User.id == request.target_user_id,
-            User.role == UserRole.ADMIN
-        ).first()
-        
-        if not admin_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Admin user not found"
-            )
-        
-        old_balance = admin_user.admin_balance or Decimal('0.0')
-        
-        if old_balance < request.amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient balance. Admin has ${old_balance}"
-            )
-        
-        admin_user.admin_balance = old_balance - request.amount
-        
-        transaction = Transaction(
-            user_id=admin_user.id,
-            account_id=None,
+        posting = await ledger.post_to_admin_balance(
+            db, request.target_user_id, -request.amount,
             transaction_type=TransactionType.WITHDRAW,
-            amount=request.amount,
-            balance_before=old_balance,
-            balance_after=admin_user.admin_balance,
             description=f"Withdrawal by Manager: {request.notes}",
-            status=TransactionStatus.COMPLETED,
             performed_by_id=current_user.id,
-            from_user_id=admin_user.id
+            reference=idempotency_reference(),
+            from_user_id=request.target_user_id
         )
+        await db.commit()
         
-        db.add(transaction)
-        db.commit()
-        
-        logger.info(f"Manager {current_user.email} withdrew ${request.amount} from Admin {admin_user.email}")
+        logger.info(f"Manager {current_user.email} withdrew ${request.amount} from Admin {posting.owner_email}")
         
         return {
             "success": True,
-            "message": f"Successfully withdrew ${request.amount} from {admin_user.name}",
-            "new_balance": float(admin_user.admin_balance)
+            "message": f"Successfully withdrew ${request.amount} from {posting.owner_name}",
+            "new_balance": float(posting.balance_after)
         }
         
-    except HTTPException:
-        raise
+    except BalanceNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Admin user not found"
+        )
+    except InsufficientFunds as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient balance. Admin has ${e.balance}"
+        )
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Withdrawal from admin failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -175,64 +173,48 @@ async def manager_withdraw_from_admin(
 
 
 @router.post("/manager/deposit-client", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(4)
 async def manager_deposit_to_client(
     request: DepositWithdrawRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Manager deposits money directly to client trading balance"""
     try:
-        client_user = db.query(User).filter(
-            User.id == request.target_user_id,
-            User.role == UserRole.CLIENT
-        ).first()
-        
-        if not client_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client user not found"
-            )
-        
-        account = db.query(Account).filter(Account.user_id == client_user.id).first()
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client account not found"
-            )
-        
-        old_balance = account.trading_balance
-        account.trading_balance = old_balance + request.amount
-        account.balance = account.wallet_balance + account.trading_balance
-        
-        transaction = Transaction(
-            user_id=client_user.id,
-            account_id=account.id,
+        posting = await ledger.post_to_account(
+            db, request.target_user_id, {ledger.TRADING: request.amount},
             transaction_type=TransactionType.DEPOSIT,
-            amount=request.amount,
-            balance_before=old_balance,
-            balance_after=account.trading_balance,
             description=f"Deposit by Manager: {request.notes}",
-            status=TransactionStatus.COMPLETED,
             performed_by_id=current_user.id,
-            to_user_id=client_user.id
+            reference=idempotency_reference(),
+            to_user_id=request.target_user_id,
+            owner_conditions=[User.role == UserRole.CLIENT]
         )
+        await db.commit()
         
-        db.add(transaction)
-        db.commit()
-        
-        logger.info(f"Manager {current_user.email} deposited ${request.amount} to Client {client_user.email}")
+        logger.info(f"Manager {current_user.email} deposited ${request.amount} to Client {posting.owner_email}")
         
         return {
             "success": True,
-            "message": f"Successfully deposited ${request.amount} to {client_user.name}",
-            "new_trading_balance": float(account.trading_balance),
-            "new_total_balance": float(account.balance)
+            "message": f"Successfully deposited ${request.amount} to {posting.owner_name}",
+            "new_trading_balance": float(posting.balances[ledger.TRADING]),
+            "new_total_balance": float(posting.balances["balance"])
         }
         
-    except HTTPException:
-        raise
+    except BalanceNotFound as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client account not found" if e.owner_found else "Client user not found"
+        )
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Deposit to client failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -241,71 +223,53 @@ async def manager_deposit_to_client(
 
 
 @router.post("/manager/withdraw-client", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(4)
 async def manager_withdraw_from_client(
     request: DepositWithdrawRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
 ):
     """Manager withdraws money from client wallet balance"""
     try:
-        client_user = db.query(User).filter(
-            User.id == request.target_user_id,
-            User.role == UserRole.CLIENT
-        ).first()
-        
-        if not client_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client user not found"
-            )
-        
-        account = db.query(Account).filter(Account.user_id == client_user.id).first()
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client account not found"
-            )
-        
-        old_balance = account.wallet_balance
-        
-        if old_balance < request.amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient wallet balance. Client has ${old_balance}"
-            )
-        
-        account.wallet_balance = old_balance - request.amount
-        account.balance = account.wallet_balance + account.trading_balance
-        
-        transaction = Transaction(
-            user_id=client_user.id,
-            account_id=account.id,
+        posting = await ledger.post_to_account(
+            db, request.target_user_id, {ledger.WALLET: -request.amount},
             transaction_type=TransactionType.WITHDRAW,
-            amount=request.amount,
-            balance_before=old_balance,
-            balance_after=account.wallet_balance,
             description=f"Withdrawal by Manager: {request.notes}",
-            status=TransactionStatus.COMPLETED,
             performed_by_id=current_user.id,
-            from_user_id=client_user.id
+            reference=idempotency_reference(),
+            from_user_id=request.target_user_id,
+            owner_conditions=[User.role == UserRole.CLIENT]
         )
+        await db.commit()
         
-        db.add(transaction)
-        db.commit()
-        
-        logger.info(f"Manager {current_user.email} withdrew ${request.amount} from Client {client_user.email}")
+        logger.info(f"Manager {current_user.email} withdrew ${request.amount} from Client {posting.owner_email}")
         
         return {
             "success": True,
-            "message": f"Successfully withdrew ${request.amount} from {client_user.name}",
-            "new_wallet_balance": float(account.wallet_balance),
-            "new_total_balance": float(account.balance)
+            "message": f"Successfully withdrew ${request.amount} from {posting.owner_name}",
+            "new_wallet_balance": float(posting.balances[ledger.WALLET]),
+            "new_total_balance": float(posting.balances["balance"])
         }
         
-    except HTTPException:
-        raise
+    except BalanceNotFound as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client account not found" if e.owner_found else "Client user not found"
+        )
+    except InsufficientFunds as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient wallet balance. Client has ${e.balance}"
+        )
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Withdrawal from client failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -316,65 +280,48 @@ async def manager_withdraw_from_client(
 # ==================== Admin Transaction Endpoints ====================
 
 @router.post("/admin/deposit-client", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(4)
 async def admin_deposit_to_client(
     request: DepositWithdrawRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Admin deposits money to client in their branch"""
     try:
-        client_user = db.query(User).filter(
-            User.id == request.target_user_id,
-            User.role == UserRole.CLIENT,
-            User.branch_id == current_user.branch_id
-        ).first()
-        
-        if not client_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client not found in your branch"
-            )
-        
-        account = db.query(Account).filter(Account.user_id == client_user.id).first()
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client account not found"
-            )
-        
-        old_balance = account.trading_balance
-        account.trading_balance = old_balance + request.amount
-        account.balance = account.wallet_balance + account.trading_balance
-        
-        transaction = Transaction(
-            user_id=client_user.id,
-            account_id=account.id,
+        posting = await ledger.post_to_account(
+            db, request.target_user_id, {ledger.TRADING: request.amount},
             transaction_type=TransactionType.DEPOSIT,
-            amount=request.amount,
-            balance_before=old_balance,
-            balance_after=account.trading_balance,
             description=f"Deposit by Admin: {request.notes}",
-            status=TransactionStatus.COMPLETED,
             performed_by_id=current_user.id,
-            to_user_id=client_user.id
+            reference=idempotency_reference(),
+            to_user_id=request.target_user_id,
+            owner_conditions=[User.role == UserRole.CLIENT, User.branch_id == current_user.branch_id]
         )
+        await db.commit()
         
-        db.add(transaction)
-        db.commit()
-        
-        logger.info(f"Admin {current_user.email} deposited ${request.amount} to Client {client_user.email}")
+        logger.info(f"Admin {current_user.email} deposited ${request.amount} to Client {posting.owner_email}")
         
         return {
             "success": True,
-            "message": f"Successfully deposited ${request.amount} to {client_user.name}",
-            "new_trading_balance": float(account.trading_balance),
-            "new_total_balance": float(account.balance)
+            "message": f"Successfully deposited ${request.amount} to {posting.owner_name}",
+            "new_trading_balance": float(posting.balances[ledger.TRADING]),
+            "new_total_balance": float(posting.balances["balance"])
         }
         
-    except HTTPException:
-        raise
+    except BalanceNotFound as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client account not found" if e.owner_found else "Client not found in your branch"
+        )
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Admin deposit failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -383,72 +330,53 @@ async def admin_deposit_to_client(
 
 
 @router.post("/admin/withdraw-client", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(4)
 async def admin_withdraw_from_client(
     request: DepositWithdrawRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_admin)
 ):
     """Admin withdraws money from client in their branch"""
     try:
-        client_user = db.query(User).filter(
-            User.id == request.target_user_id,
-            User.role == UserRole.CLIENT,
-            User.branch_id == current_user.branch_id
-        ).first()
-        
-        if not client_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client not found in your branch"
-            )
-        
-        account = db.query(Account).filter(Account.user_id == client_user.id).first()
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client account not found"
-            )
-        
-        old_balance = account.wallet_balance
-        
-        if old_balance < request.amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient wallet balance. Client has ${old_balance}"
-            )
-        
-        account.wallet_balance = old_balance - request.amount
-        account.balance = account.wallet_balance + account.trading_balance
-        
-        transaction = Transaction(
-            user_id=client_user.id,
-            account_id=account.id,
+        posting = await ledger.post_to_account(
+            db, request.target_user_id, {ledger.WALLET: -request.amount},
             transaction_type=TransactionType.WITHDRAW,
-            amount=request.amount,
-            balance_before=old_balance,
-            balance_after=account.wallet_balance,
             description=f"Withdrawal by Admin: {request.notes}",
-            status=TransactionStatus.COMPLETED,
             performed_by_id=current_user.id,
-            from_user_id=client_user.id
+            reference=idempotency_reference(),
+            from_user_id=request.target_user_id,
+            owner_conditions=[User.role == UserRole.CLIENT, User.branch_id == current_user.branch_id]
         )
+        await db.commit()
         
-        db.add(transaction)
-        db.commit()
-        
-        logger.info(f"Admin {current_user.email} withdrew ${request.amount} from Client {client_user.email}")
+        logger.info(f"Admin {current_user.email} withdrew ${request.amount} from Client {posting.owner_email}")
         
         return {
             "success": True,
-            "message": f"Successfully withdrew ${request.amount} from {client_user.name}",
-            "new_wallet_balance": float(account.wallet_balance),
-            "new_total_balance": float(account.balance)
+            "message": f"Successfully withdrew ${request.amount} from {posting.owner_name}",
+            "new_wallet_balance": float(posting.balances[ledger.WALLET]),
+            "new_total_balance": float(posting.balances["balance"])
         }
         
-    except HTTPException:
-        raise
+    except BalanceNotFound as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client account not found" if e.owner_found else "Client not found in your branch"
+        )
+    except InsufficientFunds as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient wallet balance. Client has ${e.balance}"
+        )
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Admin withdrawal failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -456,58 +384,273 @@ async def admin_withdraw_from_client(
         )
 
 
+# ==================== Bulk Posting Endpoints ====================
+
+def require_manager_or_admin(current_user: Principal = Depends(get_current_principal)):
+    """Dependency to ensure user is a manager or admin"""
+    if current_user.role not in [UserRole.MANAGER, UserRole.ADMIN]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only managers and admins can perform this action"
+        )
+    return current_user
+
+
+async def _post_bulk(db: AsyncSession, current_user: Principal, operation: str, mode: str, rows: list) -> dict:
+    """Post validated rows ((row, BulkPostingEntry) or (row, error)) as one batch; returns the per-row summary."""
+    if len(rows) > settings.BULK_POSTING_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_POSTING_MAX_ROWS} entries per request"
+        )
+    
+    deposit = operation == 'deposit'
+    performer = current_user.role.value.capitalize()
+    valid = [(row, entry) for row, entry in rows if isinstance(entry, BulkPostingEntry)]
+    owner_conditions = [User.role == UserRole.CLIENT]
+    if current_user.role == UserRole.ADMIN:
+        owner_conditions.append(User.branch_id == current_user.branch_id)
+    
+    results = {}
+    # Rows that failed parsing already sink an all-or-nothing batch
+    if valid and (mode == 'best_effort' or len(valid) == len(rows)):
+        posted = await ledger.post_batch(
+            db,
+            [
+                ledger.BatchEntry(
+                    user_id=entry.target_user_id,
+                    amount=entry.amount if deposit else -entry.amount,
+                    description=f"{'Deposit' if deposit else 'Withdrawal'} by {performer}: {entry.notes}",
+                    reference=idempotency_reference(row)
+                )
+                for row, entry in valid
+            ],
+            ledger.TRADING if deposit else ledger.WALLET,
+            transaction_type=TransactionType.DEPOSIT if deposit else TransactionType.WITHDRAW,
+            performed_by_id=current_user.id,
+            owner_conditions=owner_conditions,
+            atomic=mode == 'atomic'
+        )
+        results = {row: result for (row, _), result in zip(valid, posted)}
+    
+    summary = []
+    for row, entry in rows:
+        result = results.get(row)
+        if result is None:
+            if isinstance(entry, BulkPostingEntry):
+                summary.append({"row": row, "target_user_id": entry.target_user_id, "amount": float(entry.amount), "status": "not_applied"})
+            else:
+                summary.append({"row": row, "status": "failed", "error": entry})
+            continue
+        summary.append({
+            "row": row,
+            "target_user_id": result.user_id,
+            "amount": float(result.amount),
+            "status": result.status,
+            "error": result.error,
+            "transaction_id": result.transaction_id,
+            "new_balance": float(result.balance_after) if result.balance_after is not None else None
+        })
+    
+    failed = sum(1 for item in summary if item["status"] == "failed")
+    if mode == 'atomic' and failed:
+        for item in summary:
+            if item["status"] == "posted":
+                item.update(status="not_applied", transaction_id=None, new_balance=None)
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": f"No entries were posted: {failed} of {len(rows)} rows failed", "results": summary}
+        )
+    
+    await db.commit()
+    posted_count = sum(1 for item in summary if item["status"] == "posted")
+    logger.info(f"{performer} {current_user.email} bulk {operation}: posted {posted_count} of {len(rows)} entries")
+    
+    return {
+        "success": failed == 0,
+        "mode": mode,
+        "posted": posted_count,
+        "failed": failed,
+        "results": summary
+    }
+
+
+@router.post("/bulk", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(5)
+async def bulk_post(
+    request: BulkPostingRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager_or_admin)
+):
+    """Manager/Admin deposits to or withdraws from many clients in one transaction"""
+    try:
+        return await _post_bulk(
+            db, current_user, request.operation, request.mode,
+            list(enumerate(request.entries, start=1))
+        )
+    except BalanceChanged:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A client balance changed while posting. Nothing was posted; please retry"
+        )
+    except HTTPException:
+        raise
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Bulk {request.operation} failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process bulk {request.operation}"
+        )
+
+
+@router.post("/bulk/csv", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(5)
+async def bulk_post_csv(
+    file: UploadFile = File(..., description="CSV with target_user_id, amount, notes columns"),
+    operation: str = Form(..., description="deposit or withdraw"),
+    mode: str = Form("atomic", description="atomic (all-or-nothing) or best_effort"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager_or_admin)
+):
+    """Bulk deposit/withdrawal from an uploaded CSV file"""
+    if operation not in ['deposit', 'withdraw'] or mode not in ['atomic', 'best_effort']:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="operation must be deposit or withdraw; mode must be atomic or best_effort"
+        )
+    try:
+        reader = csv.DictReader(io.StringIO((await file.read()).decode("utf-8-sig")))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV file must be UTF-8 encoded")
+    missing = {"target_user_id", "amount", "notes"} - set(reader.fieldnames or [])
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV file is missing columns: {', '.join(sorted(missing))}"
+        )
+    
+    rows = []
+    for row, record in enumerate(reader, start=1):
+        try:
+            rows.append((row, BulkPostingEntry(
+                target_user_id=record["target_user_id"], amount=record["amount"], notes=record["notes"]
+            )))
+        except ValidationError as e:
+            rows.append((row, "; ".join(f"{err['loc'][0]}: {err['msg']}" for err in e.errors())))
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV file has no entries")
+    
+    try:
+        return await _post_bulk(db, current_user, operation, mode, rows)
+    except BalanceChanged:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A client balance changed while posting. Nothing was posted; please retry"
+        )
+    except HTTPException:
+        raise
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Bulk {operation} failed: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process bulk {operation}"
+        )
+
+
 # ==================== Transaction Request Endpoints ====================
 
+def _request_response(req: TransactionRequest, approved_by_name: Optional[str]) -> TransactionRequestResponse:
+    """Response for a request loaded with its user"""
+    return TransactionRequestResponse(
+        id=req.id,
+        user_id=req.user_id,
+        user_name=req.user.name,
+        user_email=req.user.email,
+        request_type=req.request_type.value,
+        requested_amount=req.requested_amount,
+        approved_amount=req.approved_amount,
+        status=req.status.value,
+        client_notes=req.client_notes,
+        admin_notes=req.admin_notes,
+        approved_by_id=req.approved_by_id,
+        approved_by_name=approved_by_name,
+        approved_at=req.approved_at,
+        claimed_by_id=req.claimed_by_id,
+        claim_expires_at=req.claim_expires_at,
+        created_at=req.created_at,
+        updated_at=req.updated_at
+    )
+
+
 @router.get("/requests", response_model=List[TransactionRequestResponse])
+@query_budget(2)
 async def get_transaction_requests(
-    status_filter: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    status_filter: Optional[RequestStatus] = None,
+    request_type: Optional[RequestType] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Get transaction requests based on user role"""
+    """Get transaction requests based on user role, newest first; see X-Next-Cursor for the next page"""
     try:
-        if current_user.role == UserRole.MANAGER:
-            query = db.query(TransactionRequest).join(User, TransactionRequest.user_id == User.id)
-        elif current_user.role == UserRole.ADMIN:
-            query = db.query(TransactionRequest).join(User, TransactionRequest.user_id == User.id).filter(
-                User.branch_id == current_user.branch_id
-            )
-        else:  # CLIENT
-            query = db.query(TransactionRequest).filter(TransactionRequest.user_id == current_user.id)
+        # Requester and approver come back in the same row: one query per page
+        approver = aliased(User)
+        query = select(
+            TransactionRequest, cursor_key(TransactionRequest.created_at), approver.name.label("approved_by_name")
+        ).join(
+            TransactionRequest.user
+        ).outerjoin(
+            approver, TransactionRequest.approved_by_id == approver.id
+        ).options(contains_eager(TransactionRequest.user))
+        if current_user.role == UserRole.ADMIN:
+            query = query.where(User.branch_id == current_user.branch_id)
+        elif current_user.role == UserRole.CLIENT:
+            query = query.where(TransactionRequest.user_id == current_user.id)
         
         if status_filter:
-            query = query.filter(TransactionRequest.status == status_filter)
-        
-        requests = query.order_by(TransactionRequest.created_at.desc()).all()
+            query = query.where(TransactionRequest.status == status_filter)
+        if request_type:
+            query = query.where(TransactionRequest.request_type == request_type)
+        if created_from:
+            query = query.where(TransactionRequest.created_at >= created_from)
+        if created_to:
+            query = query.where(TransactionRequest.created_at < created_to)
+        
+        query = paginate(
+            query, TransactionRequest.created_at, TransactionRequest.id, cursor, limit,
+            dialect=db.sync_session.get_bind().dialect.name
+        )
+        rows, next_cursor = split_page((await db.execute(query)).all(), limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
-        result = []
-        for req in requests:
-            approved_by_name = None
-            if req.approved_by_id:
-                approver = db.query(User).filter(User.id == req.approved_by_id).first()
-                if approver:
-                    approved_by_name = approver.name
-            
-            result.append(TransactionRequestResponse(
-                id=req.id,
-                user_id=req.user_id,
-                user_name=req.user.name,
-                user_email=req.user.email,
-                request_type=req.request_type.value,
-                requested_amount=req.requested_amount,
-                approved_amount=req.approved_amount,
-                status=req.status.value,
-                client_notes=req.client_notes,
-                admin_notes=req.admin_notes,
-                approved_by_id=req.approved_by_id,
-                approved_by_name=approved_by_name,
-                approved_at=req.approved_at,
-                created_at=req.created_at,
-                updated_at=req.updated_at
-            ))
-        
-        return result
+        return [_request_response(req, approved_by_name) for req, _, approved_by_name in rows]
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to fetch transaction requests: {str(e)}")
         raise HTTPException(
@@ -516,11 +659,84 @@ async def get_transaction_requests(
         )
 
 
+@router.post("/requests/claim", response_model=List[TransactionRequestResponse])
+@query_budget(4)
+async def claim_transaction_requests(
+    request_type: Optional[RequestType] = None,
+    limit: int = Query(10, ge=1, le=settings.REQUEST_CLAIM_MAX_BATCH),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager_or_admin)
+):
+    """
+    Admin/Manager claims the next pending requests, oldest first, for
+    REQUEST_CLAIM_LEASE_SECONDS; other approvers skip them until they are
+    decided, released or the lease runs out. Claiming again renews and
+    returns the requests still held.
+    """
+    if current_user.role == UserRole.ADMIN and not current_user.branch_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin is not assigned to a branch"
+        )
+    try:
+        claimed = await request_queue.claim_requests(
+            db, current_user.id, limit, settings.REQUEST_CLAIM_LEASE_SECONDS,
+            branch_id=current_user.branch_id if current_user.role == UserRole.ADMIN else None,
+            request_type=request_type
+        )
+        await db.commit()
+        if not claimed:
+            return []
+        
+        rows = (await db.execute(
+            select(TransactionRequest)
+            .join(TransactionRequest.user)
+            .options(contains_eager(TransactionRequest.user))
+            .where(TransactionRequest.id.in_(claimed))
+            .order_by(TransactionRequest.created_at, TransactionRequest.id)
+        )).scalars().all()
+        
+        logger.info(f"{current_user.role.value} {current_user.email} claimed {len(claimed)} requests")
+        return [_request_response(req, None) for req in rows]
+        
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Failed to claim transaction requests: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to claim requests"
+        )
+
+
+@router.post("/requests/release", status_code=status.HTTP_200_OK)
+@query_budget(2)
+async def release_transaction_requests(
+    request: TransactionRequestRelease,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager_or_admin)
+):
+    """Admin/Manager gives back claimed requests so other approvers can take them"""
+    try:
+        released = await request_queue.release_requests(db, current_user.id, request.request_ids)
+        await db.commit()
+        return {"success": True, "released": released}
+        
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Failed to release transaction requests: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to release requests"
+        )
+
+
 @router.post("/request", status_code=status.HTTP_201_CREATED)
+@idempotent
+@query_budget(3)
 async def create_transaction_request(
     request: TransactionRequestCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_client)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_client)
 ):
     """Client creates a deposit or withdrawal request"""
     try:
@@ -533,8 +749,8 @@ async def create_transaction_request(
         )
         
         db.add(trans_request)
-        db.commit()
-        db.refresh(trans_request)
+        await db.commit()
+        await db.refresh(trans_request)
         
         logger.info(f"Client {current_user.email} requested {request.request_type} of ${request.requested_amount}")
         
@@ -545,7 +761,7 @@ async def create_transaction_request(
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Failed to create transaction request: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -554,10 +770,12 @@ async def create_transaction_request(
 
 
 @router.post("/approve-request", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(7)
 async def approve_transaction_request(
     request: TransactionRequestApprove,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Admin/Manager approves or rejects a transaction request"""
     try:
@@ -567,9 +785,9 @@ async def approve_transaction_request(
                 detail="Only managers and admins can approve requests"
             )
         
-        trans_request = db.query(TransactionRequest).filter(
+        trans_request = await db.scalar(select(TransactionRequest).where(
             TransactionRequest.id == request.request_id
-        ).first()
+        ))
         
         if not trans_request:
             raise HTTPException(
@@ -579,7 +797,7 @@ async def approve_transaction_request(
         
         # Admin can only approve requests from their branch
         if current_user.role == UserRole.ADMIN:
-            client_user = db.query(User).filter(User.id == trans_request.user_id).first()
+            client_user = await db.scalar(select(User).where(User.id == trans_request.user_id))
             if client_user.branch_id != current_user.branch_id:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -592,12 +810,37 @@ async def approve_transaction_request(
                 detail=f"Request is already {trans_request.status.value}"
             )
         
+        now = datetime.now(timezone.utc)
+        if request_queue.held_by_other(trans_request, current_user.id, now):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Request is claimed by another approver"
+            )
+        
+        # Close the request only if it is still pending and nobody else has claimed it meanwhile
+        table = TransactionRequest.__table__
+        close = update(table).where(
+            table.c.id == trans_request.id,
+            table.c.status == RequestStatus.PENDING,
+            request_queue.claimable_by(current_user.id, now)
+        )
+        
         if request.action == 'reject':
-            trans_request.status = RequestStatus.REJECTED
-            trans_request.approved_by_id = current_user.id
-            trans_request.approved_at = datetime.utcnow()
-            trans_request.admin_notes = request.admin_notes
-            db.commit()
+            closed = (await db.execute(close.values(
+                status=RequestStatus.REJECTED,
+                approved_by_id=current_user.id,
+                approved_at=datetime.utcnow(),
+                admin_notes=request.admin_notes,
+                claimed_by_id=None,
+                claim_expires_at=None
+            ))).rowcount
+            if not closed:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Another approver decided or claimed this request"
+                )
+            await db.commit()
             
             return {
                 "success": True,
@@ -606,81 +849,72 @@ async def approve_transaction_request(
         
         approved_amount = request.approved_amount or trans_request.requested_amount
         
-        client_user = db.query(User).filter(User.id == trans_request.user_id).first()
-        account = db.query(Account).filter(Account.user_id == client_user.id).first()
-        
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Client account not found"
-            )
-        
         if trans_request.request_type.value == 'deposit':
-            old_balance = account.trading_balance
-            account.trading_balance = old_balance + approved_amount
-            account.balance = account.wallet_balance + account.trading_balance
-            
-            transaction = Transaction(
-                user_id=client_user.id,
-                account_id=account.id,
+            posting = await ledger.post_to_account(
+                db, trans_request.user_id, {ledger.TRADING: approved_amount},
                 transaction_type=TransactionType.DEPOSIT,
-                amount=approved_amount,
-                balance_before=old_balance,
-                balance_after=account.trading_balance,
                 description=f"Approved deposit request. Notes: {request.admin_notes or 'N/A'}",
-                status=TransactionStatus.COMPLETED,
                 performed_by_id=current_user.id,
-                to_user_id=client_user.id
+                reference=idempotency_reference(),
+                to_user_id=trans_request.user_id
             )
         else:
-            old_balance = account.wallet_balance
-            
-            if old_balance < approved_amount:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Insufficient wallet balance. Client has ${old_balance}"
-                )
-            
-            account.wallet_balance = old_balance - approved_amount
-            account.balance = account.wallet_balance + account.trading_balance
-            
-            transaction = Transaction(
-                user_id=client_user.id,
-                account_id=account.id,
+            posting = await ledger.post_to_account(
+                db, trans_request.user_id, {ledger.WALLET: -approved_amount},
                 transaction_type=TransactionType.WITHDRAW,
-                amount=approved_amount,
-                balance_before=old_balance,
-                balance_after=account.wallet_balance,
                 description=f"Approved withdrawal request. Notes: {request.admin_notes or 'N/A'}",
-                status=TransactionStatus.COMPLETED,
                 performed_by_id=current_user.id,
-                from_user_id=client_user.id
+                reference=idempotency_reference(),
+                from_user_id=trans_request.user_id
             )
         
-        db.add(transaction)
-        db.flush()
-        
-        trans_request.status = RequestStatus.APPROVED
-        trans_request.approved_amount = approved_amount
-        trans_request.approved_by_id = current_user.id
-        trans_request.approved_at = datetime.utcnow()
-        trans_request.admin_notes = request.admin_notes
-        trans_request.transaction_id = transaction.id
+        closed = (await db.execute(close.values(
+            status=RequestStatus.APPROVED,
+            approved_amount=approved_amount,
+            approved_by_id=current_user.id,
+            approved_at=datetime.utcnow(),
+            admin_notes=request.admin_notes,
+            transaction_id=posting.transaction_id,
+            claimed_by_id=None,
+            claim_expires_at=None
+        ))).rowcount
+        if not closed:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Another approver decided or claimed this request"
+            )
         
-        db.commit()
+        await db.commit()
         
         logger.info(f"{current_user.role.value} {current_user.email} approved {trans_request.request_type.value} request of ${approved_amount}")
         
         return {
             "success": True,
             "message": f"Request approved. ${approved_amount} {trans_request.request_type.value}ed",
-            "transaction_id": transaction.id
+            "transaction_id": posting.transaction_id
         }
         
+    except BalanceNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client account not found"
+        )
+    except InsufficientFunds as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient wallet balance. Client has ${e.balance}"
+        )
     except HTTPException:
         raise
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Failed to approve request: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -688,64 +922,216 @@ async def approve_transaction_request(
         )
 
 
+@router.post("/approve-requests", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(11)
+async def approve_transaction_requests(
+    request: TransactionRequestBatchApprove,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_manager_or_admin)
+):
+    """Admin/Manager approves or rejects many transaction requests in one transaction"""
+    if len(request.items) > settings.BULK_POSTING_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_POSTING_MAX_ROWS} requests per call"
+        )
+    try:
+        requests = {
+            row.id: row for row in (await db.execute(
+                select(
+                    TransactionRequest.id, TransactionRequest.user_id, TransactionRequest.request_type,
+                    TransactionRequest.requested_amount, TransactionRequest.status,
+                    TransactionRequest.claimed_by_id, TransactionRequest.claim_expires_at, User.branch_id
+                )
+                .join(User, TransactionRequest.user_id == User.id)
+                .where(TransactionRequest.id.in_({item.request_id for item in request.items}))
+            )).all()
+        }
+        
+        now = datetime.now(timezone.utc)
+        outcomes = []
+        postings = {RequestType.DEPOSIT: [], RequestType.WITHDRAWAL: []}
+        seen = set()
+        for item in request.items:
+            outcome = {"request_id": item.request_id, "action": item.action, "status": "failed", "error": None}
+            outcomes.append(outcome)
+            trans_request = requests.get(item.request_id)
+            if trans_request is None:
+                outcome["error"] = "Transaction request not found"
+            elif current_user.role == UserRole.ADMIN and trans_request.branch_id != current_user.branch_id:
+                outcome["error"] = "You can only approve requests from your branch"
+            elif item.request_id in seen:
+                outcome["error"] = "Request appears more than once in this batch"
+            elif trans_request.status != RequestStatus.PENDING:
+                outcome["error"] = f"Request is already {trans_request.status.value}"
+            elif request_queue.held_by_other(trans_request, current_user.id, now):
+                outcome["error"] = "Request is claimed by another approver"
+            elif item.action == 'reject':
+                outcome["status"] = "rejected"
+            else:
+                outcome["approved_amount"] = item.approved_amount or trans_request.requested_amount
+                postings[trans_request.request_type].append((item, trans_request, outcome))
+            seen.add(item.request_id)
+        
+        # Deposits credit trading balances, withdrawals debit wallets: one ledger batch each
+        for request_type, items in postings.items():
+            if not items:
+                continue
+            deposit = request_type == RequestType.DEPOSIT
+            results = await ledger.post_batch(
+                db,
+                [
+                    ledger.BatchEntry(
+                        user_id=trans_request.user_id,
+                        amount=outcome["approved_amount"] if deposit else -outcome["approved_amount"],
+                        description=(
+                            f"Approved {'deposit' if deposit else 'withdrawal'} request. "
+                            f"Notes: {item.admin_notes or 'N/A'}"
+                        ),
+                        reference=idempotency_reference(item.request_id)
+                    )
+                    for item, trans_request, outcome in items
+                ],
+                ledger.TRADING if deposit else ledger.WALLET,
+                transaction_type=TransactionType.DEPOSIT if deposit else TransactionType.WITHDRAW,
+                performed_by_id=current_user.id,
+                atomic=False
+            )
+            for (item, trans_request, outcome), result in zip(items, results):
+                if result.status == "posted":
+                    outcome.update(status="approved", transaction_id=result.transaction_id)
+                else:
+                    outcome["error"] = result.error
+        
+        # Close every decided request, but only if it is still pending and not claimed by someone else
+        approved_at = datetime.utcnow()
+        notes = {item.request_id: item.admin_notes for item in request.items}
+        decided = [
+            {
+                "request_id": outcome["request_id"],
+                "new_status": RequestStatus.APPROVED if outcome["status"] == "approved" else RequestStatus.REJECTED,
+                "amount": outcome.get("approved_amount") if outcome["status"] == "approved" else None,
+                "notes": notes[outcome["request_id"]],
+                "transaction_id": outcome.get("transaction_id"),
+            }
+            for outcome in outcomes if outcome["status"] in ("approved", "rejected")
+        ]
+        if decided:
+            table = TransactionRequest.__table__
+            closed = (await db.execute(
+                update(table)
+                .where(
+                    table.c.id == bindparam("request_id"),
+                    table.c.status == RequestStatus.PENDING,
+                    request_queue.claimable_by(current_user.id, now)
+                )
+                .values(
+                    status=bindparam("new_status"),
+                    approved_amount=bindparam("amount"),
+                    admin_notes=bindparam("notes"),
+                    transaction_id=bindparam("transaction_id"),
+                    approved_by_id=current_user.id,
+                    approved_at=approved_at,
+                    claimed_by_id=None,
+                    claim_expires_at=None
+                ),
+                decided
+            )).rowcount
+            if closed != len(decided):
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Another approver decided or claimed some of these requests. Nothing was applied; please retry"
+                )
+        await db.commit()
+        
+        for outcome in outcomes:
+            if "approved_amount" in outcome:
+                outcome["approved_amount"] = float(outcome["approved_amount"])
+        approved = sum(1 for outcome in outcomes if outcome["status"] == "approved")
+        rejected = sum(1 for outcome in outcomes if outcome["status"] == "rejected")
+        logger.info(f"{current_user.role.value} {current_user.email} approved {approved} and rejected {rejected} requests in a batch")
+        
+        return {
+            "success": approved + rejected == len(outcomes),
+            "approved": approved,
+            "rejected": rejected,
+            "failed": len(outcomes) - approved - rejected,
+            "results": outcomes
+        }
+        
+    except BalanceChanged:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A client balance changed while processing. Nothing was applied; please retry"
+        )
+    except HTTPException:
+        raise
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Failed to process request batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process request approvals"
+        )
+
+
 # ==================== Client Endpoints ====================
 
 @router.post("/transfer-profit", status_code=status.HTTP_200_OK)
+@idempotent
+@query_budget(4)
 async def transfer_profit_to_wallet(
     request: ProfitTransferRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_client)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(require_client)
 ):
     """Client transfers profit from trading balance to wallet balance"""
     try:
-        account = db.query(Account).filter(Account.user_id == current_user.id).first()
-        
-        if not account:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Account not found"
-            )
-        
-        if account.trading_balance < request.amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient trading balance. You have ${account.trading_balance}"
-            )
-        
-        old_trading = account.trading_balance
-        old_wallet = account.wallet_balance
-        
-        account.trading_balance = old_trading - request.amount
-        account.wallet_balance = old_wallet + request.amount
-        
-        transaction = Transaction(
-            user_id=current_user.id,
-            account_id=account.id,
+        posting = await ledger.post_to_account(
+            db, current_user.id, {ledger.TRADING: -request.amount, ledger.WALLET: request.amount},
             transaction_type=TransactionType.TRANSFER,
-            amount=request.amount,
-            balance_before=old_trading,
-            balance_after=account.trading_balance,
             description="Profit transfer from trading balance to wallet balance",
-            status=TransactionStatus.COMPLETED,
-            performed_by_id=current_user.id
+            performed_by_id=current_user.id,
+            reference=idempotency_reference()
         )
-        
-        db.add(transaction)
-        db.commit()
+        await db.commit()
         
         logger.info(f"Client {current_user.email} transferred ${request.amount} to wallet")
         
         return {
             "success": True,
             "message": f"Successfully transferred ${request.amount} to wallet",
-            "new_trading_balance": float(account.trading_balance),
-            "new_wallet_balance": float(account.wallet_balance)
+            "new_trading_balance": float(posting.balances[ledger.TRADING]),
+            "new_wallet_balance": float(posting.balances[ledger.WALLET])
         }
         
-    except HTTPException:
-        raise
+    except BalanceNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found"
+        )
+    except InsufficientFunds as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient trading balance. You have ${e.balance}"
+        )
+    except DuplicatePosting:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This request was already processed"
+        )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Profit transfer failed: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -754,25 +1140,47 @@ async def transfer_profit_to_wallet(
 
 
 @router.get("/history", response_model=List[TransactionHistoryResponse])
+@query_budget(2)
 async def get_transaction_history(
-    limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    transaction_type: Optional[TransactionType] = None,
+    status_filter: Optional[TransactionStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Get transaction history for current user"""
+    """Get transaction history for current user, newest first; see X-Next-Cursor for the next page"""
     try:
-        transactions = db.query(Transaction).filter(
+        performer = aliased(User)
+        query = select(
+            Transaction, cursor_key(Transaction.created_at), performer.name.label("performed_by_name")
+        ).outerjoin(
+            performer, Transaction.performed_by_id == performer.id
+        ).where(
             Transaction.user_id == current_user.id
-        ).order_by(Transaction.created_at.desc()).limit(limit).all()
+        )
+        if transaction_type:
+            query = query.where(Transaction.transaction_type == transaction_type)
+        if status_filter:
+            query = query.where(Transaction.status == status_filter)
+        if created_from:
+            query = query.where(Transaction.created_at >= created_from)
+        if created_to:
+            query = query.where(Transaction.created_at < created_to)
+        
+        query = paginate(
+            query, Transaction.created_at, Transaction.id, cursor, limit,
+            dialect=db.sync_session.get_bind().dialect.name
+        )
+        rows, next_cursor = split_page((await db.execute(query)).all(), limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
         result = []
-        for trans in transactions:
-            performed_by_name = None
-            if trans.performed_by_id:
-                performer = db.query(User).filter(User.id == trans.performed_by_id).first()
-                if performer:
-                    performed_by_name = performer.name
-            
+        for trans, _, performed_by_name in rows:
             result.append(TransactionHistoryResponse(
                 id=trans.id,
                 transaction_type=trans.transaction_type.value,
@@ -787,9 +1195,92 @@ async def get_transaction_history(
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to fetch transaction history: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch transaction history"
         )
+
+
+# ==================== Export Endpoints ====================
+
+@router.get("/export")
+async def export_transactions(
+    scope: str = Query("user", pattern="^(user|branch|all)$"),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    user_id: Optional[int] = None,
+    branch_id: Optional[int] = None,
+    transaction_type: Optional[TransactionType] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    after_id: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Stream transactions as CSV or NDJSON, in id order. Clients export their own
+    history, branch admins their branch and managers any user, branch or
+    everything. Resume an interrupted export with after_id.
+    """
+    if current_user.role == UserRole.ADMIN and not current_user.branch_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin is not assigned to a branch"
+        )
+    if scope == "user":
+        if user_id is None:
+            user_id = current_user.id
+        if current_user.role == UserRole.CLIENT and user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Clients can only export their own transactions"
+            )
+        # Admins only see users of their own branch
+        branch_id = current_user.branch_id if current_user.role == UserRole.ADMIN else None
+    elif scope == "branch":
+        if current_user.role == UserRole.CLIENT:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only managers and branch admins can export a branch"
+            )
+        if current_user.role == UserRole.ADMIN:
+            if branch_id is not None and branch_id != current_user.branch_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Admins can only export their own branch"
+                )
+            branch_id = current_user.branch_id
+        elif branch_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="branch_id is required for a branch export"
+            )
+        user_id = None
+    else:
+        if current_user.role != UserRole.MANAGER:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only managers can export all transactions"
+            )
+        user_id = branch_id = None
+
+    query = exports.export_query(
+        user_id=user_id,
+        branch_id=branch_id,
+        after_id=after_id,
+        transaction_type=transaction_type,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    logger.info(
+        f"{current_user.role.value} {current_user.email} exporting {scope} transactions "
+        f"(user={user_id}, branch={branch_id}, after_id={after_id}) as {export_format}"
+    )
+    return StreamingResponse(
+        exports.stream_export(db, query, export_format, settings.EXPORT_BATCH_SIZE),
+        media_type=exports.EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="transactions-{scope}.{export_format}"'}
+    )
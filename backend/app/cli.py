@@ -0,0 +1,138 @@
+"""
+Operational commands for the backend.
+
+Usage:
+    python -m app.cli migrate          # apply Alembic migrations
+    python -m app.cli seed             # migrate, then load demo data
+    python -m app.cli build-password-filter breached.txt breached.bloom
+    python -m app.cli snapshot-balances  # from cron, e.g. hourly
+    python -m app.cli reconcile report.csv --state reconcile.json
+    python -m app.cli backfill-rollups --since 2026-01-01
+"""
+import argparse
+import sys
+from datetime import date
+
+
+def cmd_migrate(args) -> None:
+    from app.init_db import run_migrations
+    run_migrations(args.database_url)
+    print("✓ Database schema is up to date")
+
+
+def cmd_seed(args) -> None:
+    from app.init_db import init_db
+    init_db()
+
+
+def _read_digests(path: str, sha1: bool):
+    from app.utils.password_filter import password_digest
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if sha1:
+                # HIBP style "HEX" or "HEX:count"
+                yield bytes.fromhex(line.split(":", 1)[0])
+            else:
+                yield password_digest(line)
+
+
+def cmd_build_password_filter(args) -> None:
+    from app.utils.password_filter import build_filter
+    with open(args.source, "rb") as f:
+        items = sum(1 for line in f if line.strip())
+    added = build_filter(_read_digests(args.source, args.sha1), items, args.output, args.fp_rate)
+    print(f"✓ Wrote {args.output}: {added} passwords, false-positive rate {args.fp_rate}")
+
+
+def cmd_snapshot_balances(args) -> None:
+    from datetime import datetime, timedelta, timezone
+    from app.config import settings
+    from app.database import engine
+    from app.services.balance_history import compact_snapshots, snapshot_balances
+    days = settings.BALANCE_SNAPSHOT_COMPACT_AFTER_DAYS if args.compact_after_days is None else args.compact_after_days
+    with engine.begin() as conn:
+        written = snapshot_balances(conn)
+        removed = 0
+        if days > 0:
+            removed = compact_snapshots(conn, datetime.now(timezone.utc) - timedelta(days=days))
+    print(f"✓ Snapshotted {written} accounts, compacted {removed} old snapshots")
+
+
+def cmd_reconcile(args) -> int:
+    import os
+    from app.database import replica_engine
+    from app.services.reconciliation import ReconciliationState, reconcile
+    state = ReconciliationState.load(args.state) if args.state and os.path.exists(args.state) else None
+    with replica_engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execution_options(isolation_level="REPEATABLE READ")  # one snapshot for ledger and balances
+        with conn.begin():
+            report, state = reconcile(conn, state, args.chunk_size)
+    report.to_csv(args.report, index=False)
+    if args.state:
+        state.save(args.state)
+    mark = "✓" if report.empty else "✗"
+    print(f"{mark} Checked transactions up to id {state.watermark}: {len(report)} discrepancies written to {args.report}")
+    return 0 if report.empty else 1
+
+
+def cmd_backfill_rollups(args) -> None:
+    from app.database import engine
+    from app.services.rollups import backfill_rollups
+    with engine.begin() as conn:
+        written = backfill_rollups(conn, args.since, args.until)
+    print(f"✓ Rebuilt {written} branch daily rollup rows")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Imtiaz backend commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="Upgrade the schema to the latest migration")
+    migrate.add_argument("--database-url", default=None, help="Override DATABASE_URL")
+    migrate.set_defaults(func=cmd_migrate)
+
+    seed = commands.add_parser("seed", help="Apply migrations and create demo data")
+    seed.set_defaults(func=cmd_seed)
+
+    bloom = commands.add_parser("build-password-filter", help="Build the breached-password Bloom filter")
+    bloom.add_argument("source", help="Text file with one password (or SHA-1 hash) per line")
+    bloom.add_argument("output", help="Filter file to write (set BREACHED_PASSWORDS_FILTER to it)")
+    bloom.add_argument("--sha1", action="store_true", help="Lines are SHA-1 hex digests, optionally HASH:count")
+    bloom.add_argument("--fp-rate", type=float, default=0.001, help="Target false-positive rate")
+    bloom.set_defaults(func=cmd_build_password_filter)
+
+    snapshot = commands.add_parser("snapshot-balances", help="Record balance snapshots for accounts that moved")
+    snapshot.add_argument(
+        "--compact-after-days", type=int, default=None,
+        help="Thin snapshots older than this to one per day (0 disables; default BALANCE_SNAPSHOT_COMPACT_AFTER_DAYS)"
+    )
+    snapshot.set_defaults(func=cmd_snapshot_balances)
+
+    reconciliation = commands.add_parser("reconcile", help="Check ledger invariants and write a discrepancy report")
+    reconciliation.add_argument("report", help="CSV file to write discrepancies to")
+    reconciliation.add_argument(
+        "--state", default=None,
+        help="State file: resume from its watermark if it exists, and save the new one (incremental runs)"
+    )
+    reconciliation.add_argument("--chunk-size", type=int, default=200_000, help="Rows per streamed chunk")
+    reconciliation.set_defaults(func=cmd_reconcile)
+
+    backfill = commands.add_parser("backfill-rollups", help="Rebuild branch daily rollups from transactions")
+    backfill.add_argument("--since", type=date.fromisoformat, default=None, help="First day to rebuild (YYYY-MM-DD)")
+    backfill.add_argument("--until", type=date.fromisoformat, default=None, help="Rebuild days before this one")
+    backfill.set_defaults(func=cmd_backfill_rollups)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,16 @@ from typing import List
 from functools import lru_cache
 
 
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL for the matching asyncio driver."""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+asyncpg://", 1)
+    return url
+
+
 class Settings(BaseSettings):
     # Application
     APP_NAME: str = "Imtiaz Trading Platform"
@@ -17,15 +27,72 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     DB_POOL_SIZE: int = 10
     DB_MAX_OVERFLOW: int = 20
+    DB_ASYNC: bool = False  # Use the asyncio engine (asyncpg/aiosqlite) for request sessions
+    DATABASE_REPLICA_URL: str = ""  # Optional read replica for heavy read-only endpoints
+    DB_QUERY_BUDGET_STRICT: bool = False  # Fail requests that exceed their @query_budget
+    DB_N_PLUS_ONE_THRESHOLD: int = 5  # Warn when one statement repeats this often in a request
+    ACCOUNT_NUMBER_BLOCK_SIZE: int = 100  # Account numbers each worker reserves per DB round trip
+    MIGRATE_ON_STARTUP: bool = False  # Run Alembic from the lifespan hook instead of `python -m app.cli migrate`
+
+    @property
+    def async_database_url(self) -> str:
+        """DATABASE_URL rewritten for the matching asyncio driver."""
+        return to_async_url(self.DATABASE_URL)
+
+    @property
+    def async_replica_url(self) -> str:
+        """DATABASE_REPLICA_URL rewritten for the matching asyncio driver."""
+        return to_async_url(self.DATABASE_REPLICA_URL)
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # Rate limiting
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per worker) | redis (shared via REDIS_URL)
+    LOGIN_LOCKOUT_THRESHOLD: int = 5  # Failed logins per account before it is locked out
+    LOGIN_LOCKOUT_SECONDS: int = 900  # Failure window / lockout duration
+
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    PRINCIPAL_CACHE_TTL: int = 60  # Seconds a cached role/branch/is_active may be served
+    PRINCIPAL_CACHE_SIZE: int = 10000  # Max cached principals per worker (LRU)
+    AUTH_STATELESS: bool = False  # Authorize from signed role/branch_id claims instead of the users table
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 5  # How often each worker reloads the revocation set
+    TOKEN_CACHE_SIZE: int = 10000  # Verified JWT payloads kept per worker (0 disables the cache)
+    TOKEN_CACHE_TTL: int = 300  # Max seconds a verified token is trusted without re-checking the signature
+
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # Existing hashes with another cost are rehashed on login
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread | process | inline (on the event loop)
+    PASSWORD_HASH_WORKERS: int = 4  # Max concurrent bcrypt operations per worker
+    BREACHED_PASSWORDS_FILTER: str = ""  # Bloom filter file built with `python -m app.cli build-password-filter`
+
+    # Transactions
+    BULK_POSTING_MAX_ROWS: int = 1000  # Entries accepted by one bulk deposit/withdrawal
+    EXPORT_BATCH_SIZE: int = 1000  # Rows fetched from the server-side cursor per chunk of an export
+    BRANCH_FLOWS_MAX_DAYS: int = 366  # Longest date range one branch daily-flows request may cover
+    REQUEST_CLAIM_LEASE_SECONDS: int = 300  # How long claimed requests stay reserved for their approver
+    REQUEST_CLAIM_MAX_BATCH: int = 50  # Most requests one claim call may take
+    IDEMPOTENCY_BACKEND: str = "memory"  # memory (per worker) | redis (shared via REDIS_URL)
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # How long a response is replayed for a repeated Idempotency-Key
+    IDEMPOTENCY_CACHE_SIZE: int = 10000  # Max keys kept per worker by the memory backend
+
+    # Balance history
+    BALANCE_SNAPSHOT_COMPACT_AFTER_DAYS: int = 30  # Older snapshots are thinned to one per account per day
+    BALANCE_HISTORY_MAX_POINTS: int = 1000  # Upper bound on points in one balance chart series
+
+    # Audit trail
+    AUDIT_SINK: str = "database"  # database (audit_events table) | file (AUDIT_LOG_FILE) | off (log lines only)
+    AUDIT_QUEUE_SIZE: int = 100000  # Events held in memory for the writer; beyond this new events are dropped
+    AUDIT_BATCH_SIZE: int = 500  # Max events per group commit
+    AUDIT_FLUSH_INTERVAL_MS: int = 200  # Max time an event waits for its batch to fill
+    AUDIT_LOG_FILE: str = "audit.log"  # JSON lines, for AUDIT_SINK=file
+    AUDIT_LOG_MAX_BYTES: int = 50 * 1024 * 1024  # Rotate the audit file at this size
+    AUDIT_LOG_BACKUPS: int = 10  # Rotated audit files kept (audit.log.1 ... audit.log.N)
 
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
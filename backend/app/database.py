@@ -1,26 +1,255 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import CursorResult
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
 from app.config import settings
+from app.utils.monitoring import PoolMetrics, CheckoutTimingMixin, instrument_engine
+
+
+class TimedQueuePool(CheckoutTimingMixin, QueuePool):
+    """QueuePool that reports checkout wait times to its PoolMetrics."""
+
+
+class TimedAsyncQueuePool(CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that reports checkout wait times to its PoolMetrics."""
+
+
+def _engine_kwargs(url: str) -> dict:
+    """Build engine options appropriate for the given database URL."""
+    kwargs = {
+        "pool_pre_ping": True,
+        "echo": settings.DEBUG,
+    }
+    if url.startswith("sqlite"):
+        # Sessions may hop between threadpool workers (sync mode) or the
+        # aiosqlite worker thread (async mode).
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not url.startswith("sqlite+aiosqlite"):
+        # aiosqlite always runs on a NullPool and rejects pool sizing options
+        kwargs["pool_size"] = settings.DB_POOL_SIZE
+        kwargs["max_overflow"] = settings.DB_MAX_OVERFLOW
+        kwargs["poolclass"] = TimedAsyncQueuePool if "+asyncpg" in url else TimedQueuePool
+    return kwargs
+
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_pre_ping=True,
-    echo=settings.DEBUG
-)
-
-# Create session factory
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs(settings.DATABASE_URL))
+
+# Read replica engine (falls back to the primary when no replica is configured)
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_engine(settings.DATABASE_REPLICA_URL, **_engine_kwargs(settings.DATABASE_REPLICA_URL))
+else:
+    replica_engine = engine
+
+
+class ReadOnlySession(Session):
+    """Session bound to the read replica. Refuses to flush pending writes."""
+
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    raise RuntimeError("Read replica sessions are read-only; use get_db for writes")
+
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine, class_=ReadOnlySession)
+
+# Async engines and session factories (only built when DB_ASYNC is enabled so
+# the asyncpg/aiosqlite drivers stay optional for sync deployments)
+async_engine = None
+async_replica_engine = None
+AsyncSessionLocal = None
+AsyncReplicaSessionLocal = None
+
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        **_engine_kwargs(settings.async_database_url)
+    )
+    if settings.DATABASE_REPLICA_URL:
+        async_replica_engine = create_async_engine(
+            settings.async_replica_url,
+            **_engine_kwargs(settings.async_replica_url)
+        )
+    else:
+        async_replica_engine = async_engine
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+    AsyncReplicaSessionLocal = async_sessionmaker(
+        bind=async_replica_engine,
+        autoflush=False,
+        expire_on_commit=False,
+        sync_session_class=ReadOnlySession
+    )
+
+# Pool telemetry for the engines serving requests
+pool_metrics = {"primary": PoolMetrics(), "replica": PoolMetrics()}
+_request_engines = {
+    "primary": async_engine if settings.DB_ASYNC else engine,
+    "replica": async_replica_engine if settings.DB_ASYNC else replica_engine,
+}
+instrument_engine(_request_engines["primary"], pool_metrics["primary"])
+if _request_engines["replica"] is not _request_engines["primary"]:
+    instrument_engine(_request_engines["replica"], pool_metrics["replica"])
+else:
+    del _request_engines["replica"]
+
+
+def get_pool_stats() -> dict:
+    """Pool counters, gauges and checkout wait histogram per request engine."""
+    return {
+        name: pool_metrics[name].snapshot(getattr(eng, "sync_engine", eng).pool)
+        for name, eng in _request_engines.items()
+    }
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections on every engine (called on app shutdown)."""
+    engine.dispose()
+    if replica_engine is not engine:
+        replica_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_replica_engine is not None and async_replica_engine is not async_engine:
+        await async_replica_engine.dispose()
+
 
 # Create base class for models
 Base = declarative_base()
 
 
+class ThreadedStreamResult:
+    """AsyncResult-style view of a streaming sync result; each fetch runs in the threadpool."""
+
+    def __init__(self, result):
+        self._result = result
+
+    async def partitions(self, size: int):
+        while True:
+            rows = await run_in_threadpool(self._result.fetchmany, size)
+            if not rows:
+                break
+            yield rows
+
+    async def close(self):
+        await run_in_threadpool(self._result.close)
+
+
+class ThreadedSession:
+    """
+    AsyncSession-compatible facade over a sync Session.
+
+    Every call that may hit the database runs in the threadpool, so routers can
+    be written once against the AsyncSession API and still work (without
+    blocking the event loop) when DB_ASYNC is disabled.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    @staticmethod
+    def _buffer(result):
+        # Materialise rows on the worker thread so the event loop never reads
+        # from a live DBAPI cursor.
+        if isinstance(result, CursorResult) and not result.returns_rows:
+            return result
+        return result.freeze()()
+
+    async def execute(self, statement, params=None, **kwargs):
+        result = await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+        return self._buffer(result)
+
+    async def stream(self, statement, params=None, **kwargs):
+        """Execute without buffering; rows are fetched from a server-side cursor as they are read."""
+        statement = statement.execution_options(stream_results=True)
+        result = await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+        return ThreadedStreamResult(result)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        result = await self.execute(statement, params, **kwargs)
+        return result.scalars()
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self, objects=None):
+        await run_in_threadpool(self.sync_session.flush, objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+async def _session_scope(sync_factory, async_factory):
+    if settings.DB_ASYNC:
+        async with async_factory() as session:
+            yield session
+    else:
+        session = ThreadedSession(sync_factory(expire_on_commit=False))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 # Dependency to get database session
-def get_db():
+async def get_db():
+    """
+    Yield a primary session exposing the AsyncSession API.
+
+    With DB_ASYNC enabled this is a real AsyncSession on the asyncpg/aiosqlite
+    engine; otherwise the sync engine is driven from the threadpool.
+    """
+    async for session in _session_scope(SessionLocal, AsyncSessionLocal):
+        yield session
+
+
+# Dependency to get a read-only session on the replica
+async def get_read_db():
+    """
+    Yield a read-only session bound to DATABASE_REPLICA_URL.
+
+    Only for endpoints that never write: writes, and reads that must observe
+    them, stay on get_db.
+    """
+    async for session in _session_scope(ReplicaSessionLocal, AsyncReplicaSessionLocal):
+        yield session
+
+
+# Sync session for scripts and background jobs
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
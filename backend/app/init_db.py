@@ -2,16 +2,58 @@
 Initialize database with default data
 Run this script after creating the database to populate it with initial data
 """
+from pathlib import Path
+from typing import Optional
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine, Base
+from app.config import settings
+from app.database import SessionLocal, Base
 from app.models import User, Branch, Account, UserRole, AccountType, ProductSpread
-from app.utils.security import get_password_hash, generate_account_number
+from app.utils.security import get_password_hash
+from app.services.account_numbers import account_numbers
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Revision matching the schema that Base.metadata.create_all used to build
+BASELINE_REVISION = "0001"
+
+
+def get_alembic_config(database_url: Optional[str] = None) -> Config:
+    """Alembic config for the backend, optionally pointed at another database."""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("sqlalchemy.url", database_url or settings.DATABASE_URL)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def run_migrations(database_url: Optional[str] = None) -> None:
+    """Upgrade the schema to the latest Alembic revision."""
+    config = get_alembic_config(database_url)
+
+    # Databases created with create_all (no alembic_version table) are adopted
+    # instead of failing on existing tables: at head if they already match the
+    # models, otherwise at the baseline revision.
+    engine = create_engine(config.get_main_option("sqlalchemy.url"))
+    try:
+        with engine.connect() as conn:
+            tables = set(inspect(conn).get_table_names())
+            if "users" in tables and "alembic_version" not in tables:
+                up_to_date = not compare_metadata(MigrationContext.configure(conn), Base.metadata)
+                command.stamp(config, "head" if up_to_date else BASELINE_REVISION)
+    finally:
+        engine.dispose()
+
+    command.upgrade(config, "head")
 
 
 def init_db():
     """Initialize database with default data."""
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    print("Applying database migrations...")
+    run_migrations()
 
     db = SessionLocal()
 
@@ -157,7 +199,7 @@ def init_db():
         db.add(admin)
 
         # Create Standard Client
-        standard_client_account_number = generate_account_number()
+        standard_client_account_number = account_numbers.allocate()
         standard_client = User(
             email="client@example.com",
             hashed_password=get_password_hash("client123"),
@@ -174,7 +216,7 @@ def init_db():
         db.add(standard_client)
 
         # Create Business Client
-        business_client_account_number = generate_account_number()
+        business_client_account_number = account_numbers.allocate()
         business_client = User(
             email="business@example.com",
             hashed_password=get_password_hash("business123"),
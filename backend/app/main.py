@@ -1,48 +1,42 @@
+"""
+FastAPI application factory.
+
+Importing this module is cheap and has no side effects: the app is built on
+first access to `app.main.app` (or by `uvicorn --factory app.main:create_app`),
+and schema migrations are an explicit step (`python -m app.cli migrate`) unless
+MIGRATE_ON_STARTUP is enabled.
+"""
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 from app.config import settings
-from app.database import Base, engine
-from app.api import auth, manager, health, transactions, accounts, admin
 from app.utils.logging import setup_logging, get_logger
-# Import other routers as we create them
-# from app.api import trades
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
-# Setup logging
-setup_logging(log_level="INFO" if not settings.DEBUG else "DEBUG")
 logger = get_logger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-# Create rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
-# Create FastAPI app
-app = FastAPI(
-    title=settings.APP_NAME,
-    version=settings.APP_VERSION,
-    description="Backend API for Imtiaz Trading Platform with MetaTrader Integration",
-    debug=settings.DEBUG
-)
-
-# Add rate limiter to app state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins_list,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Add security headers middleware
-@app.middleware("http")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run optional startup migrations; flush the audit trail and release pooled connections on shutdown."""
+    from starlette.concurrency import run_in_threadpool
+    if settings.MIGRATE_ON_STARTUP:
+        # Alembic is only imported when the app owns its schema
+        from app.init_db import run_migrations
+        await run_in_threadpool(run_migrations)
+
+    logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
+    yield
+
+    from app.database import dispose_engines
+    from app.utils.audit import close_audit_sink
+    from app.utils.security import shutdown_hash_executor
+    shutdown_hash_executor()
+    await run_in_threadpool(close_audit_sink)  # flush queued audit events before the engines go away
+    await dispose_engines()
+
+
 async def add_security_headers(request: Request, call_next):
     """Add security headers to all responses."""
     response = await call_next(request)
@@ -55,38 +49,83 @@ async def add_security_headers(request: Request, call_next):
     response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
     return response
 
-logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
 
-# Include routers
-app.include_router(auth.router, prefix="/api")
-app.include_router(manager.router, prefix="/api")
-app.include_router(admin.router, prefix="/api")
-app.include_router(health.router, prefix="/api")
-app.include_router(transactions.router, prefix="/api")
-app.include_router(accounts.router, prefix="/api")
-# app.include_router(trades.router, prefix="/api")
+def create_app() -> FastAPI:
+    """Build the FastAPI application."""
+    from app.api import auth, manager, health, transactions, accounts, admin
+    from app.middleware.query_stats import query_stats_middleware
+
+    # Setup logging
+    setup_logging(log_level="INFO" if not settings.DEBUG else "DEBUG")
+
+    app = FastAPI(
+        title=settings.APP_NAME,
+        version=settings.APP_VERSION,
+        description="Backend API for Imtiaz Trading Platform with MetaTrader Integration",
+        debug=settings.DEBUG,
+        lifespan=lifespan
+    )
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins_list,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
+    )
+
+    # Count SQL statements per request (X-DB-Queries/X-DB-Time headers, query budgets)
+    if settings.DEBUG or settings.DB_QUERY_BUDGET_STRICT:
+        app.middleware("http")(query_stats_middleware)
+
+    # Add security headers middleware
+    app.middleware("http")(add_security_headers)
+
+    # Include routers
+    app.include_router(auth.router, prefix="/api")
+    app.include_router(manager.router, prefix="/api")
+    app.include_router(admin.router, prefix="/api")
+    app.include_router(health.router, prefix="/api")
+    app.include_router(transactions.router, prefix="/api")
+    app.include_router(accounts.router, prefix="/api")
+
+    @app.get("/")
+    async def root():
+        """Root endpoint."""
+        return {
+            "message": "Imtiaz Trading Platform API",
+            "version": settings.APP_VERSION,
+            "status": "running"
+        }
+
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint."""
+        return {"status": "healthy"}
+
+    return app
 
 
-@app.get("/")
-async def root():
-    """Root endpoint."""
-    return {
-        "message": "Imtiaz Trading Platform API",
-        "version": settings.APP_VERSION,
-        "status": "running"
-    }
+_app = None
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
+def __getattr__(name: str):
+    # `app.main.app` is built lazily so that importing this module stays cheap
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        "app.main:app",
+        "app.main:create_app",
+        factory=True,
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG
@@ -1,45 +1,256 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
-from app.utils.security import decode_token
-from app.models.user import User
-from typing import Optional
+from app.utils.cache import TTLCache
+from app.utils.logging import log_security_event
+from app.utils.security import decode_token, forget_token, forget_user_tokens
+from app.models.user import User, UserRole
+from app.models.token_revocation import TokenRevocation
+from typing import Dict, Optional
 
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+@dataclass(frozen=True)
+class Principal:
+    """The authorization facts about a user that endpoints check on every request."""
+    id: int
+    email: str
+    role: UserRole
+    branch_id: Optional[int]
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(user.id, user.email, user.role, user.branch_id, user.is_active)
+
+
+# user_id -> Principal. Bounded LRU; the TTL caps staleness across worker processes.
+principal_cache = TTLCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+# Attributes whose change must drop a cached principal
+_PRINCIPAL_ATTRIBUTES = ("email", "role", "branch_id", "is_active")
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop a cached principal, e.g. after a bulk UPDATE that bypassed the ORM."""
+    principal_cache.pop(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context):
+    changed = session.info.setdefault("principal_changes", set())
+    for user in session.dirty | session.deleted:
+        if not isinstance(user, User):
+            continue
+        state = inspect(user)
+        if user in session.deleted or any(
+            state.attrs[attr].history.has_changes() for attr in _PRINCIPAL_ATTRIBUTES
+        ):
+            changed.add(user.id)
+            # Drop now and again after commit, so a concurrent miss cannot re-cache the old row
+            invalidate_principal(user.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session):
+    for user_id in session.info.pop("principal_changes", ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_changes(session):
+    session.info.pop("principal_changes", None)
+
+
+def _epoch(moment: datetime) -> float:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class RevocationList:
+    """
+    Compact user_id -> revoked-at map for stateless authorization.
+
+    Tokens issued at or before a user's revocation time (to the microsecond,
+    via the iat_precise claim) are rejected. Only revocations younger than the
+    access token lifetime are kept, and each worker reloads the set from token_revocations at most every
+    TOKEN_REVOCATION_REFRESH_SECONDS, so the per-request check is a dict lookup.
+    """
+
+    def __init__(self, refresh_interval: float, clock=time.monotonic):
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._revoked: Dict[int, float] = {}
+        self._next_refresh = 0.0
+
+    def revoke(self, user_id: int, revoked_at: float) -> None:
+        self._revoked[user_id] = max(revoked_at, self._revoked.get(user_id, 0.0))
+        forget_user_tokens(user_id)
+
+    def is_revoked(self, user_id: int, issued_at: float) -> bool:
+        revoked_at = self._revoked.get(user_id)
+        # Tokens without iat_precise only carry whole-second iat, so for them a tie counts as revoked
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def needs_refresh(self) -> bool:
+        return self._clock() >= self._next_refresh
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Reload revocations that may still cover unexpired access tokens."""
+        self._next_refresh = self._clock() + self.refresh_interval
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        rows = (await db.execute(
+            select(TokenRevocation.user_id, TokenRevocation.revoked_at).where(TokenRevocation.revoked_at > cutoff)
+        )).all()
+
+        # Keep local revocations the query may have raced with; drop expired ones
+        oldest = cutoff.timestamp()
+        revoked = {user_id: at for user_id, at in self._revoked.items() if at > oldest}
+        for user_id, revoked_at in rows:
+            revoked[user_id] = max(_epoch(revoked_at), revoked.get(user_id, 0.0))
+        self._revoked = revoked
+
+    def clear(self) -> None:
+        self._revoked.clear()
+        self._next_refresh = 0.0
+
+
+revocation_list = RevocationList(settings.TOKEN_REVOCATION_REFRESH_SECONDS)
 
-    token = credentials.credentials
-    payload = decode_token(token)
+# Attributes whose change revokes the user's outstanding access tokens
+_CLAIM_ATTRIBUTES = ("role", "branch_id", "is_active")
 
+
+@event.listens_for(Session, "before_flush")
+def _revoke_changed_claims(session, flush_context, instances):
+    now = datetime.now(timezone.utc)
+    for user in session.dirty | session.deleted:
+        if not isinstance(user, User) or user.id is None:
+            continue
+        state = inspect(user)
+        if user in session.deleted:
+            reason = "deleted"
+        else:
+            changed = [attr for attr in _CLAIM_ATTRIBUTES if state.attrs[attr].history.has_changes()]
+            if not changed:
+                continue
+            reason = ",".join(changed)
+
+        revocation = session.get(TokenRevocation, user.id)
+        if revocation is None:
+            session.add(TokenRevocation(user_id=user.id, revoked_at=now, reason=reason))
+        else:
+            revocation.revoked_at = now
+            revocation.reason = reason
+        session.info.setdefault("token_revocations", {})[user.id] = now.timestamp()
+        log_security_event("token_revocation", user_email=user.email, user_id=user.id, details=reason, session=session)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_token_revocations(session):
+    for user_id, revoked_at in session.info.pop("token_revocations", {}).items():
+        revocation_list.revoke(user_id, revoked_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_token_revocations(session):
+    session.info.pop("token_revocations", None)
+
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+def _token_payload(credentials: HTTPAuthorizationCredentials) -> dict:
+    payload = decode_token(credentials.credentials)
     if payload is None:
+        log_security_event("authentication", success=False, details="Invalid or expired token")
         raise credentials_exception
 
-    user_id: int = payload.get("user_id")
-    if user_id is None:
+    if payload.get("user_id") is None:
+        log_security_event("authentication", success=False, details="Token without user_id")
         raise credentials_exception
+    return payload
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
 
-    if not user.is_active:
+def _ensure_active(principal) -> None:
+    if not principal.is_active:
+        log_security_event(
+            "authentication", user_email=principal.email, user_id=principal.id, success=False, details="Account inactive"
+        )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
 
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """
+    Resolve the caller's id, role and branch from the JWT and the principal cache.
+
+    Only cache misses query the database; use get_current_user when the
+    endpoint needs the full User row. With AUTH_STATELESS enabled, tokens
+    carrying role/branch_id claims are trusted as-is unless revoked.
+    """
+    payload = _token_payload(credentials)
+    user_id: int = payload["user_id"]
+
+    if settings.AUTH_STATELESS and "role" in payload and "branch_id" in payload:
+        if revocation_list.needs_refresh():
+            await revocation_list.refresh(db)
+        if revocation_list.is_revoked(user_id, payload.get("iat_precise", payload.get("iat", 0))):
+            forget_token(credentials.credentials)
+            log_security_event("authentication", user_id=user_id, success=False, details="Revoked token")
+            raise credentials_exception
+        # Deactivation revokes the user's tokens, so an unrevoked token is active
+        return Principal(user_id, payload.get("email"), UserRole(payload["role"]), payload["branch_id"], True)
+
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        row = (await db.execute(
+            select(User.id, User.email, User.role, User.branch_id, User.is_active).where(User.id == user_id)
+        )).first()
+        if row is None:
+            log_security_event("authentication", user_id=user_id, success=False, details="Unknown user")
+            raise credentials_exception
+        principal = Principal(*row)
+        principal_cache.set(user_id, principal)
+
+    _ensure_active(principal)
+    return principal
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get the current authenticated user from JWT token."""
+    user_id = _token_payload(credentials)["user_id"]
+
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if user is None:
+        log_security_event("authentication", user_id=user_id, success=False, details="Unknown user")
+        raise credentials_exception
+
+    principal_cache.set(user_id, Principal.from_user(user))
+    _ensure_active(user)
+
     return user
 
 
@@ -57,7 +268,7 @@ async def get_current_active_user(
 
 def require_role(required_role: str):
     """Dependency to check if user has required role."""
-    async def role_checker(current_user: User = Depends(get_current_user)):
+    async def role_checker(current_user: Principal = Depends(get_current_principal)):
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -69,7 +280,7 @@ def require_role(required_role: str):
 
 def require_roles(*allowed_roles: str):
     """Dependency to check if user has one of the allowed roles."""
-    async def role_checker(current_user: User = Depends(get_current_user)):
+    async def role_checker(current_user: Principal = Depends(get_current_principal)):
         if current_user.role not in allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
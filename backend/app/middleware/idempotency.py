@@ -0,0 +1,234 @@
+"""
+Idempotency-Key support for endpoints that move money.
+
+A request carrying an `Idempotency-Key` header is recorded in a keyed store
+(in-process, or Redis with IDEMPOTENCY_BACKEND=redis) under the caller, the
+path and the key. A retry with the same key gets the stored response back
+without touching the database beyond authentication; a retry that arrives
+while the first attempt is still running gets a 409, and reusing a key for
+a different payload a 422. Entries expire after IDEMPOTENCY_TTL_SECONDS.
+
+The store is a fast path, not the guarantee: ledger postings made under a
+key carry `Transaction.reference` values derived from it (see
+`idempotency_reference`), so a retry the store has forgotten is still
+refused by the unique constraint instead of posting twice.
+"""
+import functools
+import hashlib
+import inspect
+import json
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.datastructures import UploadFile
+
+from app.config import settings
+from app.utils.cache import TTLCache
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+_IN_FLIGHT = "in-flight"
+
+_current_reference: ContextVar[Optional[str]] = ContextVar("idempotency_reference", default=None)
+
+
+class IdempotencyStore(ABC):
+    """Storage interface: one JSON-serialisable record per scoped key."""
+
+    @abstractmethod
+    async def reserve(self, key: str, record: dict) -> bool:
+        """Store `record` unless the key is already present; returns whether it was stored."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def save(self, key: str, record: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """Per-worker store; retries routed to another worker fall through to the DB backstop."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def reserve(self, key: str, record: dict) -> bool:
+        return self._cache.add(key, record)
+
+    async def get(self, key: str) -> Optional[dict]:
+        return self._cache.get(key)
+
+    async def save(self, key: str, record: dict) -> None:
+        self._cache.set(key, record)
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """Redis store shared by all workers."""
+
+    def __init__(self, url: str, ttl: float, prefix: str = "idempotency:"):
+        import redis.asyncio as redis  # optional dependency, only needed for this backend
+
+        self._redis = redis.from_url(url)
+        self._ttl_ms = int(ttl * 1000)
+        self._prefix = prefix
+
+    async def reserve(self, key: str, record: dict) -> bool:
+        return bool(await self._redis.set(self._prefix + key, json.dumps(record), nx=True, px=self._ttl_ms))
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = await self._redis.get(self._prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def save(self, key: str, record: dict) -> None:
+        await self._redis.set(self._prefix + key, json.dumps(record), px=self._ttl_ms)
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self._prefix + key)
+
+
+_store: Optional[IdempotencyStore] = None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """The configured store, created on first use."""
+    global _store
+    if _store is None:
+        if settings.IDEMPOTENCY_BACKEND == "redis":
+            _store = RedisIdempotencyStore(settings.REDIS_URL, settings.IDEMPOTENCY_TTL_SECONDS)
+        else:
+            _store = MemoryIdempotencyStore(settings.IDEMPOTENCY_CACHE_SIZE, settings.IDEMPOTENCY_TTL_SECONDS)
+    return _store
+
+
+def set_idempotency_store(store: Optional[IdempotencyStore]) -> None:
+    """Replace the store (tests, or custom deployments)."""
+    global _store
+    _store = store
+
+
+def idempotency_reference(suffix: Optional[object] = None) -> Optional[str]:
+    """
+    `Transaction.reference` for a posting made under the current request's
+    key (None without one). Batches pass a per-row `suffix`.
+    """
+    reference = _current_reference.get()
+    if reference is None or suffix is None:
+        return reference
+    return f"{reference}:{suffix}"
+
+
+async def _fingerprint(arguments: dict) -> str:
+    payload = {}
+    for name, value in arguments.items():
+        if isinstance(value, UploadFile):
+            value = {"filename": value.filename, "sha256": await _upload_digest(value)}
+        payload[name] = value
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+async def _upload_digest(upload: UploadFile) -> str:
+    """Hash an uploaded file's contents, leaving it rewound for the endpoint."""
+    digest = hashlib.sha256()
+    await upload.seek(0)
+    while chunk := await upload.read(1024 * 1024):
+        digest.update(chunk)
+    await upload.seek(0)
+    return digest.hexdigest()
+
+
+def _route_status_code(request: Request) -> int:
+    endpoint = request.scope.get("endpoint")
+    for route in request.app.routes:
+        if getattr(route, "endpoint", None) is endpoint:
+            return getattr(route, "status_code", None) or status.HTTP_200_OK
+    return status.HTTP_200_OK
+
+
+def _replay(record: dict) -> JSONResponse:
+    return JSONResponse(record["body"], status_code=record["status"], headers={"Idempotent-Replayed": "true"})
+
+
+def idempotent(func: Callable) -> Callable:
+    """
+    Honour an Idempotency-Key header on this endpoint. Apply below the router
+    decorator; the endpoint must take the caller as `current_user` and return
+    a JSON-serialisable body.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, _idempotency_request: Request, _idempotency_key: Optional[str] = None, **kwargs):
+        if not _idempotency_key:
+            return await func(*args, **kwargs)
+
+        payload = {name: value for name, value in kwargs.items() if name not in ("db", "current_user")}
+        digest = hashlib.sha256(f"{_idempotency_request.url.path}:{_idempotency_key}".encode()).hexdigest()[:32]
+        key = f"{kwargs['current_user'].id}:{digest}"
+        fingerprint = await _fingerprint(payload)
+        store = get_idempotency_store()
+
+        if not await store.reserve(key, {"state": _IN_FLIGHT, "fingerprint": fingerprint}):
+            record = await store.get(key)
+            if record is not None:
+                if record["fingerprint"] != fingerprint:
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+                    )
+                if record["state"] != _IN_FLIGHT:
+                    return _replay(record)
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"A request with this {IDEMPOTENCY_HEADER} is still being processed"
+                )
+            await store.reserve(key, {"state": _IN_FLIGHT, "fingerprint": fingerprint})  # expired meanwhile
+
+        token = _current_reference.set(f"idem:{key}")
+        try:
+            body = await func(*args, **kwargs)
+        except HTTPException as e:
+            if e.status_code in (status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS) or e.status_code >= 500:
+                await store.delete(key)  # transient: let the client retry with the same key
+            else:
+                await store.save(key, {
+                    "state": "done", "fingerprint": fingerprint, "status": e.status_code,
+                    "body": {"detail": jsonable_encoder(e.detail)}
+                })
+            raise
+        except BaseException:
+            await store.delete(key)
+            raise
+        finally:
+            _current_reference.reset(token)
+
+        await store.save(key, {
+            "state": "done", "fingerprint": fingerprint,
+            "status": _route_status_code(_idempotency_request), "body": jsonable_encoder(body)
+        })
+        return body
+
+    # Expose the header (and the request) to FastAPI alongside the endpoint's own parameters
+    signature = inspect.signature(func)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("_idempotency_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        inspect.Parameter(
+            "_idempotency_key", inspect.Parameter.KEYWORD_ONLY, annotation=Optional[str],
+            default=Header(None, alias=IDEMPOTENCY_HEADER)
+        ),
+    ])
+    return wrapper
@@ -0,0 +1,105 @@
+"""
+Per-request SQL statement counting and timing.
+
+Engine-level cursor events feed a request-scoped QueryStats object held in a
+context variable. The HTTP middleware reports the totals as X-DB-Queries /
+X-DB-Time headers, warns about statements repeated once per row (N+1), and in
+strict mode fails the request when an endpoint exceeds its declared budget.
+"""
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when an endpoint issues more queries than its budget."""
+
+
+class QueryStats:
+    """SQL statement count, time and repetition for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times (likely N+1 loops)."""
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    """Begin collecting statements for the current context."""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None and conn.info.get("query_start_time"):
+        stats.record(statement, time.perf_counter() - conn.info["query_start_time"].pop())
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare the maximum number of SQL statements an endpoint may issue,
+    including the principal lookup. Apply below the router decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        func.__query_budget__ = max_queries
+        return func
+    return decorator
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """Count statements per request, report them and enforce query budgets."""
+    stats = start_query_stats()
+    response = await call_next(request)
+
+    endpoint = request.scope.get("endpoint")
+    path = request.url.path
+    repeated = stats.repeated(settings.DB_N_PLUS_ONE_THRESHOLD)
+    for statement, times in repeated:
+        logger.warning(f"Possible N+1 on {path}: statement executed {times} times: {statement[:200]}")
+
+    budget = getattr(endpoint, "__query_budget__", None)
+    if budget is not None and stats.count > budget:
+        message = f"{request.method} {path} issued {stats.count} queries (budget {budget})"
+        if settings.DB_QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    if settings.DEBUG:
+        response.headers["X-DB-Queries"] = str(stats.count)
+        response.headers["X-DB-Time"] = f"{stats.duration * 1000:.2f}ms"
+    return response
@@ -5,6 +5,11 @@ from app.models.transaction import Transaction, TransactionType, TransactionStat
 from app.models.trade import Trade, TradeType, OrderType, TradeStatus
 from app.models.product_spread import ProductSpread
 from app.models.transaction_request import TransactionRequest, RequestType, RequestStatus
+from app.models.token_revocation import TokenRevocation
+from app.models.number_sequence import NumberSequence
+from app.models.balance_snapshot import BalanceSnapshot
+from app.models.branch_rollup import BranchDailyRollup
+from app.models.audit_event import AuditEvent
 
 __all__ = [
     "User",
@@ -24,4 +29,9 @@ __all__ = [
     "TransactionRequest",
     "RequestType",
     "RequestStatus",
+    "TokenRevocation",
+    "NumberSequence",
+    "BalanceSnapshot",
+    "BranchDailyRollup",
+    "AuditEvent",
 ]
@@ -16,7 +16,7 @@ class Account(Base):
     __tablename__ = "accounts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     account_number = Column(String, unique=True, index=True, nullable=False)
 
     # Balance information - Using Numeric for financial precision
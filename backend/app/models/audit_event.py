@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Numeric, Text, Index
+from app.database import Base
+
+
+class AuditEvent(Base):
+    """
+    One security or ledger event, appended in batches by the audit sink
+    (app.utils.audit). Rows are never updated or deleted; on migrated
+    databases a trigger rejects both. No foreign keys, so the trail outlives
+    the users and transactions it mentions.
+    """
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        # A user's trail, in order
+        Index("ix_audit_events_user_id_occurred_at", "user_id", "occurred_at"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)  # when the event happened, not when it was written
+
+    category = Column(String(20), nullable=False)  # security | transaction
+    event_type = Column(String(50), nullable=False)  # login, registration, deposit, ...
+    success = Column(Boolean, nullable=False)
+
+    user_id = Column(Integer, nullable=True)
+    user_email = Column(String, nullable=True)
+    actor_id = Column(Integer, nullable=True)  # who performed it, when not the user themselves
+    transaction_id = Column(Integer, nullable=True)
+    amount = Column(Numeric(precision=15, scale=2), nullable=True)
+    details = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<AuditEvent {self.category}:{self.event_type} user={self.user_id} at {self.occurred_at}>"
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, DateTime, Numeric, ForeignKey, Index
+from app.database import Base
+
+
+class BalanceSnapshot(Base):
+    """
+    An account's balances at `recorded_at`, covering every transaction on the
+    account up to `last_transaction_id` (None: no transactions yet).
+
+    Written periodically by `python -m app.cli snapshot-balances`, only for
+    accounts that moved since their previous snapshot; older snapshots are
+    thinned to one per day. Point-in-time balances replay the transaction
+    deltas between the nearest snapshot and the requested time.
+    """
+    __tablename__ = "balance_history"
+    __table_args__ = (
+        # Nearest snapshot to a point in time, and chart ranges
+        Index("ix_balance_history_account_id_recorded_at", "account_id", "recorded_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+
+    balance = Column(Numeric(precision=15, scale=2), nullable=False)
+    wallet_balance = Column(Numeric(precision=15, scale=2), nullable=False)
+    trading_balance = Column(Numeric(precision=15, scale=2), nullable=False)
+    last_transaction_id = Column(Integer, nullable=True)
+
+    recorded_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<BalanceSnapshot account={self.account_id} at {self.recorded_at}>"
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, Date, Numeric, Boolean, ForeignKey, Enum as SQLEnum, Index
+from app.database import Base
+from app.models.transaction import TransactionType
+
+
+class BranchDailyRollup(Base):
+    """
+    Completed postings of one transaction type in a branch on one day: how
+    many, and their total amount. Postings to admins' admin_balance (branch
+    funding by a manager) are kept apart from client account postings.
+
+    Updated by every ledger posting in the same database transaction, so the
+    rollup commits or rolls back with the postings it counts; history from
+    before the rollup existed is filled in by `python -m app.cli backfill-rollups`.
+    """
+    __tablename__ = "branch_daily_rollups"
+    __table_args__ = (
+        # Upsert target; day first so dashboards read a date range across branches
+        Index(
+            "uq_branch_daily_rollups_day_branch_type", "day", "branch_id", "transaction_type", "admin_balance",
+            unique=True
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    transaction_type = Column(SQLEnum(TransactionType), nullable=False)
+    admin_balance = Column(Boolean, nullable=False, default=False)
+
+    transaction_count = Column(Integer, nullable=False, default=0)
+    amount = Column(Numeric(precision=15, scale=2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<BranchDailyRollup branch={self.branch_id} {self.day} {self.transaction_type}: {self.amount}>"
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, BigInteger
+from app.database import Base
+
+
+class NumberSequence(Base):
+    """Portable named counter; allocators reserve blocks of values from it."""
+    __tablename__ = "number_sequences"
+
+    name = Column(String, primary_key=True)
+    next_value = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<NumberSequence {self.name} next={self.next_value}>"
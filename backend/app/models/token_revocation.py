@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+
+
+class TokenRevocation(Base):
+    """
+    Access tokens issued to a user at or before `revoked_at` are no longer valid.
+
+    Written whenever a user's role, branch or activation changes (or the user is
+    deleted) and read by stateless authorization. Rows older than the access
+    token lifetime are irrelevant and may be pruned. No foreign key, so the
+    revocation outlives a deleted user.
+    """
+    __tablename__ = "token_revocations"
+
+    user_id = Column(Integer, primary_key=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    reason = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<TokenRevocation user={self.user_id} at {self.revoked_at}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -25,18 +25,28 @@ class TransactionStatus(str, enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Per-user history pages, newest first, optionally by type (keyset on created_at, id)
+        Index("ix_transactions_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_transactions_user_id_type_created_at_id", "user_id", "transaction_type", "created_at", "id"),
+        # Per-account replay between balance snapshots
+        Index("ix_transactions_account_id_id", "account_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     # References
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=True)  # None for admin_balance postings
 
     # Transaction details - Using Numeric for financial precision
     transaction_type = Column(SQLEnum(TransactionType), nullable=False)
     amount = Column(Numeric(precision=15, scale=2), nullable=False)
     balance_before = Column(Numeric(precision=15, scale=2), nullable=False)
     balance_after = Column(Numeric(precision=15, scale=2), nullable=False)
+    # Signed change to each account column (None on admin_balance postings and rows before revision 0007)
+    wallet_delta = Column(Numeric(precision=15, scale=2), nullable=True)
+    trading_delta = Column(Numeric(precision=15, scale=2), nullable=True)
 
     # Additional info
     description = Column(Text, nullable=True)
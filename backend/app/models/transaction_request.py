@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Enum as SQLEnum, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -19,6 +19,13 @@ class RequestStatus(str, enum.Enum):
 
 class TransactionRequest(Base):
     __tablename__ = "transaction_requests"
+    __table_args__ = (
+        # Request pages, newest first (keyset on created_at, id): approval queue by
+        # status, a client's own requests, and the unfiltered manager/branch view
+        Index("ix_transaction_requests_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_transaction_requests_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_transaction_requests_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -39,6 +46,10 @@ class TransactionRequest(Base):
     approved_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     approved_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Work-queue lease: the approver holding this pending request, until claim_expires_at
+    claimed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    claim_expires_at = Column(DateTime(timezone=True), nullable=True)
+    
     # Related transaction (after approval)
     transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)
     
@@ -49,6 +60,7 @@ class TransactionRequest(Base):
     # Relationships
     user = relationship("User", foreign_keys=[user_id], backref="transaction_requests")
     approved_by = relationship("User", foreign_keys=[approved_by_id])
+    claimed_by = relationship("User", foreign_keys=[claimed_by_id])
     transaction = relationship("Transaction", foreign_keys=[transaction_id])
 
     def __repr__(self):
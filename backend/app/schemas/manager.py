@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
 
 
 # Product Spread Schemas
@@ -53,3 +53,15 @@ class BranchResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Branch Dashboard Schemas
+class BranchDailyFlow(BaseModel):
+    day: date
+    branch_id: int
+    deposits: float
+    withdrawals: float
+    transfers: float
+    net_flow: float
+    transactions: int
+    admin_funding: float
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -31,6 +31,16 @@ class TransactionRequestApprove(BaseModel):
         return v
 
 
+class TransactionRequestBatchApprove(BaseModel):
+    """Schema for approving/rejecting many requests at once (admin/manager)"""
+    items: List[TransactionRequestApprove] = Field(..., min_length=1)
+
+
+class TransactionRequestRelease(BaseModel):
+    """Schema for giving back claimed requests (admin/manager)"""
+    request_ids: List[int] = Field(..., min_length=1)
+
+
 class TransactionRequestResponse(BaseModel):
     """Schema for transaction request response"""
     id: int
@@ -46,6 +56,8 @@ class TransactionRequestResponse(BaseModel):
     approved_by_id: Optional[int]
     approved_by_name: Optional[str]
     approved_at: Optional[datetime]
+    claimed_by_id: Optional[int] = None
+    claim_expires_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime]
 
@@ -60,6 +72,32 @@ class DepositWithdrawRequest(BaseModel):
     notes: str = Field(..., min_length=1, max_length=500, description="Transaction notes (required)")
 
 
+class BulkPostingEntry(BaseModel):
+    """One row of a bulk deposit/withdrawal"""
+    target_user_id: int = Field(..., description="Client user ID")
+    amount: Decimal = Field(..., gt=0, description="Amount to deposit/withdraw")
+    notes: str = Field(..., min_length=1, max_length=500, description="Transaction notes (required)")
+
+
+class BulkPostingRequest(BaseModel):
+    """Schema for bulk deposits/withdrawals by manager/admin"""
+    operation: str = Field(..., description="deposit or withdraw")
+    mode: str = Field("atomic", description="atomic (all-or-nothing) or best_effort")
+    entries: List[BulkPostingEntry] = Field(..., min_length=1)
+
+    @validator('operation')
+    def validate_operation(cls, v):
+        if v not in ['deposit', 'withdraw']:
+            raise ValueError('operation must be either deposit or withdraw')
+        return v
+
+    @validator('mode')
+    def validate_mode(cls, v):
+        if v not in ['atomic', 'best_effort']:
+            raise ValueError('mode must be either atomic or best_effort')
+        return v
+
+
 class ProfitTransferRequest(BaseModel):
     """Schema for client to transfer profit from trading to wallet"""
     amount: Decimal = Field(..., gt=0, description="Amount to transfer from trading_balance to wallet_balance")
@@ -1,7 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
-import re
 from app.models.user import UserRole, AccountType
 
 
@@ -14,41 +13,12 @@ class UserBase(BaseModel):
 
 class UserCreate(BaseModel):
     email: EmailStr
-    password: str = Field(..., min_length=12, max_length=128)
+    password: str = Field(..., max_length=128)  # strength is checked by validate_password_strength
     name: str = Field(..., min_length=1, max_length=100)
     phone: Optional[str] = None
     referral_code: str = Field(..., min_length=1)
     account_type: AccountType = AccountType.STANDARD
 
-    @field_validator('password')
-    @classmethod
-    def validate_password_strength(cls, v: str) -> str:
-        """
-        Validate password complexity.
-        Requirements:
-        - At least 12 characters
-        - At least one uppercase letter
-        - At least one lowercase letter
-        - At least one digit
-        - At least one special character
-        """
-        if len(v) < 12:
-            raise ValueError('Password must be at least 12 characters long')
-
-        if not re.search(r'[A-Z]', v):
-            raise ValueError('Password must contain at least one uppercase letter')
-
-        if not re.search(r'[a-z]', v):
-            raise ValueError('Password must contain at least one lowercase letter')
-
-        if not re.search(r'\d', v):
-            raise ValueError('Password must contain at least one digit')
-
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', v):
-            raise ValueError('Password must contain at least one special character (!@#$%^&*(),.?":{}|<>)')
-
-        return v
-
 
 class UserLogin(BaseModel):
     email: EmailStr
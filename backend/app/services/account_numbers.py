@@ -0,0 +1,99 @@
+"""
+Account number allocation.
+
+Numbers come from the `account_number` row of number_sequences. Each worker
+reserves a block of ACCOUNT_NUMBER_BLOCK_SIZE values in one short transaction
+of its own and then hands them out from memory, so registration never has to
+check for collisions. Values left in a block when a worker stops are skipped,
+which only leaves gaps. The 10-digit ACC-XXXXXXXXXX format cannot collide
+with legacy 5-digit ACC-XXXXX numbers.
+"""
+import threading
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models.number_sequence import NumberSequence
+
+SEQUENCE_NAME = "account_number"
+
+
+def format_account_number(value: int) -> str:
+    return f"ACC-{value:010d}"
+
+
+class AccountNumberAllocator:
+    """Hands out unique account numbers from DB-reserved blocks."""
+
+    def __init__(self, engine: Optional[Engine] = None, block_size: int = 100):
+        self.engine = engine
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0  # exclusive
+        self._lock = threading.Lock()
+
+    def _bind(self) -> Engine:
+        if self.engine is None:
+            from app.database import engine
+            self.engine = engine
+        return self.engine
+
+    def _reserve_block(self) -> int:
+        """Claim the next block in its own transaction; returns its first value."""
+        table = NumberSequence.__table__
+        for _ in range(2):
+            with self._bind().begin() as conn:
+                end = conn.execute(
+                    update(table)
+                    .where(table.c.name == SEQUENCE_NAME)
+                    .values(next_value=table.c.next_value + self.block_size)
+                    .returning(table.c.next_value)
+                ).scalar()
+                if end is not None:
+                    return end - self.block_size
+            try:
+                # First allocation on this database: create the counter
+                with self._bind().begin() as conn:
+                    conn.execute(insert(table).values(name=SEQUENCE_NAME, next_value=1 + self.block_size))
+                return 1
+            except IntegrityError:
+                continue  # another worker created it first; reserve from it
+        raise RuntimeError("Could not reserve an account number block")
+
+    def _take(self) -> Optional[str]:
+        if self._next < self._end:
+            value = self._next
+            self._next += 1
+            return format_account_number(value)
+        return None
+
+    def allocate(self) -> str:
+        """Next account number, reserving a new block when the current one is used up."""
+        with self._lock:
+            number = self._take()
+            if number is None:
+                self._next = self._reserve_block()
+                self._end = self._next + self.block_size
+                number = self._take()
+            return number
+
+    async def allocate_async(self) -> str:
+        """allocate() without blocking the event loop on a block reservation."""
+        with self._lock:
+            number = self._take()
+        if number is not None:
+            return number
+        return await run_in_threadpool(self.allocate)
+
+    def reset(self, engine: Optional[Engine] = None) -> None:
+        """Drop the current block (and optionally rebind), e.g. between test databases."""
+        with self._lock:
+            self.engine = engine
+            self._next = self._end = 0
+
+
+account_numbers = AccountNumberAllocator(block_size=settings.ACCOUNT_NUMBER_BLOCK_SIZE)
@@ -0,0 +1,187 @@
+"""
+Balance snapshots and point-in-time balances.
+
+`snapshot_balances` copies the balances of every account that moved since
+its last snapshot into balance_history in a single INSERT ... SELECT, so each
+snapshot is consistent with the transactions it covers. A balance at any
+moment is then the nearest snapshot plus (or minus) the signed deltas of the
+few transactions between the snapshot and that moment; with no snapshot at
+or before it, the walk goes backwards from the next snapshot or the live
+account. Snapshots older than a cut-off are thinned to the last one per day,
+and chart series are downsampled in SQL to a fixed number of points.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, and_, case, cast, delete, func, insert, literal, select
+from sqlalchemy.engine import Connection
+
+from app.models import Account, BalanceSnapshot, Transaction, TransactionType
+
+snapshots = BalanceSnapshot.__table__
+accounts = Account.__table__
+transactions = Transaction.__table__
+
+
+def to_utc(moment: datetime) -> datetime:
+    """`moment` as an aware datetime; naive values are taken to be UTC."""
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+# Rows posted before the ledger recorded per-column deltas moved the column
+# their type posts to (the same fallback reconciliation uses)
+_legacy = and_(transactions.c.wallet_delta.is_(None), transactions.c.trading_delta.is_(None))
+_wallet_delta = case(
+    (and_(_legacy, transactions.c.transaction_type == TransactionType.WITHDRAW), -transactions.c.amount),
+    (and_(_legacy, transactions.c.transaction_type == TransactionType.TRANSFER), transactions.c.amount),
+    else_=func.coalesce(transactions.c.wallet_delta, 0),
+)
+_trading_delta = case(
+    (and_(_legacy, transactions.c.transaction_type == TransactionType.DEPOSIT), transactions.c.amount),
+    (and_(_legacy, transactions.c.transaction_type == TransactionType.TRANSFER), -transactions.c.amount),
+    else_=func.coalesce(transactions.c.trading_delta, 0),
+)
+
+
+def snapshot_balances(conn: Connection, recorded_at: Optional[datetime] = None) -> int:
+    """Snapshot every account whose transactions moved since its last snapshot; returns the count."""
+    recorded_at = to_utc(recorded_at or datetime.now(timezone.utc))
+    last_transaction = (
+        select(func.max(transactions.c.id))
+        .where(transactions.c.account_id == accounts.c.id)
+        .scalar_subquery()
+    )
+    previous = (
+        select(func.coalesce(snapshots.c.last_transaction_id, 0))
+        .where(snapshots.c.account_id == accounts.c.id)
+        .order_by(snapshots.c.recorded_at.desc(), snapshots.c.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    moved = (
+        select(
+            accounts.c.id,
+            func.coalesce(accounts.c.balance, 0),
+            func.coalesce(accounts.c.wallet_balance, 0),
+            func.coalesce(accounts.c.trading_balance, 0),
+            last_transaction,
+            literal(recorded_at, snapshots.c.recorded_at.type),
+        )
+        # -1 never matches: accounts without a snapshot always get their first one
+        .where(func.coalesce(last_transaction, 0) != func.coalesce(previous, -1))
+    )
+    return conn.execute(
+        insert(snapshots).from_select(
+            ["account_id", "balance", "wallet_balance", "trading_balance", "last_transaction_id", "recorded_at"],
+            moved
+        )
+    ).rowcount
+
+
+def compact_snapshots(conn: Connection, before: datetime) -> int:
+    """Keep only each account's last snapshot per day before `before`; returns rows removed."""
+    before = to_utc(before)
+    keep = (
+        select(func.max(snapshots.c.id))
+        .where(snapshots.c.recorded_at < before)
+        .group_by(snapshots.c.account_id, func.date(snapshots.c.recorded_at))
+    )
+    return conn.execute(
+        delete(snapshots).where(snapshots.c.recorded_at < before, snapshots.c.id.not_in(keep))
+    ).rowcount
+
+
+async def balance_at(db, account: Account, at: datetime) -> dict:
+    """The account's balances at `at`, from the nearest snapshot and the deltas after (or before) it."""
+    at = to_utc(at)
+    base = (await db.execute(
+        select(snapshots)
+        .where(snapshots.c.account_id == account.id, snapshots.c.recorded_at <= at)
+        .order_by(snapshots.c.recorded_at.desc(), snapshots.c.id.desc())
+        .limit(1)
+    )).mappings().first()
+    if base is not None:
+        # Forward from the snapshot
+        sign = 1
+        window = [transactions.c.created_at <= at]
+        if base["last_transaction_id"] is not None:
+            window.append(transactions.c.id > base["last_transaction_id"])
+    else:
+        # Backward from the next snapshot, or from the live balances
+        sign = -1
+        base = (await db.execute(
+            select(snapshots)
+            .where(snapshots.c.account_id == account.id, snapshots.c.recorded_at > at)
+            .order_by(snapshots.c.recorded_at, snapshots.c.id)
+            .limit(1)
+        )).mappings().first()
+        window = [transactions.c.created_at > at]
+        if base is not None:
+            window.append(transactions.c.id <= func.coalesce(base["last_transaction_id"], 0))
+        else:
+            base = {
+                "wallet_balance": account.wallet_balance or Decimal("0"),
+                "trading_balance": account.trading_balance or Decimal("0"),
+                "recorded_at": None,
+            }
+
+    replayed = (await db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(_wallet_delta), 0),
+            func.coalesce(func.sum(_trading_delta), 0),
+        ).where(transactions.c.account_id == account.id, *window)
+    )).one()
+    wallet = Decimal(str(base["wallet_balance"])) + sign * Decimal(str(replayed[1]))
+    trading = Decimal(str(base["trading_balance"])) + sign * Decimal(str(replayed[2]))
+    return {
+        "account_id": account.id,
+        "at": at,
+        "balance": float(wallet + trading),
+        "wallet_balance": float(wallet),
+        "trading_balance": float(trading),
+        "snapshot_at": base["recorded_at"],
+        "replayed_transactions": replayed[0],
+    }
+
+
+def _epoch_seconds(column, dialect: str):
+    """Whole seconds since the epoch, as an integer so that // buckets by integer division."""
+    if dialect == "sqlite":
+        return cast(func.strftime("%s", column), BigInteger)
+    return cast(func.extract("epoch", column), BigInteger)
+
+
+async def balance_series(db, account_id: int, start: datetime, end: datetime, points: int) -> List[dict]:
+    """
+    Snapshots between `start` and `end`, downsampled to at most `points`: the
+    range is cut into equal buckets and the last snapshot of each is kept.
+    """
+    start, end = to_utc(start), to_utc(end)
+    width = int((end - start).total_seconds()) // points + 1  # seconds per bucket
+    dialect = db.sync_session.get_bind().dialect.name
+    bucket = (_epoch_seconds(snapshots.c.recorded_at, dialect) - int(start.timestamp())) // width
+    last_per_bucket = (
+        select(func.max(snapshots.c.id))
+        .where(
+            snapshots.c.account_id == account_id,
+            snapshots.c.recorded_at >= start,
+            snapshots.c.recorded_at <= end,
+        )
+        .group_by(bucket)
+    )
+    rows = (await db.execute(
+        select(
+            snapshots.c.recorded_at, snapshots.c.balance, snapshots.c.wallet_balance, snapshots.c.trading_balance
+        ).where(snapshots.c.id.in_(last_per_bucket)).order_by(snapshots.c.recorded_at)
+    )).all()
+    return [
+        {
+            "recorded_at": recorded_at,
+            "balance": float(balance),
+            "wallet_balance": float(wallet),
+            "trading_balance": float(trading),
+        }
+        for recorded_at, balance, wallet, trading in rows
+    ]
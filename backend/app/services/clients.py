@@ -0,0 +1,23 @@
+"""
+Client listings.
+
+Staff list clients together with their trading account. Each row joins the
+user's first account (lowest id, the one registration creates) through a
+correlated subquery on accounts.user_id, so a listing is one query however
+many clients it returns, and clients without an account still appear.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+
+from app.models import Account, User
+
+
+def client_listing() -> Select:
+    """SELECT of (User, Account or None) rows; add filters, ordering and columns as needed."""
+    first_account = (
+        select(func.min(Account.id))
+        .where(Account.user_id == User.id)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    return select(User, Account).outerjoin(Account, Account.id == first_account)
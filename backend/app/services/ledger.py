@@ -0,0 +1,434 @@
+"""
+Ledger postings.
+
+Every balance change is a single conditional UPDATE ... RETURNING: the delta
+is applied in SQL (`x = x + :amount`) and overdraft checks are part of the
+WHERE clause, so concurrent postings to one balance serialize on its row
+lock instead of racing a read-modify-write in Python. On PostgreSQL the
+Transaction row is written by the same statement (a data-modifying CTE);
+other databases insert it next, in the same database transaction.
+
+Postings never commit; the caller owns the transaction. The failure path
+(no row updated) runs one extra query to tell a missing target apart from
+insufficient funds. Successful postings also add themselves to their
+branch's daily rollup (one more statement, same transaction) and to the
+audit trail once the caller commits.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import bindparam, func, insert, literal, null, select, true, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import ColumnElement
+
+from app.models import Account, Transaction, TransactionStatus, TransactionType, User, UserRole
+from app.services.rollups import add_to_rollups
+from app.utils.logging import log_transaction
+
+accounts = Account.__table__
+users = User.__table__
+transactions = Transaction.__table__
+
+WALLET = "wallet_balance"
+TRADING = "trading_balance"
+# Transaction columns recording each account column's signed change
+DELTA_COLUMNS = {WALLET: "wallet_delta", TRADING: "trading_delta"}
+
+
+class LedgerError(Exception):
+    """Base class for postings that could not be applied."""
+
+
+class BalanceNotFound(LedgerError):
+    """The target user (or their account) does not exist within the caller's scope."""
+
+    def __init__(self, owner_found: bool):
+        super().__init__("Account not found" if owner_found else "User not found")
+        self.owner_found = owner_found
+
+
+class InsufficientFunds(LedgerError):
+    """A debit would have taken `column` below zero."""
+
+    def __init__(self, column: str, balance: Decimal):
+        super().__init__(f"Insufficient {column}: {balance}")
+        self.column = column
+        self.balance = balance
+
+
+class DuplicatePosting(LedgerError):
+    """A posting with this Transaction.reference already exists; nothing was posted."""
+
+    def __init__(self, reference: str):
+        super().__init__(f"Duplicate posting {reference}")
+        self.reference = reference
+
+
+def _raise_if_duplicate(error: IntegrityError, reference: Optional[str]) -> None:
+    if reference and "reference" in str(error.orig):
+        raise DuplicatePosting(reference) from error
+
+
+@dataclass(frozen=True)
+class Posting:
+    transaction_id: int
+    user_id: int
+    account_id: Optional[int]
+    owner_name: str
+    owner_email: str
+    amount: Decimal
+    balance_before: Decimal
+    balance_after: Decimal
+    balances: Dict[str, Decimal]  # new value of every column the posting touched
+
+
+async def _apply(db, moved, ledger_column: str, delta: Decimal, entry: dict) -> Optional[dict]:
+    """Run the UPDATE, insert its Transaction row and roll it up; None if no row matched."""
+    try:
+        row = await _update_and_record(db, moved, ledger_column, delta, entry)
+    except IntegrityError as e:
+        _raise_if_duplicate(e, entry.get("reference"))
+        raise
+    if row is not None:
+        await add_to_rollups(db, [(row["branch_id"], entry["transaction_type"], row["account_id"] is None, abs(delta))])
+        log_transaction(
+            entry["transaction_type"].value, row["user_id"], abs(delta), transaction_id=row["transaction_id"],
+            details=entry["description"], performed_by_id=entry["performed_by_id"], session=db.sync_session
+        )
+    return row
+
+
+async def _update_and_record(db, moved, ledger_column: str, delta: Decimal, entry: dict) -> Optional[dict]:
+    amount = abs(delta)
+    columns = ["user_id", "account_id", "amount", "balance_before", "balance_after", "status", *entry]
+
+    if db.sync_session.get_bind().dialect.name == "postgresql":
+        # One round trip: WITH moved AS (UPDATE ...), entry AS (INSERT ... SELECT FROM moved) SELECT ...
+        moved = moved.cte("moved")
+        values = [
+            moved.c.user_id,
+            moved.c.account_id,
+            literal(amount, transactions.c.amount.type),
+            moved.c[ledger_column] - delta,
+            moved.c[ledger_column],
+            literal(TransactionStatus.COMPLETED, transactions.c.status.type),
+            *(literal(value, transactions.c[name].type) for name, value in entry.items()),
+        ]
+        written = (
+            insert(transactions)
+            .from_select(columns, select(*values))
+            .returning(transactions.c.id)
+            .cte("entry")
+        )
+        row = (await db.execute(
+            select(moved, written.c.id.label("transaction_id")).select_from(moved.join(written, true()))
+        )).mappings().first()
+        return dict(row) if row else None
+
+    row = (await db.execute(moved)).mappings().first()
+    if row is None:
+        return None
+    row = dict(row)
+    row["transaction_id"] = (await db.execute(
+        insert(transactions).values(
+            user_id=row["user_id"],
+            account_id=row["account_id"],
+            amount=amount,
+            balance_before=row[ledger_column] - delta,
+            balance_after=row[ledger_column],
+            status=TransactionStatus.COMPLETED,
+            **entry
+        ).returning(transactions.c.id)
+    )).scalar_one()
+    return row
+
+
+def _posting(row: dict, ledger_column: str, delta: Decimal, columns: Iterable[str]) -> Posting:
+    return Posting(
+        transaction_id=row["transaction_id"],
+        user_id=row["user_id"],
+        account_id=row["account_id"],
+        owner_name=row["owner_name"],
+        owner_email=row["owner_email"],
+        amount=abs(delta),
+        balance_before=row[ledger_column] - delta,
+        balance_after=row[ledger_column],
+        balances={name: row[name] for name in columns},
+    )
+
+
+async def post_to_account(
+    db,
+    user_id: int,
+    deltas: Dict[str, Decimal],
+    *,
+    transaction_type: TransactionType,
+    description: str,
+    performed_by_id: Optional[int] = None,
+    from_user_id: Optional[int] = None,
+    to_user_id: Optional[int] = None,
+    reference: Optional[str] = None,
+    owner_conditions: Iterable[ColumnElement] = (),
+) -> Posting:
+    """
+    Apply `deltas` ({column: signed amount}) to the user's account.
+
+    The first column is the one recorded in the Transaction row. Negative
+    deltas may not overdraw their column. `owner_conditions` (on User)
+    restrict which users may be posted to, e.g. a role or branch.
+    """
+    ledger_column = next(iter(deltas))
+    owner_conditions = list(owner_conditions)
+    # Lowest-id account of the user, and only if the user matches the caller's scope
+    account_id = (
+        select(accounts.c.id)
+        .join(users, users.c.id == accounts.c.user_id)
+        .where(accounts.c.user_id == user_id, *owner_conditions)
+        .order_by(accounts.c.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    values = {name: accounts.c[name] + delta for name, delta in deltas.items()}
+    values["balance"] = accounts.c.wallet_balance + accounts.c.trading_balance + sum(deltas.values())
+    overdraft_checks = [accounts.c[name] >= -delta for name, delta in deltas.items() if delta < 0]
+
+    moved = (
+        update(accounts)
+        .where(accounts.c.id == account_id, *overdraft_checks)
+        .values(**values)
+        .returning(
+            accounts.c.id.label("account_id"),
+            accounts.c.user_id,
+            *(accounts.c[name] for name in values),
+            select(users.c.name).where(users.c.id == accounts.c.user_id).scalar_subquery().label("owner_name"),
+            select(users.c.email).where(users.c.id == accounts.c.user_id).scalar_subquery().label("owner_email"),
+            select(users.c.branch_id).where(users.c.id == accounts.c.user_id).scalar_subquery().label("branch_id"),
+        )
+    )
+    entry = dict(
+        transaction_type=transaction_type,
+        description=description,
+        performed_by_id=performed_by_id,
+        from_user_id=from_user_id,
+        to_user_id=to_user_id,
+        reference=reference,
+        **{DELTA_COLUMNS[name]: delta for name, delta in deltas.items()},
+    )
+    row = await _apply(db, moved, ledger_column, deltas[ledger_column], entry)
+    if row is not None:
+        return _posting(row, ledger_column, deltas[ledger_column], values)
+
+    # Nothing updated: work out why
+    debited = [name for name, delta in deltas.items() if delta < 0]
+    found = (await db.execute(
+        select(users.c.id, accounts.c.id.label("account_id"), *(accounts.c[name] for name in debited))
+        .select_from(users.outerjoin(accounts, accounts.c.user_id == users.c.id))
+        .where(users.c.id == user_id, *owner_conditions)
+        .order_by(accounts.c.id)
+        .limit(1)
+    )).mappings().first()
+    if found is None or found["account_id"] is None:
+        raise BalanceNotFound(owner_found=found is not None)
+    for name in debited:
+        if found[name] < -deltas[name]:
+            raise InsufficientFunds(name, found[name])
+    raise LedgerError("Posting was not applied")
+
+
+async def post_to_admin_balance(
+    db,
+    admin_id: int,
+    delta: Decimal,
+    *,
+    transaction_type: TransactionType,
+    description: str,
+    performed_by_id: Optional[int] = None,
+    from_user_id: Optional[int] = None,
+    to_user_id: Optional[int] = None,
+    reference: Optional[str] = None,
+) -> Posting:
+    """Apply a signed `delta` to an admin's admin_balance; debits may not overdraw it."""
+    balance = func.coalesce(users.c.admin_balance, 0)
+    conditions = [users.c.id == admin_id, users.c.role == UserRole.ADMIN]
+    if delta < 0:
+        conditions.append(balance >= -delta)
+    moved = (
+        update(users)
+        .where(*conditions)
+        .values(admin_balance=balance + delta)
+        .returning(
+            users.c.id.label("user_id"),
+            null().label("account_id"),
+            users.c.admin_balance,
+            users.c.name.label("owner_name"),
+            users.c.email.label("owner_email"),
+            users.c.branch_id,
+        )
+    )
+    entry = dict(
+        transaction_type=transaction_type,
+        description=description,
+        performed_by_id=performed_by_id,
+        from_user_id=from_user_id,
+        to_user_id=to_user_id,
+        reference=reference,
+    )
+    row = await _apply(db, moved, "admin_balance", delta, entry)
+    if row is not None:
+        return _posting(row, "admin_balance", delta, ["admin_balance"])
+
+    current = (await db.execute(
+        select(users.c.admin_balance).where(users.c.id == admin_id, users.c.role == UserRole.ADMIN)
+    )).first()
+    if current is None:
+        raise BalanceNotFound(owner_found=False)
+    raise InsufficientFunds("admin_balance", current.admin_balance or Decimal("0"))
+
+
+class BalanceChanged(LedgerError):
+    """A balance in the batch was modified concurrently; nothing was posted."""
+
+
+@dataclass(frozen=True)
+class BatchEntry:
+    user_id: int
+    amount: Decimal  # signed delta
+    description: str
+    reference: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    user_id: int
+    amount: Decimal
+    status: str = "posted"  # posted | failed | not_applied
+    error: Optional[str] = None
+    transaction_id: Optional[int] = None
+    balance_after: Optional[Decimal] = None
+
+
+async def post_batch(
+    db,
+    entries: Sequence[BatchEntry],
+    column: str,
+    *,
+    transaction_type: TransactionType,
+    performed_by_id: Optional[int] = None,
+    owner_conditions: Iterable[ColumnElement] = (),
+    atomic: bool = True,
+) -> List[BatchResult]:
+    """
+    Post many single-column deltas in one database transaction.
+
+    Every target is validated from one batched lookup, then each touched
+    account gets one compare-and-set UPDATE (executemany) and every entry one
+    Transaction row (executemany INSERT). Rows that cannot be posted are
+    reported as failed; with `atomic`, any failure leaves every row
+    unapplied. Raises BalanceChanged (after which the caller must roll back)
+    if an account moved between the lookup and the update.
+    """
+    if len({entry.amount > 0 for entry in entries}) > 1 or any(entry.amount == 0 for entry in entries):
+        raise ValueError("A batch must be all credits or all debits")
+    user_ids = {entry.user_id for entry in entries}
+    rows = (await db.execute(
+        select(accounts.c.id, accounts.c.user_id, accounts.c[column], users.c.branch_id)
+        .join(users, users.c.id == accounts.c.user_id)
+        .where(accounts.c.user_id.in_(user_ids), *owner_conditions)
+        .order_by(accounts.c.id)
+    )).all()
+    targets = {}
+    for account_id, user_id, balance, branch_id in rows:
+        # Lowest id wins: [id, original, running, branch]
+        targets.setdefault(user_id, [account_id, balance, balance, branch_id])
+
+    results = []
+    for entry in entries:
+        result = BatchResult(entry.user_id, abs(entry.amount))
+        target = targets.get(entry.user_id)
+        if target is None:
+            result.status, result.error = "failed", "Client account not found"
+        elif target[2] + entry.amount < 0:
+            result.status, result.error = "failed", f"Insufficient {column.replace('_', ' ')}. Client has ${target[2]}"
+        else:
+            target[2] += entry.amount
+            result.balance_after = target[2]
+        results.append(result)
+
+    posted = [(entry, result) for entry, result in zip(entries, results) if result.status == "posted"]
+    if atomic and len(posted) < len(entries):
+        for _, result in posted:
+            result.status, result.balance_after = "not_applied", None
+        return results
+    if not posted:
+        return results
+
+    moved = [
+        {"account_id": account_id, "expected": original, "delta": running - original}
+        for account_id, original, running, _ in targets.values() if running != original
+    ]
+    # Compare-and-set on the exact balance we validated against (rounded, for float-backed SQLite)
+    stmt = (
+        update(accounts)
+        .where(
+            accounts.c.id == bindparam("account_id"),
+            func.round(accounts.c[column], 2) == bindparam("expected", type_=accounts.c[column].type)
+        )
+        .values({
+            column: accounts.c[column] + bindparam("delta", type_=accounts.c[column].type),
+            "balance": accounts.c.wallet_balance + accounts.c.trading_balance + bindparam("delta"),
+        })
+    )
+    if db.sync_session.get_bind().dialect.supports_sane_multi_rowcount:
+        updated = (await db.execute(stmt, moved)).rowcount
+    else:
+        updated = 0
+        for params in moved:
+            updated += (await db.execute(stmt, params)).rowcount
+    if updated != len(moved):
+        raise BalanceChanged("A balance changed while the batch was being posted")
+
+    values = []
+    for entry, result in posted:
+        account_id = targets[entry.user_id][0]
+        values.append({
+            "user_id": entry.user_id,
+            "account_id": account_id,
+            "transaction_type": transaction_type,
+            "amount": result.amount,
+            "balance_before": result.balance_after - entry.amount,
+            "balance_after": result.balance_after,
+            "description": entry.description,
+            "status": TransactionStatus.COMPLETED,
+            "performed_by_id": performed_by_id,
+            "from_user_id": entry.user_id if entry.amount < 0 else None,
+            "to_user_id": entry.user_id if entry.amount > 0 else None,
+            "reference": entry.reference,
+            **{delta_column: None for delta_column in DELTA_COLUMNS.values()},
+            DELTA_COLUMNS[column]: entry.amount,
+        })
+    # One multi-row INSERT. Asking for RETURNING in parameter order would make
+    # SQLite fall back to row-at-a-time inserts, so rows are matched back by
+    # (user, balance after) instead: every delta in a batch moves one column in
+    # one direction, so those pairs are unique.
+    try:
+        written = (await db.execute(
+            insert(transactions).returning(transactions.c.id, transactions.c.user_id, transactions.c.balance_after),
+            values
+        )).all()
+    except IntegrityError as e:
+        _raise_if_duplicate(e, next((entry.reference for entry, _ in posted if entry.reference), None))
+        raise
+    cents = Decimal("0.01")
+    ids = {(user_id, after.quantize(cents)): transaction_id for transaction_id, user_id, after in written}
+    for entry, result in posted:
+        result.transaction_id = ids.get((entry.user_id, result.balance_after.quantize(cents)))
+    await add_to_rollups(db, (
+        (targets[entry.user_id][3], transaction_type, False, result.amount) for entry, result in posted
+    ))
+    for entry, result in posted:
+        log_transaction(
+            transaction_type.value, entry.user_id, result.amount, transaction_id=result.transaction_id,
+            details=entry.description, performed_by_id=performed_by_id, session=db.sync_session
+        )
+    return results
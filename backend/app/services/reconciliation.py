@@ -0,0 +1,247 @@
+"""
+Ledger reconciliation.
+
+Checks, over the whole ledger or incrementally from a watermark:
+
+* every account: balance == wallet_balance + trading_balance, and no column
+  below zero;
+* every transaction: amount > 0 and |balance_after - balance_before| == amount;
+* every balance chain (an account's wallet or trading column, an admin's
+  admin_balance): each posting's balance_before equals the previous
+  posting's balance_after plus whatever moved the column in between, such as
+  the wallet side of a transfer;
+* the live value of every chain equals where its postings say it should be.
+
+Transactions are streamed from a server-side cursor in chunks and checked
+with vectorised pandas/NumPy operations on integer cents. Between chunks, and
+between incremental runs through a state file, only two numbers per chain are
+carried: the running sum of its deltas and its offset (the opening balance
+the postings imply). Requires pandas and NumPy (requirements.full.txt).
+"""
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, func, select, type_coerce
+from sqlalchemy.engine import Connection
+
+from app.models import Account, Transaction, TransactionType, User, UserRole
+
+accounts = Account.__table__
+transactions = Transaction.__table__
+users = User.__table__
+
+WALLET, TRADING, ADMIN = 0, 1, 2
+CHAIN_COLUMNS = {WALLET: "wallet_balance", TRADING: "trading_balance", ADMIN: "admin_balance"}
+REPORT_COLUMNS = ["check", "account_id", "user_id", "transaction_id", "column", "expected", "actual"]
+
+CHAIN_KEY = ["chain", "owner"]  # chain column, and the account id (admin user id for ADMIN)
+
+
+def _empty_chains() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"total": pd.Series(dtype=float), "offset": pd.Series(dtype=float)},
+        index=pd.MultiIndex.from_arrays([[], []], names=CHAIN_KEY),
+    )
+
+
+@dataclass
+class ReconciliationState:
+    """
+    Where the last run stopped: the highest transaction id checked and, per
+    chain, the sum of its deltas and its offset (NaN until a posting records
+    the chain), both in cents.
+    """
+    watermark: int = 0
+    chains: pd.DataFrame = field(default_factory=_empty_chains)
+
+    @classmethod
+    def load(cls, path: str) -> "ReconciliationState":
+        with open(path) as f:
+            data = json.load(f)
+        chains = pd.DataFrame(data["chains"], columns=[*CHAIN_KEY, "total", "offset"], dtype=float)
+        chains[CHAIN_KEY] = chains[CHAIN_KEY].astype(np.int64)
+        return cls(data["watermark"], chains.set_index(CHAIN_KEY) if len(chains) else _empty_chains())
+
+    def save(self, path: str) -> None:
+        chains = self.chains.reset_index().astype(object)
+        chains = chains.where(chains.notna(), None).values.tolist()
+        with open(path, "w") as f:
+            json.dump({"watermark": self.watermark, "chains": chains}, f)
+
+
+def _cents(values) -> np.ndarray:
+    return np.rint(pd.to_numeric(values, errors="coerce").to_numpy(dtype=float) * 100)
+
+
+def _issues(check: str, frame: pd.DataFrame, column, **fields) -> pd.DataFrame:
+    """Report rows for `frame`; each field is a column of `frame` (by name), an array or a constant."""
+    report = pd.DataFrame(index=frame.index)
+    for name in REPORT_COLUMNS[1:]:
+        value = column if name == "column" else fields.get(name)
+        report[name] = frame[value] if name != "column" and isinstance(value, str) else value
+    for name in ("expected", "actual"):
+        report[name] = report[name].astype(float) / 100
+    report.insert(0, "check", check)
+    return report.reset_index(drop=True)
+
+
+def check_accounts(frame: pd.DataFrame) -> pd.DataFrame:
+    """Account rows whose balance is not wallet + trading, or that have a negative column."""
+    balance, wallet, trading = (_cents(frame[name]) for name in ("balance", "wallet_balance", "trading_balance"))
+    frame = frame.assign(balance_c=balance, wallet_c=wallet, trading_c=trading, sum_c=wallet + trading)
+    found = [
+        _issues("balance_not_sum", frame[balance != wallet + trading], "balance",
+                account_id="id", user_id="user_id", expected="sum_c", actual="balance_c"),
+        _issues("negative_balance", frame[wallet < 0], "wallet_balance",
+                account_id="id", user_id="user_id", expected=0, actual="wallet_c"),
+        _issues("negative_balance", frame[trading < 0], "trading_balance",
+                account_id="id", user_id="user_id", expected=0, actual="trading_c"),
+    ]
+    return pd.concat(found, ignore_index=True)
+
+
+def _chain_events(frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """One row per (transaction, chain it moves): the signed delta, and balance_after if the row records that chain."""
+    before, after, amount = _cents(frame.balance_before), _cents(frame.balance_after), _cents(frame.amount)
+    wallet_delta, trading_delta = _cents(frame.wallet_delta), _cents(frame.trading_delta)
+    moved = after - before
+    kind = frame.transaction_type.to_numpy()
+    is_admin = frame.account_id.isna().to_numpy()
+    has_deltas = ~np.isnan(wallet_delta) | ~np.isnan(trading_delta)
+
+    # The chain balance_before/after describe. Rows written before the ledger
+    # recorded per-column deltas fall back to the column each type posts to.
+    recorded = np.select(
+        [
+            is_admin,
+            trading_delta == moved,
+            wallet_delta == moved,
+            ~has_deltas & np.isin(kind, [TransactionType.DEPOSIT.name, TransactionType.TRANSFER.name]),
+            ~has_deltas & (kind == TransactionType.WITHDRAW.name),
+        ],
+        [ADMIN, TRADING, WALLET, TRADING, WALLET],
+        default=-1,
+    )
+    transfer = ~has_deltas & ~is_admin & (kind == TransactionType.TRANSFER.name)
+    deltas = {
+        WALLET: np.where(has_deltas, np.nan_to_num(wallet_delta), np.where(recorded == WALLET, moved, 0) - transfer * moved),
+        TRADING: np.where(has_deltas, np.nan_to_num(trading_delta), np.where(recorded == TRADING, moved, 0)),
+        ADMIN: np.where(is_admin, moved, 0),
+    }
+
+    events = []
+    for column, delta in deltas.items():
+        rows = (delta != 0) | (recorded == column)
+        owner = frame.user_id if column == ADMIN else frame.account_id
+        events.append(pd.DataFrame({
+            "chain": column,
+            "owner": owner.to_numpy()[rows].astype(np.int64),
+            "transaction_id": frame.id.to_numpy()[rows],
+            "user_id": frame.user_id.to_numpy()[rows],
+            "delta": delta[rows],
+            "after": np.where(recorded == column, after, np.nan)[rows],
+        }))
+    events = pd.concat(events, ignore_index=True)
+
+    row_issues = [
+        _issues("non_positive_amount", frame.assign(amount_c=amount)[amount <= 0], "amount",
+                account_id="account_id", user_id="user_id", transaction_id="id", expected=0, actual="amount_c"),
+        _issues("amount_mismatch", frame.assign(amount_c=amount, moved_c=np.abs(moved))[np.abs(moved) != amount],
+                "amount", account_id="account_id", user_id="user_id", transaction_id="id",
+                expected="moved_c", actual="amount_c"),
+        _issues("unclassified_transaction", frame[recorded == -1], "transaction_type",
+                account_id="account_id", user_id="user_id", transaction_id="id"),
+    ]
+    return events, pd.concat(row_issues, ignore_index=True)
+
+
+def check_chains(events: pd.DataFrame, state: ReconciliationState) -> pd.DataFrame:
+    """Chain breaks in `events` (ordered by transaction id); advances `state` past them."""
+    if events.empty:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    events = events.sort_values([*CHAIN_KEY, "transaction_id"], kind="stable").reset_index(drop=True)
+    carried = state.chains.reindex(pd.MultiIndex.from_frame(events[CHAIN_KEY]))
+
+    chains = events.groupby(CHAIN_KEY, sort=False)
+    events["total"] = carried.total.fillna(0).to_numpy() + chains.delta.cumsum().to_numpy()
+    # Each recording row implies the chain's opening balance; it must never change
+    events["offset"] = events.after - events.total
+    recording = events[events.after.notna()].copy()
+    recording["previous"] = recording.groupby(CHAIN_KEY, sort=False).offset.shift()
+    first = recording.previous.isna()
+    recording.loc[first, "previous"] = carried.offset.to_numpy()[recording.index[first]]
+    breaks = recording[recording.previous.notna() & (recording.offset != recording.previous)].assign(
+        expected_before=lambda b: b.previous + b.total - b.delta,
+        actual_before=lambda b: b.after - b.delta,
+        account_id=lambda b: np.where(b.chain == ADMIN, np.nan, b.owner),
+    )
+
+    ends = chains.total.last().to_frame()
+    ends["offset"] = recording.groupby(CHAIN_KEY).offset.last()
+    state.chains = ends.combine_first(state.chains)  # chains without a new recording keep their offset
+    state.watermark = max(state.watermark, int(events.transaction_id.max()))
+
+    return _issues("chain_break", breaks, breaks.chain.map(CHAIN_COLUMNS), account_id="account_id",
+                   user_id="user_id", transaction_id="transaction_id", expected="expected_before", actual="actual_before")
+
+
+def check_live_balances(frame: pd.DataFrame, chain: int, state: ReconciliationState) -> pd.DataFrame:
+    """Owners whose live `chain` column differs from the end of its chain (offset + deltas)."""
+    owner_column = "user_id" if chain == ADMIN else "id"
+    live = _cents(frame[CHAIN_COLUMNS[chain]].fillna(0))
+    chains = state.chains[state.chains.index.get_level_values("chain") == chain].droplevel("chain")
+    expected = (chains.total + chains.offset).reindex(frame[owner_column]).to_numpy(dtype=float)
+    frame = frame.assign(live_c=live, expected_c=expected)
+    drifted = frame[~np.isnan(expected) & (live != expected)]
+    return _issues("balance_drift", drifted, CHAIN_COLUMNS[chain], account_id=None if chain == ADMIN else "id",
+                   user_id="user_id", expected="expected_c", actual="live_c")
+
+
+def reconcile(
+    conn: Connection,
+    state: Optional[ReconciliationState] = None,
+    chunk_size: int = 200_000,
+) -> Tuple[pd.DataFrame, ReconciliationState]:
+    """
+    Check the ledger on `conn` (transactions after `state.watermark` only, if
+    given) and return the discrepancy report and the state to resume from.
+    Run it in one snapshot (REPEATABLE READ on PostgreSQL) so the ledger and
+    the live balances agree.
+    """
+    state = state or ReconciliationState()
+    stream = conn.execution_options(stream_results=True)
+    high_watermark = conn.scalar(select(func.coalesce(func.max(transactions.c.id), 0)))
+    reports: List[pd.DataFrame] = []
+
+    ledger = select(
+        transactions.c.id, transactions.c.user_id, transactions.c.account_id,
+        type_coerce(transactions.c.transaction_type, String).label("transaction_type"),
+        transactions.c.amount, transactions.c.balance_before, transactions.c.balance_after,
+        transactions.c.wallet_delta, transactions.c.trading_delta,
+    ).where(transactions.c.id > state.watermark, transactions.c.id <= high_watermark).order_by(transactions.c.id)
+    for chunk in pd.read_sql(ledger, stream, chunksize=chunk_size):
+        events, row_issues = _chain_events(chunk)
+        reports += [row_issues, check_chains(events, state)]
+    state.watermark = max(state.watermark, high_watermark)
+
+    account_rows = select(
+        accounts.c.id, accounts.c.user_id, accounts.c.balance, accounts.c.wallet_balance, accounts.c.trading_balance
+    ).order_by(accounts.c.id)
+    for chunk in pd.read_sql(account_rows, stream, chunksize=chunk_size):
+        reports += [
+            check_accounts(chunk),
+            check_live_balances(chunk, WALLET, state),
+            check_live_balances(chunk, TRADING, state),
+        ]
+    admins = select(users.c.id.label("user_id"), users.c.admin_balance).where(
+        type_coerce(users.c.role, String) == UserRole.ADMIN.name
+    )
+    for chunk in pd.read_sql(admins, stream, chunksize=chunk_size):
+        reports.append(check_live_balances(chunk, ADMIN, state))
+
+    reports = [report for report in reports if not report.empty]
+    report = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=REPORT_COLUMNS)
+    return report, state
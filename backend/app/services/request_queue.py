@@ -0,0 +1,108 @@
+"""
+Claims on pending transaction requests.
+
+An approver claims the next N pending requests for a lease
+(REQUEST_CLAIM_LEASE_SECONDS); nobody else can claim or decide them until
+the claimant decides or releases them or the lease runs out, so approvers
+working one queue never race on the same item. A claim is a single
+UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING id: on PostgreSQL the
+subquery takes `FOR UPDATE SKIP LOCKED`, so concurrent claims skip each
+other's rows instead of queueing behind them; SQLite runs the statement under
+its single writer lock, which makes it atomic as is. Claiming again first
+renews the caller's still-held requests and returns them, so a retried claim
+gets the same items back.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.sql import ColumnElement
+
+from app.models import RequestStatus, RequestType, TransactionRequest, User
+
+requests = TransactionRequest.__table__
+users = User.__table__
+
+
+def claimable_by(approver_id: int, now: datetime) -> ColumnElement:
+    """Requests nobody else holds: unclaimed, claimed by `approver_id`, or with an expired lease."""
+    return or_(
+        requests.c.claimed_by_id.is_(None),
+        requests.c.claimed_by_id == approver_id,
+        requests.c.claim_expires_at <= now,
+    )
+
+
+def held_by_other(request, approver_id: int, now: datetime) -> bool:
+    """Whether `request` (anything with claimed_by_id/claim_expires_at) is under someone else's lease."""
+    expires_at = request.claim_expires_at
+    if request.claimed_by_id is None or request.claimed_by_id == approver_id or expires_at is None:
+        return False
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)  # SQLite drops the offset
+    return expires_at > now
+
+
+async def claim_requests(
+    db,
+    approver_id: int,
+    limit: int,
+    lease_seconds: int,
+    *,
+    branch_id: Optional[int] = None,
+    request_type: Optional[RequestType] = None,
+) -> List[int]:
+    """
+    Claim up to `limit` pending requests, oldest first (only `branch_id`'s
+    clients' and `request_type` if given) for `lease_seconds`; returns their
+    ids. Requests the caller already holds count towards `limit` and are all
+    returned.
+    """
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=lease_seconds)
+    # Requests the caller still holds come back first, with a fresh lease
+    held = [request_id for (request_id,) in (await db.execute(
+        update(requests)
+        .where(
+            requests.c.status == RequestStatus.PENDING,
+            requests.c.claimed_by_id == approver_id,
+            requests.c.claim_expires_at > now,
+        )
+        .values(claim_expires_at=expires_at)
+        .returning(requests.c.id)
+    )).all()]
+    if len(held) >= limit:
+        return held
+
+    pick = (
+        select(requests.c.id)
+        .where(
+            requests.c.status == RequestStatus.PENDING,
+            or_(requests.c.claimed_by_id.is_(None), requests.c.claim_expires_at <= now),
+        )
+        .order_by(requests.c.created_at, requests.c.id)
+        .limit(limit - len(held))
+    )
+    if branch_id is not None:
+        pick = pick.join(users, users.c.id == requests.c.user_id).where(users.c.branch_id == branch_id)
+    if request_type is not None:
+        pick = pick.where(requests.c.request_type == request_type)
+    if db.sync_session.get_bind().dialect.name == "postgresql":
+        pick = pick.with_for_update(skip_locked=True, of=requests)
+
+    claimed = await db.execute(
+        update(requests)
+        .where(requests.c.id.in_(pick.scalar_subquery()))
+        .values(claimed_by_id=approver_id, claim_expires_at=expires_at)
+        .returning(requests.c.id)
+    )
+    return held + [request_id for (request_id,) in claimed.all()]
+
+
+async def release_requests(db, approver_id: int, request_ids: Iterable[int]) -> int:
+    """Give back the caller's claims on `request_ids`; returns how many were released."""
+    return (await db.execute(
+        update(requests)
+        .where(requests.c.id.in_(set(request_ids)), requests.c.claimed_by_id == approver_id)
+        .values(claimed_by_id=None, claim_expires_at=None)
+    )).rowcount
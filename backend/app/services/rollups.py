@@ -0,0 +1,144 @@
+"""
+Daily ledger rollups per branch.
+
+Every ledger posting adds its count and amount to the (day, branch, type)
+row of branch_daily_rollups with one INSERT ... ON CONFLICT DO UPDATE, in the
+posting's own database transaction, so dashboards read O(days) rollup rows
+instead of scanning transactions joined to users. The day is the database's
+current date, the same clock as Transaction.created_at. Rows are upserted in
+key order, so postings that touch several branches lock them in the same
+order and cannot deadlock each other.
+
+`backfill_rollups` recomputes whole days from transactions, deleting and
+re-inserting them in one transaction.
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from app.models import BranchDailyRollup, Transaction, TransactionStatus, TransactionType, User
+
+rollups = BranchDailyRollup.__table__
+transactions = Transaction.__table__
+users = User.__table__
+
+ROLLUP_KEY = ["day", "branch_id", "transaction_type", "admin_balance"]
+
+# (branch_id, transaction_type, admin_balance, amount) of one posting
+RollupPosting = Tuple[Optional[int], TransactionType, bool, object]
+
+
+def _upsert(dialect: str):
+    return postgresql.insert if dialect == "postgresql" else sqlite.insert
+
+
+async def add_to_rollups(db, postings: Iterable[RollupPosting]) -> None:
+    """Add postings to today's rollup rows; postings by users without a branch are not rolled up."""
+    totals: Dict[tuple, list] = defaultdict(lambda: [0, 0])
+    for branch_id, transaction_type, admin_balance, amount in postings:
+        if branch_id is not None:
+            total = totals[branch_id, transaction_type, admin_balance]
+            total[0] += 1
+            total[1] += amount
+    if not totals:
+        return
+
+    stmt = _upsert(db.sync_session.get_bind().dialect.name)(rollups).values(day=func.current_date())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "transaction_count": rollups.c.transaction_count + stmt.excluded.transaction_count,
+            "amount": rollups.c.amount + stmt.excluded.amount,
+        },
+    )
+    rows = [
+        {
+            "branch_id": branch_id,
+            "transaction_type": transaction_type,
+            "admin_balance": admin_balance,
+            "transaction_count": count,
+            "amount": amount,
+        }
+        for (branch_id, transaction_type, admin_balance), (count, amount) in sorted(
+            totals.items(), key=lambda item: (item[0][0], item[0][1].name, item[0][2])
+        )
+    ]
+    await db.execute(stmt, rows)
+
+
+def backfill_rollups(conn: Connection, since: Optional[date] = None, until: Optional[date] = None) -> int:
+    """
+    Rebuild the rollup rows of every day in [since, until) (open ends: all
+    days) from completed transactions; returns the rows written. Postings are
+    attributed to their user's current branch.
+    """
+    day = func.date(transactions.c.created_at, type_=Date)
+    days = []
+    if since is not None:
+        days.append(rollups.c.day >= since)
+    if until is not None:
+        days.append(rollups.c.day < until)
+    conn.execute(delete(rollups).where(*days))
+
+    window = [transactions.c.status == TransactionStatus.COMPLETED, users.c.branch_id.is_not(None)]
+    if since is not None:
+        window.append(day >= since)
+    if until is not None:
+        window.append(day < until)
+    admin_balance = transactions.c.account_id.is_(None)
+    totals = (
+        select(
+            day, users.c.branch_id, transactions.c.transaction_type, admin_balance,
+            func.count(), func.sum(transactions.c.amount),
+        )
+        .join(users, users.c.id == transactions.c.user_id)
+        .where(*window)
+        .group_by(day, users.c.branch_id, transactions.c.transaction_type, admin_balance)
+    )
+    return conn.execute(
+        insert(rollups).from_select([*ROLLUP_KEY, "transaction_count", "amount"], totals)
+    ).rowcount
+
+
+async def branch_daily_flows(db, start: date, end: date, branch_id: Optional[int] = None) -> List[dict]:
+    """
+    Per branch and day in [start, end]: client deposits, withdrawals and
+    transfers, net flow (deposits - withdrawals), the number of postings, and
+    net admin_balance funding.
+    """
+    conditions = [rollups.c.day >= start, rollups.c.day <= end]
+    if branch_id is not None:
+        conditions.append(rollups.c.branch_id == branch_id)
+    rows = (await db.execute(
+        select(
+            rollups.c.day, rollups.c.branch_id, rollups.c.transaction_type, rollups.c.admin_balance,
+            rollups.c.transaction_count, rollups.c.amount,
+        ).where(*conditions).order_by(rollups.c.day, rollups.c.branch_id)
+    )).all()
+
+    flows: Dict[tuple, dict] = {}
+    for day, branch, transaction_type, admin_balance, count, amount in rows:
+        flow = flows.setdefault((day, branch), {
+            "day": day, "branch_id": branch, "deposits": 0.0, "withdrawals": 0.0, "transfers": 0.0,
+            "net_flow": 0.0, "transactions": 0, "admin_funding": 0.0,
+        })
+        amount = float(amount)
+        flow["transactions"] += count
+        if admin_balance:
+            if transaction_type == TransactionType.DEPOSIT:
+                flow["admin_funding"] += amount
+            elif transaction_type == TransactionType.WITHDRAW:
+                flow["admin_funding"] -= amount
+        elif transaction_type == TransactionType.DEPOSIT:
+            flow["deposits"] += amount
+            flow["net_flow"] += amount
+        elif transaction_type == TransactionType.WITHDRAW:
+            flow["withdrawals"] += amount
+            flow["net_flow"] -= amount
+        elif transaction_type == TransactionType.TRANSFER:
+            flow["transfers"] += amount
+    return list(flows.values())
@@ -0,0 +1,294 @@
+"""
+Batched, asynchronous audit trail.
+
+Requests only build an event dict and put it on a bounded in-memory queue;
+they never wait for a write. A writer thread takes events off the queue in
+batches (up to AUDIT_BATCH_SIZE, or whatever arrives within
+AUDIT_FLUSH_INTERVAL_MS of the first) and stores each batch with one group
+commit: a multi-row INSERT into the append-only audit_events table, or one
+write + fsync to a size-rotated JSON-lines file. The same thread also emits
+the familiar "security"/"transactions" log lines, so formatting them is off
+the request path too.
+
+Events tied to database changes (ledger postings, token revocations) are
+held on the session and only queued once it commits. If the queue is full
+(the writer is down or far behind) new events are dropped and counted
+rather than blocking requests; whatever is queued is flushed on shutdown.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SECURITY = "security"
+TRANSACTION = "transaction"
+_LOGGERS = {SECURITY: logging.getLogger("security"), TRANSACTION: logging.getLogger("transactions")}
+
+_STOP = object()
+
+
+def audit_event(category: str, event_type: str, success: bool = True, **fields) -> dict:
+    """An event row: audit_events columns, stamped with the current time."""
+    return {
+        "occurred_at": datetime.now(timezone.utc),
+        "category": category,
+        "event_type": event_type,
+        "success": success,
+        "user_id": fields.get("user_id"),
+        "user_email": fields.get("user_email"),
+        "actor_id": fields.get("actor_id"),
+        "transaction_id": fields.get("transaction_id"),
+        "amount": fields.get("amount"),
+        "details": fields.get("details"),
+    }
+
+
+def format_event(event: dict) -> str:
+    """The log line for an event."""
+    if event["category"] == TRANSACTION:
+        message = (
+            f"TRANSACTION - {event['event_type'].upper()} - User ID: {event['user_id']} - "
+            f"Amount: {event['amount']} - Status: {'completed' if event['success'] else 'failed'}"
+        )
+        if event["transaction_id"]:
+            message += f" - TX ID: {event['transaction_id']}"
+    else:
+        message = f"{event['event_type'].upper()} - {'SUCCESS' if event['success'] else 'FAILED'}"
+        if event["user_email"]:
+            message += f" - User: {event['user_email']}"
+        if event["user_id"]:
+            message += f" - ID: {event['user_id']}"
+    if event["details"]:
+        message += f" - Details: {event['details']}"
+    return message
+
+
+class AuditWriter(ABC):
+    """Stores one batch of events durably."""
+
+    @abstractmethod
+    def write(self, events: List[dict]) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class DatabaseAuditWriter(AuditWriter):
+    """Appends each batch to audit_events in one transaction (executemany INSERT)."""
+
+    def __init__(self, engine):
+        from app.models import AuditEvent
+        self.engine = engine
+        self.table = AuditEvent.__table__
+
+    def write(self, events: List[dict]) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self.table.insert(), events)
+
+
+class FileAuditWriter(AuditWriter):
+    """Appends each batch to a JSON-lines file with one write and one fsync, rotating it by size."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, events: List[dict]) -> None:
+        self._file.write("".join(json.dumps(event, default=str) + "\n" for event in events))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class MemoryAuditWriter(AuditWriter):
+    """Keeps written events in a list (tests)."""
+
+    def __init__(self):
+        self.events: List[dict] = []
+
+    def write(self, events: List[dict]) -> None:
+        self.events.extend(events)
+
+
+class AuditSink:
+    """
+    Queue plus writer thread. `record` never blocks; the thread starts on the
+    first event. A batch that fails to write is retried twice before its
+    events are given up (and logged as lost).
+    """
+
+    def __init__(
+        self,
+        writer: Optional[AuditWriter],
+        queue_size: int = 100000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def record(self, event: dict) -> None:
+        if self._closed:
+            return
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.error(f"Audit queue full: {self.dropped} events dropped so far")
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            items = [self._queue.get()]
+            # Fill the batch until it is full, the queue is empty and the first event has waited
+            # long enough, or close() asked to stop (everything queued before that is in the batch)
+            deadline = time.monotonic() + self.flush_interval
+            while items[-1] is not _STOP and len(items) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    items.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = items[-1] is _STOP
+            batch = [item for item in items if item is not _STOP]
+            if batch:
+                self._write(batch)
+            for _ in items:
+                self._queue.task_done()
+
+    def _write(self, batch: List[dict]) -> None:
+        for item in batch:
+            log = _LOGGERS.get(item["category"])
+            level = logging.INFO if item["success"] else logging.WARNING
+            if log is not None and log.isEnabledFor(level):
+                log.log(level, format_event(item))
+        if self.writer is None:
+            return
+        for attempt in range(3):
+            try:
+                self.writer.write(batch)
+                return
+            except Exception as e:
+                if attempt == 2:
+                    logger.error(f"Audit write failed, {len(batch)} events lost: {str(e)}")
+                else:
+                    time.sleep(0.5 * (attempt + 1))
+
+    def flush(self) -> None:
+        """Block until every event queued so far has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.error("Audit queue still full at shutdown; some events were not written")
+            self._thread.join(timeout)
+        if self.writer is not None:
+            self.writer.close()
+
+
+_sink: Optional[AuditSink] = None
+
+
+def get_audit_sink() -> AuditSink:
+    """The configured sink, created on first use."""
+    global _sink
+    if _sink is None:
+        if settings.AUDIT_SINK == "database":
+            from app.database import engine
+            writer = DatabaseAuditWriter(engine)
+        elif settings.AUDIT_SINK == "file":
+            writer = FileAuditWriter(settings.AUDIT_LOG_FILE, settings.AUDIT_LOG_MAX_BYTES, settings.AUDIT_LOG_BACKUPS)
+        else:
+            writer = None
+        _sink = AuditSink(
+            writer, settings.AUDIT_QUEUE_SIZE, settings.AUDIT_BATCH_SIZE, settings.AUDIT_FLUSH_INTERVAL_MS / 1000
+        )
+    return _sink
+
+
+def set_audit_sink(sink: Optional[AuditSink]) -> None:
+    """Replace the sink (tests, or custom deployments)."""
+    global _sink
+    _sink = sink
+
+
+def close_audit_sink() -> None:
+    """Flush and stop the current sink (application shutdown)."""
+    if _sink is not None:
+        _sink.close()
+
+
+def record_audit_event(event: dict, session: Optional[Session] = None) -> None:
+    """Queue `event`; with `session`, only once that session commits (and never if it rolls back)."""
+    if session is None:
+        get_audit_sink().record(event)
+    else:
+        session.info.setdefault("audit_events", []).append(event)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_committed_events(session):
+    events = session.info.pop("audit_events", None)
+    if events:
+        sink = get_audit_sink()
+        for committed in events:
+            sink.record(committed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_uncommitted_events(session):
+    session.info.pop("audit_events", None)
@@ -4,9 +4,13 @@ Provides structured logging for security events, transactions, and system operat
 """
 import logging
 import sys
-from datetime import datetime
+from decimal import Decimal
 from typing import Optional
 
+from sqlalchemy.orm import Session
+
+from app.utils.audit import SECURITY, TRANSACTION, audit_event, record_audit_event
+
 
 # Configure logging format
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -65,10 +69,13 @@ def log_security_event(
     user_email: Optional[str] = None,
     user_id: Optional[int] = None,
     success: bool = True,
-    details: Optional[str] = None
+    details: Optional[str] = None,
+    session: Optional[Session] = None
 ) -> None:
     """
-    Log security-related events.
+    Record a security-related event in the audit trail (and the security log).
+
+    Only queues the event; the audit writer thread stores and logs it.
 
     Args:
         event_type: Type of security event (login, logout, registration, etc.)
@@ -76,33 +83,27 @@ def log_security_event(
         user_id: User's ID
         success: Whether the event was successful
         details: Additional details about the event
+        session: Record the event only once this session commits
     """
-    status = "SUCCESS" if success else "FAILED"
-    message = f"{event_type.upper()} - {status}"
-
-    if user_email:
-        message += f" - User: {user_email}"
-    if user_id:
-        message += f" - ID: {user_id}"
-    if details:
-        message += f" - Details: {details}"
-
-    if success:
-        security_logger.info(message)
-    else:
-        security_logger.warning(message)
+    record_audit_event(audit_event(
+        SECURITY, event_type, success, user_email=user_email, user_id=user_id, details=details
+    ), session)
 
 
 def log_transaction(
     transaction_type: str,
     user_id: int,
-    amount: float,
+    amount: Decimal,
     transaction_id: Optional[int] = None,
     status: str = "completed",
-    details: Optional[str] = None
+    details: Optional[str] = None,
+    performed_by_id: Optional[int] = None,
+    session: Optional[Session] = None
 ) -> None:
     """
-    Log financial transactions.
+    Record a financial transaction in the audit trail (and the transactions log).
+
+    Only queues the event; the audit writer thread stores and logs it.
 
     Args:
         transaction_type: Type of transaction (deposit, withdrawal, trade, etc.)
@@ -111,15 +112,13 @@ def log_transaction(
         transaction_id: Transaction ID
         status: Transaction status
         details: Additional details
+        performed_by_id: ID of the staff member who made the posting
+        session: Record the event only once this session commits (ledger postings)
     """
-    message = f"TRANSACTION - {transaction_type.upper()} - User ID: {user_id} - Amount: {amount} - Status: {status}"
-
-    if transaction_id:
-        message += f" - TX ID: {transaction_id}"
-    if details:
-        message += f" - Details: {details}"
-
-    transaction_logger.info(message)
+    record_audit_event(audit_event(
+        TRANSACTION, transaction_type, status == "completed", user_id=user_id, actor_id=performed_by_id,
+        transaction_id=transaction_id, amount=amount, details=details
+    ), session)
 
 
 def log_api_request(
@@ -1,9 +1,11 @@
 import logging
+import threading
 import time
 from functools import wraps
-from typing import Callable
-import psutil
+from typing import Callable, Optional
 import os
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 logger = logging.getLogger(__name__)
 
@@ -43,9 +45,131 @@ def monitor_performance(func: Callable) -> Callable:
 
 def get_system_metrics():
     """Get current system metrics."""
+    import psutil  # imported on first use to keep app startup fast
+
     return {
         'cpu_percent': psutil.cpu_percent(interval=1),
         'memory_percent': psutil.virtual_memory().percent,
         'disk_percent': psutil.disk_usage('/').percent,
         'process_count': len(psutil.pids()),
     }
+
+
+class PoolMetrics:
+    """Connection-pool counters and a checkout wait-time histogram."""
+
+    # Upper bounds (ms) of the wait-time histogram buckets; the last bucket is open-ended
+    WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.checkout_timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        wait_ms = seconds * 1000
+        index = len(self.WAIT_BUCKETS_MS)
+        for i, bound in enumerate(self.WAIT_BUCKETS_MS):
+            if wait_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self.wait_buckets[index] += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self, pool=None) -> dict:
+        """Return counters plus live gauges from the pool, if given."""
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            labels = [f"le_{bound}ms" for bound in self.WAIT_BUCKETS_MS] + ["inf"]
+            stats = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_ms": {
+                    "count": waits,
+                    "avg": round(self.wait_total_ms / waits, 3) if waits else 0.0,
+                    "max": round(self.wait_max_ms, 3),
+                    "histogram": dict(zip(labels, self.wait_buckets)),
+                },
+            }
+
+        if pool is not None:
+            stats["pool_class"] = type(pool).__name__
+            # Gauges only exist on sized pools (QueuePool and its async variant)
+            for gauge in ("size", "checkedout", "checkedin", "overflow"):
+                if hasattr(pool, gauge):
+                    stats[gauge] = getattr(pool, gauge)()
+            if hasattr(pool, "_max_overflow"):
+                stats["max_overflow"] = pool._max_overflow
+        return stats
+
+
+class CheckoutTimingMixin:
+    """Pool mixin that records how long each checkout waited for a connection."""
+
+    pool_metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            if self.pool_metrics is not None:
+                self.pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.pool_metrics is not None:
+            self.pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep reporting into the same metrics
+        pool = super().recreate()
+        pool.pool_metrics = self.pool_metrics
+        return pool
+
+
+def instrument_engine(engine, metrics: PoolMetrics) -> PoolMetrics:
+    """Attach pool event listeners (and checkout timing, if supported) to an engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.increment("connects")
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.increment("checkouts")
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.increment("checkins")
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.increment("invalidations")
+
+    @event.listens_for(sync_engine, "soft_invalidate")
+    def on_soft_invalidate(dbapi_connection, connection_record, exception):
+        metrics.increment("soft_invalidations")
+
+    if isinstance(sync_engine.pool, CheckoutTimingMixin):
+        sync_engine.pool.pool_metrics = metrics
+    return metrics
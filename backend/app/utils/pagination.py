@@ -0,0 +1,76 @@
+"""
+Keyset (cursor) pagination on (created_at, id), newest first.
+
+A page is `WHERE (created_at, id) < (:last_created_at, :last_id) ORDER BY
+created_at DESC, id DESC LIMIT n`, which an index ending in (created_at, id)
+answers by seeking straight to the cursor, so every page costs the same no
+matter how deep it is. Cursors are opaque URL-safe tokens; clients pass back
+the `X-Next-Cursor` response header to get the following page.
+
+SQLite stores timestamps as text and compares them as text, so there the
+cursor carries the stored string verbatim rather than a parsed datetime.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, tuple_, type_coerce
+from sqlalchemy.sql import ColumnElement, Select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 200
+
+
+def cursor_key(created_column: ColumnElement) -> ColumnElement:
+    """Select this next to each row; it is what the row's cursor is built from."""
+    return type_coerce(created_column, String).label("cursor_key")
+
+
+def encode_cursor(created, row_id: int) -> str:
+    if isinstance(created, datetime):
+        created = created.isoformat()
+    raw = json.dumps([created, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        created, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(created, str) or not isinstance(row_id, int):
+            raise ValueError(cursor)
+        return created, row_id
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def paginate(
+    query: Select,
+    created_column: ColumnElement,
+    id_column: ColumnElement,
+    cursor: Optional[str],
+    limit: int,
+    dialect: str,
+) -> Select:
+    """Restrict `query` to the page after `cursor`; fetches one extra row to detect the end."""
+    if cursor:
+        created, row_id = decode_cursor(cursor)
+        if dialect == "sqlite":
+            position = tuple_(type_coerce(created_column, String), id_column) < tuple_(created, row_id)
+        else:
+            try:
+                position = tuple_(created_column, id_column) < tuple_(datetime.fromisoformat(created), row_id)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        query = query.where(position)
+    return query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    """Rows of this page and the cursor for the next one (None on the last page)."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.cursor_key, last[0].id)
@@ -0,0 +1,128 @@
+"""
+Memory-mapped Bloom filter of breached passwords.
+
+The filter stores SHA-1 digests (the format breach corpora are published in),
+so it can be built from either plain-text passwords or SHA-1 hex lists. The
+file is mmap'd on first use: nothing is read at startup, pages are loaded by
+the OS on demand, and every worker process shares them. A lookup is k bit
+probes (~1-2 us). False positives occur at the configured rate; there are
+no false negatives.
+
+File layout (little endian): 8-byte magic, uint64 bit count m, uint32 hash
+count k, uint64 item count, then m bits.
+"""
+import hashlib
+import math
+import mmap
+import struct
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+from app.config import settings
+from app.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"PWBLOOM1"
+_HEADER = struct.Struct("<8sQIQ")
+
+
+def password_digest(password: str) -> bytes:
+    return hashlib.sha1(password.encode("utf-8")).digest()
+
+
+def _probes(digest: bytes, bits: int, hashes: int):
+    # Kirsch-Mitzenmacher double hashing over the 160-bit digest
+    h1, h2 = struct.unpack_from("<QQ", digest)
+    h2 |= 1
+    for i in range(hashes):
+        yield (h1 + i * h2) % bits
+
+
+def optimal_parameters(items: int, fp_rate: float):
+    """Bit count and hash count for `items` entries at false-positive rate `fp_rate`."""
+    items = max(items, 1)
+    bits = max(64, math.ceil(-items * math.log(fp_rate) / (math.log(2) ** 2)))
+    bits = (bits + 7) // 8 * 8
+    hashes = max(1, round(bits / items * math.log(2)))
+    return bits, hashes
+
+
+class BloomFilter:
+    """Read-only view of a filter file."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bits, self.hashes, self.items = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a breached-password filter")
+        self._offset = _HEADER.size
+
+    def contains_digest(self, digest: bytes) -> bool:
+        data, offset = self._mmap, self._offset
+        for bit in _probes(digest, self.bits, self.hashes):
+            if not data[offset + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains_digest(password_digest(password))
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def build_filter(digests: Iterable[bytes], items: int, path: str, fp_rate: float = 0.001) -> int:
+    """Write a filter sized for `items` entries; returns how many digests were added."""
+    bits, hashes = optimal_parameters(items, fp_rate)
+    array = bytearray(bits // 8)
+    added = 0
+    for digest in digests:
+        for bit in _probes(digest, bits, hashes):
+            array[bit >> 3] |= 1 << (bit & 7)
+        added += 1
+
+    tmp = Path(f"{path}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, bits, hashes, added))
+        f.write(array)
+    tmp.replace(path)  # workers never see a half-written file
+    return added
+
+
+_filter: Optional[BloomFilter] = None
+_filter_loaded = False
+_filter_lock = threading.Lock()
+
+
+def get_breached_password_filter() -> Optional[BloomFilter]:
+    """The filter at BREACHED_PASSWORDS_FILTER, mapped on first use (None if not configured)."""
+    global _filter, _filter_loaded
+    if not _filter_loaded:
+        with _filter_lock:
+            if not _filter_loaded:
+                path = settings.BREACHED_PASSWORDS_FILTER
+                if path:
+                    try:
+                        _filter = BloomFilter(path)
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Breached password filter unavailable: {e}")
+                _filter_loaded = True
+    return _filter
+
+
+def reset_breached_password_filter() -> None:
+    """Forget the mapped filter so the next check reloads it (e.g. after rebuilding the file)."""
+    global _filter, _filter_loaded
+    with _filter_lock:
+        if _filter is not None:
+            _filter.close()
+        _filter, _filter_loaded = None, False
+
+
+def is_breached(password: str) -> bool:
+    breached = get_breached_password_filter()
+    return breached is not None and password in breached
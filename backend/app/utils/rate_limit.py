@@ -0,0 +1,225 @@
+"""
+Shared rate limiting and failed-login lockout.
+
+Limits are sliding windows kept in a pluggable store: Redis (RATE_LIMIT_BACKEND=
+redis, using REDIS_URL) so every worker and restart sees the same counts, or an
+in-process store for single-worker development and tests. Redis operations
+are Lua scripts, so each check-and-record is atomic across workers.
+"""
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds until the next hit would be allowed (0 when allowed)
+
+
+class RateLimitBackend(ABC):
+    """Storage interface for sliding-window limits and expiring counters."""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float) -> RateLimitResult:
+        """Record one hit unless `limit` hits already fall within the last `window` seconds."""
+
+    @abstractmethod
+    async def incr(self, key: str, ttl: float) -> int:
+        """Increment a counter that expires `ttl` seconds after its first increment."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Tuple[int, float]:
+        """Current counter value and its remaining time to live."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def reset(self) -> None:
+        """Forget every limit and counter (tests only)."""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """In-process store: per-worker state, lost on restart. For development and tests."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._windows: Dict[str, deque] = {}
+        self._counters: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()  # never held across an await
+
+    async def hit(self, key: str, limit: int, window: float) -> RateLimitResult:
+        with self._lock:
+            now = self._clock()
+            hits = self._windows.setdefault(key, deque())
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return RateLimitResult(False, 0, hits[0] + window - now)
+            hits.append(now)
+            return RateLimitResult(True, limit - len(hits), 0.0)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        with self._lock:
+            now = self._clock()
+            count, expires_at = self._counters.get(key, (0, 0.0))
+            if expires_at <= now:
+                count, expires_at = 0, now + ttl
+            self._counters[key] = (count + 1, expires_at)
+            return count + 1
+
+    async def get(self, key: str) -> Tuple[int, float]:
+        with self._lock:
+            count, expires_at = self._counters.get(key, (0, 0.0))
+            remaining = expires_at - self._clock()
+            return (count, remaining) if remaining > 0 else (0, 0.0)
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+            self._windows.pop(key, None)
+
+    async def reset(self) -> None:
+        with self._lock:
+            self._windows.clear()
+            self._counters.clear()
+
+
+# Sliding window log in a sorted set, timed by the Redis server clock.
+# KEYS[1]: window key; ARGV: window_ms, limit, unique member
+_SLIDING_WINDOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {1, limit - count - 1, 0}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, 0, tonumber(oldest[2]) + window - now}
+"""
+
+# KEYS[1]: counter key; ARGV[1]: ttl_ms
+_EXPIRING_COUNTER_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Redis store shared by all workers."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis  # optional dependency, only needed for this backend
+
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+        self._sliding_window = self._redis.register_script(_SLIDING_WINDOW_SCRIPT)
+        self._counter = self._redis.register_script(_EXPIRING_COUNTER_SCRIPT)
+
+    async def hit(self, key: str, limit: int, window: float) -> RateLimitResult:
+        allowed, remaining, retry_after_ms = await self._sliding_window(
+            keys=[self._prefix + key], args=[int(window * 1000), limit, uuid.uuid4().hex]
+        )
+        return RateLimitResult(bool(allowed), int(remaining), int(retry_after_ms) / 1000)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        return int(await self._counter(keys=[self._prefix + key], args=[int(ttl * 1000)]))
+
+    async def get(self, key: str) -> Tuple[int, float]:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            value, ttl_ms = await pipe.get(self._prefix + key).pttl(self._prefix + key).execute()
+        if value is None or ttl_ms <= 0:
+            return 0, 0.0
+        return int(value), ttl_ms / 1000
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self._prefix + key)
+
+    async def reset(self) -> None:
+        async for key in self._redis.scan_iter(match=self._prefix + "*"):
+            await self._redis.delete(key)
+
+
+_backend: Optional[RateLimitBackend] = None
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """The configured store, created on first use."""
+    global _backend
+    if _backend is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            _backend = RedisRateLimitBackend(settings.REDIS_URL)
+        else:
+            _backend = MemoryRateLimitBackend()
+    return _backend
+
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    """Replace the store (tests, or custom deployments)."""
+    global _backend
+    _backend = backend
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(scope: str, limit: int, window: float, key_func: Callable[[Request], str] = client_ip):
+    """
+    Dependency allowing `limit` requests per `window` seconds for each key
+    (the client address by default), shared across workers.
+    """
+    async def limiter(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        result = await get_rate_limit_backend().hit(f"{scope}:{key_func(request)}", limit, window)
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded. Please try again later.",
+                headers={"Retry-After": str(max(1, int(result.retry_after + 0.999)))}
+            )
+    return limiter
+
+
+def _lockout_key(email: str) -> str:
+    return f"login-failures:{email.strip().lower()}"
+
+
+async def check_login_lockout(email: str) -> None:
+    """Reject logins for an account with too many recent failures."""
+    failures, ttl = await get_rate_limit_backend().get(_lockout_key(email))
+    if failures >= settings.LOGIN_LOCKOUT_THRESHOLD:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts. Please try again later.",
+            headers={"Retry-After": str(max(1, int(ttl + 0.999)))}
+        )
+
+
+async def record_login_failure(email: str) -> int:
+    """Count a failed login; the count resets LOGIN_LOCKOUT_SECONDS after the first failure."""
+    return await get_rate_limit_backend().incr(_lockout_key(email), settings.LOGIN_LOCKOUT_SECONDS)
+
+
+async def clear_login_failures(email: str) -> None:
+    await get_rate_limit_backend().delete(_lockout_key(email))
@@ -2,12 +2,19 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from app.config import settings
-import secrets
+from app.utils.cache import TTLCache
+from app.utils.password_filter import is_breached
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import hashlib
 import re
+import threading
+import time
 from typing import Optional, Tuple
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context. Hashes made with another cost are flagged by
+# verify_and_update so they can be upgraded on the next successful login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -20,19 +27,82 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one uses an outdated cost."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# Dedicated executor for bcrypt so logins never block the event loop
+_hash_executor: Optional[Executor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def _get_hash_executor() -> Optional[Executor]:
+    global _hash_executor
+    if settings.PASSWORD_HASH_EXECUTOR == "inline":
+        return None
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            if settings.PASSWORD_HASH_EXECUTOR == "process":
+                _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+            else:
+                _hash_executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix="password-hash"
+                )
+        return _hash_executor
+
+
+async def _run_hashing(fn, *args):
+    executor = _get_hash_executor()
+    if executor is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    """get_password_hash on the password hashing executor."""
+    return await _run_hashing(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password on the password hashing executor."""
+    return await _run_hashing(verify_and_update_password, plain_password, hashed_password)
+
+
+def shutdown_hash_executor() -> None:
+    """Stop the password hashing workers (called on app shutdown)."""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
+
+# Always rejected, even without a breached-password filter file
+COMMON_PASSWORDS = frozenset({
+    "password123", "admin123", "welcome123", "qwerty12345",
+    "123456789012", "letmein12345", "password12345"
+})
+
+
 def validate_password_strength(password: str) -> Tuple[bool, str]:
     """
     Validate password meets security requirements.
     Returns: (is_valid, error_message)
     
     Requirements:
+    - Not a common password
     - At least 12 characters long
     - At least one lowercase letter
     - At least one uppercase letter
     - At least one digit
     - At least one special character
-    - Not a common password
+    - Not in the breached-password filter (BREACHED_PASSWORDS_FILTER)
     """
+    if password.lower() in COMMON_PASSWORDS:
+        return False, "Password is too common. Please choose a stronger password"
+
     if len(password) < 12:
         return False, "Password must be at least 12 characters long"
     
@@ -47,18 +117,23 @@ def validate_password_strength(password: str) -> Tuple[bool, str]:
     
     if not re.search(r"[!@#$%^&*(),.?\":{}|<>_\-+=\[\]]", password):
         return False, "Password must contain at least one special character"
-    
-    # Check for common passwords
-    common_passwords = [
-        "password123", "admin123", "welcome123", "qwerty12345",
-        "123456789012", "letmein12345", "password12345"
-    ]
-    if password.lower() in common_passwords:
-        return False, "Password is too common. Please choose a stronger password"
+
+    if is_breached(password):
+        return False, "Password has appeared in a data breach. Please choose a different password"
     
     return True, ""
 
 
+def access_token_claims(user) -> dict:
+    """Claims signed into a user's access token (enough to authorize without the users table)."""
+    return {
+        "user_id": user.id,
+        "email": user.email,
+        "role": user.role.value,
+        "branch_id": user.branch_id
+    }
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
@@ -71,7 +146,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({
         "exp": expire,
         "type": "access",
-        "iat": datetime.utcnow()
+        "iat": datetime.utcnow(),
+        "iat_precise": time.time()  # iat is whole seconds; revocation checks need sub-second order
     })
     
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -97,17 +173,40 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     return encoded_jwt
 
 
+# sha256(token) -> verified payload. Entries expire with the token's own `exp`
+# (capped at TOKEN_CACHE_TTL); only successful verifications are cached.
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
 def decode_token(token: str) -> Optional[dict]:
     """Decode and validate JWT token."""
+    digest = _token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
 
+    exp = payload.get("exp")
+    if exp is not None:
+        # Translate the wall-clock expiry onto the cache's monotonic clock
+        token_cache.set(digest, payload, expires_at=time.monotonic() + (exp - time.time()))
+    return dict(payload)
+
+
+def forget_token(token: str) -> None:
+    """Drop a token from the verified-token cache."""
+    token_cache.pop(_token_digest(token))
+
+
+def forget_user_tokens(user_id: int) -> None:
+    """Drop every cached token of a user (on revocation)."""
+    token_cache.pop_matching(lambda payload: payload.get("user_id") == user_id)
 
-def generate_account_number() -> str:
-    """Generate a unique account number."""
-    # Generate format: ACC-XXXXX where X is a random digit
-    random_number = secrets.randbelow(90000) + 10000  # Generates 10000-99999
-    return f"ACC-{random_number}"
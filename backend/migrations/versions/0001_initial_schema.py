@@ -0,0 +1,209 @@
+"""Initial schema
+
+Baseline matching the tables previously created by Base.metadata.create_all.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('branches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('code', sa.String(), nullable=False),
+    sa.Column('referral_code', sa.String(), nullable=False),
+    sa.Column('leverage', sa.Integer(), nullable=True),
+    sa.Column('commission_per_lot', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('admin_email', sa.String(), nullable=False),
+    sa.Column('admin_name', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('admin_email')
+    )
+    op.create_index(op.f('ix_branches_code'), 'branches', ['code'], unique=True)
+    op.create_index(op.f('ix_branches_id'), 'branches', ['id'], unique=False)
+    op.create_index(op.f('ix_branches_referral_code'), 'branches', ['referral_code'], unique=True)
+
+    op.create_table('product_spreads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('base_spread', sa.Numeric(precision=10, scale=5), nullable=True),
+    sa.Column('extra_spread', sa.Numeric(precision=10, scale=5), nullable=True),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_spreads_id'), 'product_spreads', ['id'], unique=False)
+    op.create_index(op.f('ix_product_spreads_symbol'), 'product_spreads', ['symbol'], unique=True)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('phone', sa.String(), nullable=True),
+    sa.Column('role', sa.Enum('MANAGER', 'ADMIN', 'CLIENT', name='userrole'), nullable=False),
+    sa.Column('account_type', sa.Enum('STANDARD', 'BUSINESS', name='accounttype'), nullable=True),
+    sa.Column('account_number', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('branch_id', sa.Integer(), nullable=True),
+    sa.Column('admin_balance', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('referral_code', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_login', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_number')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table('accounts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('account_number', sa.String(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('wallet_balance', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('trading_balance', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('leverage', sa.Integer(), nullable=True),
+    sa.Column('currency', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('ACTIVE', 'INACTIVE', 'SUSPENDED', 'CLOSED', name='accountstatus'), nullable=True),
+    sa.Column('mt_login', sa.String(), nullable=True),
+    sa.Column('mt_server', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_activity', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('mt_login')
+    )
+    op.create_index(op.f('ix_accounts_account_number'), 'accounts', ['account_number'], unique=True)
+    op.create_index(op.f('ix_accounts_id'), 'accounts', ['id'], unique=False)
+
+    op.create_table('trades',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('symbol', sa.String(), nullable=False),
+    sa.Column('trade_type', sa.Enum('BUY', 'SELL', name='tradetype'), nullable=False),
+    sa.Column('order_type', sa.Enum('MARKET', 'LIMIT', 'STOP', name='ordertype'), nullable=False),
+    sa.Column('lots', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('open_price', sa.Numeric(precision=20, scale=5), nullable=False),
+    sa.Column('close_price', sa.Numeric(precision=20, scale=5), nullable=True),
+    sa.Column('stop_loss', sa.Numeric(precision=20, scale=5), nullable=True),
+    sa.Column('take_profit', sa.Numeric(precision=20, scale=5), nullable=True),
+    sa.Column('profit_loss', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('commission', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('swap', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'OPEN', 'CLOSED', 'CANCELLED', name='tradestatus'), nullable=True),
+    sa.Column('mt_ticket', sa.String(), nullable=True),
+    sa.Column('mt_magic', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('opened_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('mt_ticket')
+    )
+    op.create_index(op.f('ix_trades_id'), 'trades', ['id'], unique=False)
+    op.create_index(op.f('ix_trades_symbol'), 'trades', ['symbol'], unique=False)
+
+    op.create_table('transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('transaction_type', sa.Enum('DEPOSIT', 'WITHDRAW', 'TRANSFER', 'TRADE_PROFIT', 'TRADE_LOSS', 'COMMISSION', 'BONUS', 'ADJUSTMENT', name='transactiontype'), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('balance_before', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('balance_after', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('reference', sa.String(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'COMPLETED', 'FAILED', 'CANCELLED', name='transactionstatus'), nullable=True),
+    sa.Column('from_user_id', sa.Integer(), nullable=True),
+    sa.Column('to_user_id', sa.Integer(), nullable=True),
+    sa.Column('performed_by_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.ForeignKeyConstraint(['from_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['performed_by_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['to_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reference')
+    )
+    op.create_index(op.f('ix_transactions_id'), 'transactions', ['id'], unique=False)
+
+    op.create_table('transaction_requests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('request_type', sa.Enum('DEPOSIT', 'WITHDRAWAL', name='requesttype'), nullable=False),
+    sa.Column('requested_amount', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('approved_amount', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'APPROVED', 'REJECTED', 'CANCELLED', name='requeststatus'), nullable=True),
+    sa.Column('client_notes', sa.Text(), nullable=True),
+    sa.Column('admin_notes', sa.Text(), nullable=True),
+    sa.Column('approved_by_id', sa.Integer(), nullable=True),
+    sa.Column('approved_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('transaction_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['approved_by_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transaction_requests_id'), 'transaction_requests', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_transaction_requests_id'), table_name='transaction_requests')
+    op.drop_table('transaction_requests')
+    op.drop_index(op.f('ix_transactions_id'), table_name='transactions')
+    op.drop_table('transactions')
+    op.drop_index(op.f('ix_trades_symbol'), table_name='trades')
+    op.drop_index(op.f('ix_trades_id'), table_name='trades')
+    op.drop_table('trades')
+    op.drop_index(op.f('ix_accounts_id'), table_name='accounts')
+    op.drop_index(op.f('ix_accounts_account_number'), table_name='accounts')
+    op.drop_table('accounts')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_product_spreads_symbol'), table_name='product_spreads')
+    op.drop_index(op.f('ix_product_spreads_id'), table_name='product_spreads')
+    op.drop_table('product_spreads')
+    op.drop_index(op.f('ix_branches_referral_code'), table_name='branches')
+    op.drop_index(op.f('ix_branches_id'), table_name='branches')
+    op.drop_index(op.f('ix_branches_code'), table_name='branches')
+    op.drop_table('branches')
+
+    # PostgreSQL keeps enum types after their tables are dropped
+    for enum_name in (
+        "userrole", "accounttype", "accountstatus", "tradetype", "ordertype",
+        "tradestatus", "transactiontype", "transactionstatus", "requesttype", "requeststatus",
+    ):
+        sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,43 @@
+"""Hot query indexes
+
+Composite indexes for the filters the API runs on every request: account
+lookup by owner, per-user history ordered by time, the approval queue,
+client listings per branch and open trades per user.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_accounts_user_id", "accounts", ["user_id"]),
+    ("ix_transactions_user_id_created_at", "transactions", ["user_id", "created_at"]),
+    ("ix_transaction_requests_status_created_at", "transaction_requests", ["status", "created_at"]),
+    ("ix_users_role_branch_id", "users", ["role", "branch_id"]),
+    ("ix_trades_user_id_status", "trades", ["user_id", "status"]),
+]
+
+
+def upgrade() -> None:
+    # Build without blocking writes on PostgreSQL (CONCURRENTLY cannot run in a transaction)
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
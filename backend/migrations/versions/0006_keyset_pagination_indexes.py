@@ -0,0 +1,54 @@
+"""Keyset pagination indexes
+
+Transaction history and request listings page on (created_at, id); extend
+the hot query indexes with `id` so each page is a single index seek, and add
+the filtered variants the list endpoints accept.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_transactions_user_id_created_at_id", "transactions", ["user_id", "created_at", "id"]),
+    ("ix_transactions_user_id_type_created_at_id", "transactions",
+     ["user_id", "transaction_type", "created_at", "id"]),
+    ("ix_transaction_requests_status_created_at_id", "transaction_requests", ["status", "created_at", "id"]),
+    ("ix_transaction_requests_user_id_created_at_id", "transaction_requests", ["user_id", "created_at", "id"]),
+    ("ix_transaction_requests_created_at_id", "transaction_requests", ["created_at", "id"]),
+]
+
+# Superseded by the (…, created_at, id) indexes above
+REPLACED = [
+    ("ix_transactions_user_id_created_at", "transactions", ["user_id", "created_at"]),
+    ("ix_transaction_requests_status_created_at", "transaction_requests", ["status", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    # Build without blocking writes on PostgreSQL (CONCURRENTLY cannot run in a transaction)
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for name, table, _ in REPLACED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,83 @@
+"""Balance history
+
+Periodic per-account balance snapshots, the signed per-column deltas on
+transactions that are replayed between them (backfilled for existing
+deposits, withdrawals and transfers), and the (account_id, id) index that
+replay reads.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('transactions', sa.Column('wallet_delta', sa.Numeric(precision=15, scale=2), nullable=True))
+    op.add_column('transactions', sa.Column('trading_delta', sa.Numeric(precision=15, scale=2), nullable=True))
+    # Existing account postings moved the column their type posts to
+    transactions = sa.table(
+        'transactions',
+        sa.column('account_id', sa.Integer()),
+        sa.column('transaction_type', sa.Enum('DEPOSIT', 'WITHDRAW', 'TRANSFER', name='transactiontype')),
+        sa.column('amount', sa.Numeric(precision=15, scale=2)),
+        sa.column('wallet_delta', sa.Numeric(precision=15, scale=2)),
+        sa.column('trading_delta', sa.Numeric(precision=15, scale=2)),
+    )
+    for transaction_type, wallet, trading in (
+        ('DEPOSIT', None, transactions.c.amount),
+        ('WITHDRAW', -transactions.c.amount, None),
+        ('TRANSFER', transactions.c.amount, -transactions.c.amount),
+    ):
+        op.execute(
+            transactions.update()
+            .where(
+                transactions.c.account_id.isnot(None),
+                transactions.c.transaction_type == transaction_type,
+            )
+            .values(wallet_delta=wallet, trading_delta=trading)
+        )
+    op.create_table(
+        'balance_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('balance', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('wallet_balance', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('trading_balance', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('last_transaction_id', sa.Integer(), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_balance_history_id'), 'balance_history', ['id'], unique=False)
+    op.create_index(
+        'ix_balance_history_account_id_recorded_at', 'balance_history', ['account_id', 'recorded_at'], unique=False
+    )
+    # transactions is large: build without blocking writes on PostgreSQL
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_account_id_id', 'transactions', ['account_id', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_transactions_account_id_id', table_name='transactions', postgresql_concurrently=True)
+    op.drop_index('ix_balance_history_account_id_recorded_at', table_name='balance_history')
+    op.drop_index(op.f('ix_balance_history_id'), table_name='balance_history')
+    op.drop_table('balance_history')
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.drop_column('trading_delta')
+        batch_op.drop_column('wallet_delta')
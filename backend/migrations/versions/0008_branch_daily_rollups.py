@@ -0,0 +1,55 @@
+"""Branch daily rollups
+
+Per-branch, per-day totals of ledger postings by transaction type, kept up
+to date by every posting. Fill in history with
+`python -m app.cli backfill-rollups` after upgrading.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'branch_daily_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('branch_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column(
+            'transaction_type',
+            # The transactiontype enum already exists (transactions.transaction_type)
+            postgresql.ENUM(
+                'DEPOSIT', 'WITHDRAW', 'TRANSFER', 'TRADE_PROFIT', 'TRADE_LOSS', 'COMMISSION', 'BONUS', 'ADJUSTMENT',
+                name='transactiontype', create_type=False
+            ),
+            nullable=False
+        ),
+        sa.Column('admin_balance', sa.Boolean(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'uq_branch_daily_rollups_day_branch_type', 'branch_daily_rollups',
+        ['day', 'branch_id', 'transaction_type', 'admin_balance'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_branch_daily_rollups_day_branch_type', table_name='branch_daily_rollups')
+    op.drop_table('branch_daily_rollups')
@@ -0,0 +1,74 @@
+"""Audit events
+
+Append-only audit trail written in batches by the audit sink. A trigger
+rejects UPDATE and DELETE on it.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('category', sa.String(length=20), nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('success', sa.Boolean(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('user_email', sa.String(), nullable=True),
+        sa.Column('actor_id', sa.Integer(), nullable=True),
+        sa.Column('transaction_id', sa.Integer(), nullable=True),
+        sa.Column('amount', sa.Numeric(precision=15, scale=2), nullable=True),
+        sa.Column('details', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_audit_events_user_id_occurred_at', 'audit_events', ['user_id', 'occurred_at'], unique=False
+    )
+
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute("""
+            CREATE FUNCTION audit_events_append_only() RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'audit_events is append-only';
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute("""
+            CREATE TRIGGER audit_events_append_only BEFORE UPDATE OR DELETE ON audit_events
+            FOR EACH ROW EXECUTE FUNCTION audit_events_append_only()
+        """)
+    else:
+        for action in ('UPDATE', 'DELETE'):
+            op.execute(f"""
+                CREATE TRIGGER audit_events_no_{action.lower()} BEFORE {action} ON audit_events
+                BEGIN
+                    SELECT RAISE(ABORT, 'audit_events is append-only');
+                END
+            """)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER audit_events_append_only ON audit_events")
+        op.execute("DROP FUNCTION audit_events_append_only()")
+    else:
+        for action in ('update', 'delete'):
+            op.execute(f"DROP TRIGGER audit_events_no_{action}")
+    op.drop_index('ix_audit_events_user_id_occurred_at', table_name='audit_events')
+    op.drop_table('audit_events')
@@ -0,0 +1,37 @@
+"""Transaction request claims
+
+Lease columns for the approval work queue: who has claimed a pending
+request, and until when.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('transaction_requests') as batch_op:
+        batch_op.add_column(sa.Column('claimed_by_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('claim_expires_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_transaction_requests_claimed_by_id_users', 'users', ['claimed_by_id'], ['id']
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('transaction_requests') as batch_op:
+        batch_op.drop_constraint('fk_transaction_requests_claimed_by_id_users', type_='foreignkey')
+        batch_op.drop_column('claim_expires_at')
+        batch_op.drop_column('claimed_by_id')
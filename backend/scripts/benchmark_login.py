@@ -0,0 +1,97 @@
+"""
+Login storm benchmark.
+
+Fires concurrent logins at an in-process app while a probe polls /health,
+and reports login throughput plus the probe's latency, once per password
+hashing executor. With PASSWORD_HASH_EXECUTOR=inline, bcrypt runs on the
+event loop and the probe stalls behind every login.
+
+Usage:
+    python scripts/benchmark_login.py --logins 40 --modes inline thread process
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+PASSWORD = "StormPassword123!"
+
+
+async def _probe(http, stop: asyncio.Event, latencies: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await http.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+
+
+async def storm(app, logins: int) -> dict:
+    import httpx
+
+    latencies = []
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+        probe = asyncio.create_task(_probe(http, stop, latencies))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            http.post("/api/auth/login", json={"email": "storm@example.com", "password": PASSWORD})
+            for _ in range(logins)
+        ])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    failures = sum(1 for r in responses if r.status_code != 200)
+    return {
+        "logins_per_s": round(logins / elapsed, 1),
+        "failures": failures,
+        "probe_p50_ms": round(statistics.median(latencies), 2),
+        "probe_max_ms": round(max(latencies), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login storm benchmark")
+    parser.add_argument("--logins", type=int, default=40, help="Concurrent login requests")
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+    os.environ.setdefault("ADMIN_PASSWORD", "unused")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    os.environ["DEBUG"] = "false"
+
+    from app.config import settings
+    from app.database import SessionLocal
+    from app.init_db import run_migrations
+    from app.main import create_app
+    from app.models import User, UserRole
+    from app.utils.security import get_password_hash, shutdown_hash_executor
+
+    run_migrations()
+    with SessionLocal() as db:
+        db.add(User(
+            email="storm@example.com", name="Storm", role=UserRole.CLIENT,
+            hashed_password=get_password_hash(PASSWORD)
+        ))
+        db.commit()
+
+    settings.RATE_LIMIT_ENABLED = False  # measure hashing, not the rate limit
+    app = create_app()
+    for mode in args.modes:
+        settings.PASSWORD_HASH_EXECUTOR = mode
+        results = asyncio.run(storm(app, args.logins))
+        shutdown_hash_executor()
+        print(f"{mode:>8}: " + "  ".join(f"{k}={v}" for k, v in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Concurrent latency benchmark for the API.
+
+Fires N concurrent clients at an endpoint and reports latency percentiles.
+Run once with DB_ASYNC=false and once with DB_ASYNC=true to compare the
+threadpool and asyncio database paths.
+
+Usage:
+    python scripts/load_test.py --url http://localhost:8000/api/accounts/me \
+        --token <access token> --clients 500 --requests 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def _client(http: httpx.AsyncClient, url: str, headers: dict, count: int, latencies: list, errors: list):
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            response = await http.get(url, headers=headers)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(url: str, token: str, clients: int, requests: int) -> dict:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            _client(http, url, headers, requests, latencies, errors)
+            for _ in range(clients)
+        ])
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API latency benchmark")
+    parser.add_argument("--url", required=True, help="Endpoint URL to benchmark")
+    parser.add_argument("--token", default="", help="Bearer access token")
+    parser.add_argument("--clients", type=int, default=500, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.url, args.token, args.clients, args.requests))
+    for key, value in results.items():
+        print(f"{key:>15}: {value}")
+
+
+if __name__ == "__main__":
+    main()
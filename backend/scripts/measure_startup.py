@@ -0,0 +1,63 @@
+"""
+Cold start benchmark: import-to-first-response time of a fresh worker.
+
+Each run spawns a new interpreter (so no module is cached), imports the app,
+runs the lifespan startup and serves GET /health in-process. Compare with
+MIGRATE_ON_STARTUP=true to see the cost of owning the schema at boot.
+
+Usage:
+    python scripts/measure_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+from app.main import create_app
+from fastapi.testclient import TestClient
+imported = time.perf_counter()
+with TestClient(create_app()) as client:
+    status = client.get("/health").status_code
+    first_response = time.perf_counter()
+print(json.dumps({
+    "status": status,
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (first_response - start) * 1000,
+}))
+"""
+
+
+def measure_once(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import-to-first-response benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--migrate", action="store_true", help="Set MIGRATE_ON_STARTUP=true")
+    args = parser.parse_args()
+
+    env = dict(os.environ, MIGRATE_ON_STARTUP=str(args.migrate).lower())
+    runs = [measure_once(env) for _ in range(args.runs)]
+    if any(run["status"] != 200 for run in runs):
+        sys.exit(f"/health did not return 200: {runs}")
+
+    for key in ("import_ms", "first_response_ms"):
+        values = [run[key] for run in runs]
+        print(f"{key:>18}: median {statistics.median(values):.1f}  min {min(values):.1f}  max {max(values):.1f}")
+
+
+if __name__ == "__main__":
+    main()
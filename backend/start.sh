@@ -27,7 +27,7 @@ fi
 
 # Check if database is initialized
 echo "🔍 Checking database..."
-python -c "from app.database import engine; from app.models import Base; Base.metadata.create_all(bind=engine)" 2>/dev/null
+python -m app.cli migrate
 
 if [ $? -eq 0 ]; then
     echo "✅ Database ready"
@@ -44,4 +44,4 @@ echo ""
 echo "Press CTRL+C to stop the server"
 echo ""
 
-uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
+uvicorn app.main:create_app --factory --reload --host 0.0.0.0 --port 8000
@@ -3,7 +3,14 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.database import Base, get_db
+from app.config import settings
+from app.database import Base, get_db, get_read_db, ThreadedSession
+from app.middleware.auth import principal_cache, revocation_list
+from app.utils.security import token_cache
+from app.utils.rate_limit import MemoryRateLimitBackend, set_rate_limit_backend
+from app.middleware.idempotency import MemoryIdempotencyStore, set_idempotency_store
+from app.services.account_numbers import account_numbers
+from app.utils.audit import AuditSink, MemoryAuditWriter, set_audit_sink
 
 # Test database using SQLite in-memory
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -11,18 +18,64 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(monkeypatch):
+    """Fail any request that exceeds its declared @query_budget."""
+    monkeypatch.setattr(settings, "DB_QUERY_BUDGET_STRICT", True)
+
+
+@pytest.fixture(autouse=True)
+def rate_limit_backend():
+    """Fresh in-process rate limit store per test."""
+    backend = MemoryRateLimitBackend()
+    set_rate_limit_backend(backend)
+    yield backend
+    set_rate_limit_backend(None)
+
+
+@pytest.fixture(autouse=True)
+def idempotency_store():
+    """Fresh in-process idempotency store per test."""
+    store = MemoryIdempotencyStore(maxsize=1000, ttl=3600)
+    set_idempotency_store(store)
+    yield store
+    set_idempotency_store(None)
+
+
+@pytest.fixture(autouse=True)
+def audit_sink():
+    """Collect audit events in memory instead of writing them to the database."""
+    sink = AuditSink(MemoryAuditWriter(), flush_interval=0.01)
+    set_audit_sink(sink)
+    yield sink
+    sink.close()
+    set_audit_sink(None)
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_state():
+    """Each test builds a fresh database, so cached principals, tokens and revocations must not leak."""
+    for state in (principal_cache, revocation_list, token_cache):
+        state.clear()
+    yield
+    for state in (principal_cache, revocation_list, token_cache):
+        state.clear()
 
 
 @pytest.fixture
 def db():
     """Create test database and yield session."""
     Base.metadata.create_all(bind=engine)
+    account_numbers.reset(engine)
     db = TestingSessionLocal()
     try:
         yield db
     finally:
         db.close()
+        account_numbers.reset()
         Base.metadata.drop_all(bind=engine)
 
 
@@ -31,11 +84,12 @@ def client(db):
     """Create test client with test database."""
     def override_get_db():
         try:
-            yield db
+            yield ThreadedSession(db)
         finally:
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
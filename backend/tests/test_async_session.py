@@ -0,0 +1,137 @@
+import asyncio
+import csv
+import io
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app import database
+from app.config import settings
+from app.database import ReadOnlySession
+from app.main import app
+from app.models import Account, Transaction, TransactionRequest, User, UserRole
+from app.utils.security import create_access_token
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+
+@pytest.fixture
+def async_client(db, monkeypatch):
+    """
+    TestClient with DB_ASYNC enabled: get_db/get_read_db are not overridden and
+    hand out real AsyncSessions on sqlite+aiosqlite over the test database.
+    """
+    async_engine = create_async_engine(
+        SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"),
+        connect_args={"check_same_thread": False}
+    )
+    monkeypatch.setattr(settings, "DB_ASYNC", True)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    ))
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False, sync_session_class=ReadOnlySession
+    ))
+    with TestClient(app) as test_client:
+        yield test_client
+    asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture
+def seeded(async_client, db):
+    manager = User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)
+    customer = User(email="client@example.com", hashed_password="x", name="Client", role=UserRole.CLIENT)
+    db.add_all([manager, customer])
+    db.flush()
+    db.add(Account(
+        user_id=customer.id, account_number="ACC-0000000001",
+        balance=Decimal("10"), wallet_balance=Decimal("10"), trading_balance=Decimal("0")
+    ))
+    db.commit()
+
+    def headers(user):
+        token = create_access_token({"user_id": user.id, "email": user.email, "role": user.role.value})
+        return {"Authorization": f"Bearer {token}"}
+
+    return async_client, headers(manager), headers(customer), customer.id
+
+
+class TestAsyncSessionEndpoints:
+    """Test posting, history and export on real AsyncSessions (DB_ASYNC=true)."""
+
+    def test_dependencies_yield_async_sessions(self, async_client):
+        async def session_types():
+            types = []
+            for dependency in (database.get_db, database.get_read_db):
+                async for session in dependency():
+                    types.append((type(session), type(session.sync_session)))
+            return types
+
+        primary, replica = asyncio.run(session_types())
+        assert primary[0] is AsyncSession
+        assert replica == (AsyncSession, ReadOnlySession)
+
+    def test_postings(self, seeded, db):
+        client, manager_headers, _, customer_id = seeded
+        response = client.post(
+            "/api/transactions/manager/deposit-client",
+            json={"target_user_id": customer_id, "amount": "5", "notes": "async"},
+            headers=manager_headers
+        )
+        assert response.status_code == 200
+        response = client.post(
+            "/api/transactions/bulk",
+            json={"operation": "withdraw", "mode": "atomic", "entries": [
+                {"target_user_id": customer_id, "amount": "3", "notes": "async"}
+            ]},
+            headers=manager_headers
+        )
+        assert response.status_code == 200
+        assert response.json()["posted"] == 1
+
+        db.expire_all()
+        account = db.scalar(select(Account).where(Account.user_id == customer_id))
+        assert (account.wallet_balance, account.trading_balance) == (Decimal("7"), Decimal("5"))
+        assert db.scalar(select(Transaction.id).order_by(Transaction.id.desc())) == 2
+
+    def test_request_approval(self, seeded, db):
+        client, manager_headers, client_headers, customer_id = seeded
+        response = client.post(
+            "/api/transactions/request", json={"request_type": "deposit", "requested_amount": "4"},
+            headers=client_headers
+        )
+        assert response.status_code == 201
+        request_id = response.json()["request_id"]
+
+        response = client.post(
+            "/api/transactions/approve-request",
+            json={"request_id": request_id, "action": "approve"},
+            headers=manager_headers
+        )
+        assert response.status_code == 200
+        db.expire_all()
+        assert db.get(TransactionRequest, request_id).transaction_id == response.json()["transaction_id"]
+
+    def test_history_and_export(self, seeded):
+        client, manager_headers, client_headers, customer_id = seeded
+        for amount in ("1", "2", "3"):
+            client.post(
+                "/api/transactions/manager/deposit-client",
+                json={"target_user_id": customer_id, "amount": amount, "notes": "async"},
+                headers=manager_headers
+            )
+
+        response = client.get("/api/transactions/history", params={"limit": 2}, headers=client_headers)
+        assert response.status_code == 200
+        assert [row["amount"] for row in response.json()] == ["3.00", "2.00"]
+        response = client.get(
+            "/api/transactions/history",
+            params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]},
+            headers=client_headers
+        )
+        assert [row["amount"] for row in response.json()] == ["1.00"]
+
+        response = client.get("/api/transactions/export", headers=client_headers)
+        assert response.status_code == 200
+        assert [row["amount"] for row in csv.DictReader(io.StringIO(response.text))] == ["1.00", "2.00", "3.00"]
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import DatabaseError
+from app.database import ThreadedSession
+from app.init_db import run_migrations
+from app.models import Account, AuditEvent, TransactionType, User, UserRole
+from app.services import ledger
+from app.utils.audit import (
+    SECURITY, AuditSink, AuditWriter, DatabaseAuditWriter, FileAuditWriter, MemoryAuditWriter, audit_event
+)
+from app.utils.security import create_access_token, pwd_context
+
+
+class BatchWriter(MemoryAuditWriter):
+    """Remembers batch sizes, and can be held up to fill the queue."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def write(self, events):
+        self.release.wait()
+        self.batches.append(len(events))
+        super().write(events)
+
+
+def events(n):
+    return [audit_event(SECURITY, "login", user_id=i) for i in range(n)]
+
+
+class TestAuditSink:
+    """Test queueing, batching and the writers."""
+
+    def test_events_are_written_in_batches(self):
+        writer = BatchWriter()
+        writer.release.clear()
+        sink = AuditSink(writer, batch_size=3, flush_interval=0.01)
+        for event in events(7):
+            sink.record(event)
+        writer.release.set()
+        sink.flush()
+
+        assert [event["user_id"] for event in writer.events] == list(range(7))
+        assert max(writer.batches) <= 3 and sum(writer.batches) == 7
+        sink.close()
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        writer = BatchWriter()
+        writer.release.clear()
+        sink = AuditSink(writer, queue_size=2, batch_size=1, flush_interval=0)
+        for event in events(10):
+            sink.record(event)
+
+        assert sink.dropped >= 7
+        writer.release.set()
+        sink.close()
+        assert len(writer.events) == 10 - sink.dropped
+
+    def test_close_writes_everything_queued(self):
+        writer = MemoryAuditWriter()
+        sink = AuditSink(writer, flush_interval=10)
+        for event in events(5):
+            sink.record(event)
+        sink.close()
+        assert len(writer.events) == 5
+
+    def test_failed_batches_are_retried(self, monkeypatch):
+        monkeypatch.setattr("app.utils.audit.time.sleep", lambda seconds: None)
+
+        class Flaky(AuditWriter):
+            calls = 0
+
+            def write(self, batch):
+                self.calls += 1
+                if self.calls == 1:
+                    raise OSError("disk full")
+
+        writer = Flaky()
+        sink = AuditSink(writer, flush_interval=0)
+        sink.record(events(1)[0])
+        sink.close()
+        assert writer.calls == 2
+
+    def test_writers_must_implement_write(self):
+        class Closer(AuditWriter):
+            pass
+
+        with pytest.raises(TypeError):
+            Closer()
+
+    def test_file_writer_rotates(self, tmp_path):
+        path = tmp_path / "audit.log"
+        writer = FileAuditWriter(str(path), max_bytes=500, backups=2)
+        for _ in range(6):
+            writer.write(events(3))
+        writer.close()
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["audit.log", "audit.log.1", "audit.log.2"]
+        line = json.loads((tmp_path / "audit.log.1").read_text().splitlines()[0])
+        assert line["category"] == "security" and line["event_type"] == "login"
+
+    def test_database_writer_appends_only(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'audit.db'}"
+        run_migrations(url)
+        engine = create_engine(url)
+        DatabaseAuditWriter(engine).write(events(3))
+
+        with engine.begin() as conn:
+            assert conn.scalar(select(AuditEvent.__table__.c.user_id).order_by(AuditEvent.__table__.c.id.desc())) == 2
+        with pytest.raises(DatabaseError, match="append-only"):
+            with engine.begin() as conn:
+                conn.execute(AuditEvent.__table__.delete())
+        engine.dispose()
+
+
+class TestAuditTrail:
+    """Test that auth and ledger paths feed the audit sink."""
+
+    def test_login_is_audited(self, client, db, audit_sink):
+        db.add(User(
+            email="audit@example.com", name="Audit", role=UserRole.CLIENT,
+            hashed_password=pwd_context.hash("SomePass123!", rounds=4)
+        ))
+        db.commit()
+        client.post("/api/auth/login", json={"email": "audit@example.com", "password": "wrong"})
+        client.post("/api/auth/login", json={"email": "audit@example.com", "password": "SomePass123!"})
+        audit_sink.flush()
+
+        logins = [
+            (event["event_type"], event["success"], event["details"])
+            for event in audit_sink.writer.events if event["category"] == "security"
+        ]
+        assert logins[-2:] == [("login", False, "Invalid password"), ("login", True, "Role: UserRole.CLIENT")]
+
+    def test_postings_are_audited_on_commit_only(self, db, audit_sink):
+        client_user = User(email="client@example.com", hashed_password="x", name="Client", role=UserRole.CLIENT)
+        staff = User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)
+        db.add_all([client_user, staff])
+        db.flush()
+        db.add(Account(
+            user_id=client_user.id, account_number="ACC-0000000001",
+            balance=Decimal("0"), wallet_balance=Decimal("0"), trading_balance=Decimal("0")
+        ))
+        db.commit()
+
+        def deposit(amount):
+            return asyncio.run(ledger.post_to_account(
+                ThreadedSession(db), client_user.id, {ledger.TRADING: Decimal(amount)},
+                transaction_type=TransactionType.DEPOSIT, description="deposit", performed_by_id=staff.id
+            ))
+
+        deposit("10")
+        db.rollback()
+        posting = deposit("25")
+        db.commit()
+        audit_sink.flush()
+
+        assert [
+            (event["event_type"], event["user_id"], event["actor_id"], event["transaction_id"], event["amount"])
+            for event in audit_sink.writer.events if event["category"] == "transaction"
+        ] == [("deposit", client_user.id, staff.id, posting.transaction_id, Decimal("25"))]
+
+    def test_rejected_tokens_are_audited(self, client, audit_sink):
+        token = create_access_token({"user_id": 999, "email": "ghost@example.com", "role": "client"})
+        client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+        client.get("/api/auth/me", headers={"Authorization": "Bearer not-a-token"})
+        audit_sink.flush()
+
+        assert [
+            (event["event_type"], event["success"], event["details"]) for event in audit_sink.writer.events
+        ] == [
+            ("authentication", False, "Unknown user"),
+            ("authentication", False, "Invalid or expired token"),
+        ]
@@ -1,5 +1,5 @@
 import pytest
-from app.models.user import User
+from app.models.user import User, UserRole
 from app.utils.security import get_password_hash, validate_password_strength
 
 
@@ -61,6 +61,59 @@ class TestAuthEndpoints:
         # This is expected - we need to create branch first
         assert response.status_code in [201, 400]  # 400 if no branch exists
 
+    @pytest.mark.asyncio
+    async def test_register_creates_user_and_account(self, client, db, test_user_data):
+        """Test that registration inserts the user and the account together."""
+        from app.models import Account, Branch
+        db.add(Branch(
+            name="Main Branch", code="MAIN-001", referral_code="MAIN001-REF",
+            admin_email="admin@example.com", admin_name="Admin"
+        ))
+        db.commit()
+
+        response = client.post("/api/auth/register", json=test_user_data)
+        assert response.status_code == 201
+        body = response.json()
+        assert body["account_number"].startswith("ACC-")
+        account = db.query(Account).filter(Account.user_id == body["id"]).one()
+        assert account.account_number == body["account_number"]
+
+        duplicate = client.post("/api/auth/register", json=test_user_data)
+        assert duplicate.status_code == 400
+        assert duplicate.json()["detail"] == "Email already registered"
+
+    @pytest.mark.asyncio
+    async def test_register_retries_taken_account_number(self, client, db, test_user_data, monkeypatch, audit_sink):
+        """Test that an account number collision is retried once, then fails cleanly."""
+        from app.models import Branch
+        from app.services.account_numbers import account_numbers
+        db.add(Branch(
+            name="Main Branch", code="MAIN-001", referral_code="MAIN001-REF",
+            admin_email="admin@example.com", admin_name="Admin"
+        ))
+        db.add(User(email="taken@example.com", hashed_password="x", name="Taken", role=UserRole.CLIENT,
+                     account_number="ACC-TAKEN"))
+        db.commit()
+        numbers = iter(["ACC-TAKEN", "ACC-FRESH", "ACC-TAKEN", "ACC-TAKEN"])
+
+        async def allocate_async():
+            return next(numbers)
+
+        monkeypatch.setattr(account_numbers, "allocate_async", allocate_async)
+
+        response = client.post("/api/auth/register", json=test_user_data)
+        assert response.status_code == 201
+        assert response.json()["account_number"] == "ACC-FRESH"
+
+        test_user_data["email"] = "second@example.com"
+        response = client.post("/api/auth/register", json=test_user_data)
+        assert response.status_code == 500
+        audit_sink.flush()
+        assert [
+            (event["user_email"], event["success"], event["details"])
+            for event in audit_sink.writer.events if event["event_type"] == "registration"
+        ][-1] == ("second@example.com", False, "Database error: IntegrityError")
+
     @pytest.mark.asyncio
     async def test_register_invalid_email(self, client, test_user_data):
         """Test registration with invalid email."""
@@ -84,3 +137,24 @@ class TestAuthEndpoints:
             json={"email": "nonexistent@example.com", "password": "SomePass123!"}
         )
         assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_login_rehashes_outdated_cost(self, client, db):
+        """Test that a hash made with another bcrypt cost is upgraded on login."""
+        from app.models.user import UserRole
+        from app.utils.security import pwd_context
+        user = User(
+            email="rehash@example.com", name="Rehash", role=UserRole.CLIENT,
+            hashed_password=pwd_context.hash("SomePass123!", rounds=4)
+        )
+        db.add(user)
+        db.commit()
+
+        response = client.post(
+            "/api/auth/login",
+            json={"email": "rehash@example.com", "password": "SomePass123!"}
+        )
+        assert response.status_code == 200
+        db.refresh(user)
+        assert not pwd_context.needs_update(user.hashed_password)
+        assert pwd_context.verify("SomePass123!", user.hashed_password)
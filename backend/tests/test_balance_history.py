@@ -0,0 +1,198 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from app.database import ThreadedSession
+from app.models import Account, BalanceSnapshot, Transaction, TransactionType, User, UserRole
+from app.services import balance_history, ledger
+from app.utils.security import create_access_token
+
+DAY = datetime(2026, 3, 1)
+
+
+@pytest.fixture
+def account(db):
+    """A client account with no balance yet."""
+    user = User(email="client@example.com", hashed_password="x", name="Client", role=UserRole.CLIENT)
+    db.add(user)
+    db.flush()
+    account = Account(
+        user_id=user.id, account_number="ACC-0000000001",
+        balance=Decimal("0"), wallet_balance=Decimal("0"), trading_balance=Decimal("0")
+    )
+    db.add(account)
+    db.commit()
+    return account
+
+
+def record(db, account, when, wallet="0", trading="0"):
+    """A transaction moving the account's columns by the given deltas at `when`."""
+    wallet, trading = Decimal(wallet), Decimal(trading)
+    db.add(Transaction(
+        user_id=account.user_id, account_id=account.id, transaction_type=TransactionType.ADJUSTMENT,
+        amount=abs(wallet or trading), balance_before=Decimal("0"), balance_after=Decimal("0"),
+        wallet_delta=wallet or None, trading_delta=trading or None, created_at=when
+    ))
+    account.wallet_balance += wallet
+    account.trading_balance += trading
+    account.balance = account.wallet_balance + account.trading_balance
+    db.commit()
+
+
+def snapshot(db, when):
+    written = balance_history.snapshot_balances(db.connection(), when)
+    db.commit()
+    return written
+
+
+def balance_at(db, account, when):
+    return asyncio.run(balance_history.balance_at(ThreadedSession(db), account, when))
+
+
+class TestBalanceSnapshots:
+    """Test the snapshot job and point-in-time balances."""
+
+    def test_only_moved_accounts_are_snapshotted(self, db, account):
+        assert snapshot(db, DAY) == 1  # first snapshot, even without transactions
+        assert snapshot(db, DAY + timedelta(hours=1)) == 0
+        record(db, account, DAY + timedelta(hours=2), trading="100")
+        assert snapshot(db, DAY + timedelta(hours=3)) == 1
+
+        latest = db.scalar(select(BalanceSnapshot).order_by(BalanceSnapshot.id.desc()))
+        assert latest.trading_balance == Decimal("100")
+        assert latest.last_transaction_id == db.scalar(select(func.max(Transaction.id)))
+
+    def test_balance_at_replays_from_nearest_snapshot(self, db, account):
+        record(db, account, DAY + timedelta(days=1), trading="100")
+        record(db, account, DAY + timedelta(days=2), wallet="30", trading="-30")
+        snapshot(db, DAY + timedelta(days=3))
+        record(db, account, DAY + timedelta(days=4), trading="50")
+
+        def balances(days):
+            result = balance_at(db, account, DAY + timedelta(days=days))
+            return result["wallet_balance"], result["trading_balance"], result["replayed_transactions"]
+
+        assert balances(0.5) == (0, 0, 2)        # backwards from the snapshot
+        assert balances(1.5) == (0, 100, 1)
+        assert balances(2.5) == (30, 70, 0)
+        assert balances(3.5) == (30, 70, 0)      # the snapshot itself
+        assert balances(5) == (30, 120, 1)       # forwards from the snapshot
+
+    def test_balance_at_without_snapshots_uses_live_balances(self, db, account):
+        record(db, account, DAY + timedelta(days=1), wallet="10")
+        record(db, account, DAY + timedelta(days=2), wallet="5")
+
+        result = balance_at(db, account, DAY + timedelta(days=1, hours=12))
+        assert (result["wallet_balance"], result["snapshot_at"]) == (10, None)
+
+    def test_balance_at_falls_back_for_postings_without_deltas(self, db, account):
+        for transaction_type, amount in (
+            (TransactionType.DEPOSIT, "100"), (TransactionType.TRANSFER, "30"), (TransactionType.WITHDRAW, "10")
+        ):
+            db.add(Transaction(
+                user_id=account.user_id, account_id=account.id, transaction_type=transaction_type,
+                amount=Decimal(amount), balance_before=Decimal("0"), balance_after=Decimal("0"),
+                created_at=DAY + timedelta(days=1)
+            ))
+        account.wallet_balance, account.trading_balance, account.balance = Decimal("20"), Decimal("70"), Decimal("90")
+        db.commit()
+        snapshot(db, DAY + timedelta(days=2))
+
+        result = balance_at(db, account, DAY)  # before the first snapshot: walks back over the legacy rows
+        assert (result["wallet_balance"], result["trading_balance"], result["replayed_transactions"]) == (0, 0, 3)
+
+    def test_compaction_keeps_last_snapshot_per_day(self, db, account):
+        for hour in range(0, 48, 6):
+            record(db, account, DAY + timedelta(hours=hour), wallet="1")
+            snapshot(db, DAY + timedelta(hours=hour, minutes=30))
+
+        removed = balance_history.compact_snapshots(db.connection(), DAY + timedelta(days=1))
+        db.commit()
+
+        kept = db.scalars(select(BalanceSnapshot.recorded_at).order_by(BalanceSnapshot.recorded_at)).all()
+        assert removed == 3
+        assert len(kept) == 5  # the last of day one, all of day two
+        assert kept[0].hour == 18
+
+    def test_series_is_downsampled(self, db, account):
+        for hour in range(24 * 10):
+            record(db, account, DAY + timedelta(hours=hour), wallet="1")
+            snapshot(db, DAY + timedelta(hours=hour, minutes=1))
+
+        series = asyncio.run(balance_history.balance_series(
+            ThreadedSession(db), account.id, DAY, DAY + timedelta(days=10), points=10
+        ))
+        assert len(series) == 10
+        assert series[-1]["wallet_balance"] == 240
+        assert [point["wallet_balance"] for point in series] == sorted(point["wallet_balance"] for point in series)
+
+    def test_ledger_records_column_deltas(self, db, account):
+        session = ThreadedSession(db)
+        asyncio.run(ledger.post_to_account(
+            session, account.user_id, {ledger.TRADING: Decimal("20")},
+            transaction_type=TransactionType.DEPOSIT, description="deposit"
+        ))
+        asyncio.run(ledger.post_to_account(
+            session, account.user_id, {ledger.TRADING: Decimal("-5"), ledger.WALLET: Decimal("5")},
+            transaction_type=TransactionType.TRANSFER, description="transfer"
+        ))
+        db.commit()
+
+        deltas = db.execute(
+            select(Transaction.wallet_delta, Transaction.trading_delta).order_by(Transaction.id)
+        ).all()
+        assert deltas == [(None, Decimal("20")), (Decimal("5"), Decimal("-5"))]
+
+
+class TestBalanceEndpoints:
+    """Test the point-in-time balance and chart endpoints."""
+
+    def test_balance_at_and_history(self, client, db, account):
+        record(db, account, DAY + timedelta(days=1), trading="100")
+        snapshot(db, DAY + timedelta(days=2))
+        user = db.get(User, account.user_id)
+        headers = {"Authorization": "Bearer " + create_access_token(
+            {"user_id": user.id, "email": user.email, "role": "client"}
+        )}
+
+        response = client.get("/api/accounts/balance-at", params={"at": "2026-03-03T00:00:00"}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["trading_balance"] == 100
+
+        response = client.get("/api/accounts/balance-history", params={
+            "start": "2026-03-01T00:00:00", "end": "2026-03-05T00:00:00", "points": 4
+        }, headers=headers)
+        assert response.status_code == 200
+        assert [point["balance"] for point in response.json()] == [100]
+
+    def test_clients_cannot_see_other_accounts(self, client, db, account):
+        other = User(email="other@example.com", hashed_password="x", name="Other", role=UserRole.CLIENT)
+        db.add(other)
+        db.commit()
+        headers = {"Authorization": "Bearer " + create_access_token(
+            {"user_id": other.id, "email": other.email, "role": "client"}
+        )}
+        response = client.get("/api/accounts/balance-at", params={
+            "at": "2026-03-03T00:00:00", "user_id": account.user_id
+        }, headers=headers)
+        assert response.status_code == 403
+
+    def test_history_mixes_naive_and_aware_bounds(self, client, db, account):
+        record(db, account, DAY + timedelta(days=1), trading="100")
+        snapshot(db, DAY + timedelta(days=2))
+        user = db.get(User, account.user_id)
+        headers = {"Authorization": "Bearer " + create_access_token(
+            {"user_id": user.id, "email": user.email, "role": "client"}
+        )}
+
+        response = client.get("/api/accounts/balance-history", params={"start": "2026-03-01T00:00:00"}, headers=headers)
+        assert response.status_code == 200
+        assert [point["balance"] for point in response.json()] == [100]
+
+        response = client.get("/api/accounts/balance-history", params={
+            "start": "2026-03-01T00:00:00", "end": "2026-03-05T00:00:00Z"
+        }, headers=headers)
+        assert response.status_code == 200
+        assert [point["balance"] for point in response.json()] == [100]
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine, select, text
+from app.config import Settings
+from app.database import ThreadedSession, TimedQueuePool
+from app.utils.monitoring import PoolMetrics, instrument_engine
+from app.models.branch import Branch
+
+
+def make_settings(database_url: str) -> Settings:
+    return Settings(
+        DATABASE_URL=database_url,
+        SECRET_KEY="test",
+        ADMIN_EMAIL="admin@example.com",
+        ADMIN_PASSWORD="unused"
+    )
+
+
+class TestAsyncDatabaseUrl:
+    """Test DATABASE_URL rewriting for the asyncio drivers."""
+
+    def test_sqlite_uses_aiosqlite(self):
+        settings = make_settings("sqlite:///./app.db")
+        assert settings.async_database_url == "sqlite+aiosqlite:///./app.db"
+
+    @pytest.mark.parametrize("url", [
+        "postgresql://u:p@db/app",
+        "postgres://u:p@db/app",
+        "postgresql+psycopg2://u:p@db/app",
+    ])
+    def test_postgres_uses_asyncpg(self, url):
+        settings = make_settings(url)
+        assert settings.async_database_url == "postgresql+asyncpg://u:p@db/app"
+
+
+class TestThreadedSession:
+    """Test the AsyncSession-compatible facade used in sync mode."""
+
+    @pytest.mark.asyncio
+    async def test_execute_and_scalar(self, db):
+        session = ThreadedSession(db)
+        assert (await session.execute(text("SELECT 1"))).scalar() == 1
+
+        session.add(Branch(
+            name="Test", code="T-1", referral_code="T1-REF",
+            admin_email="t@example.com", admin_name="T"
+        ))
+        await session.commit()
+
+        branch = await session.scalar(select(Branch).where(Branch.code == "T-1"))
+        assert branch.referral_code == "T1-REF"
+        assert len((await session.scalars(select(Branch))).all()) == 1
+
+
+class TestPoolMetrics:
+    """Test pool event instrumentation."""
+
+    def test_counts_checkouts_and_waits(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=TimedQueuePool, pool_size=2, max_overflow=1
+        )
+        metrics = instrument_engine(engine, PoolMetrics())
+
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        stats = metrics.snapshot(engine.pool)
+
+        assert stats["connects"] == 1
+        assert stats["checkouts"] == 3
+        assert stats["checkins"] == 3
+        assert stats["checkout_wait_ms"]["count"] == 3
+        assert sum(stats["checkout_wait_ms"]["histogram"].values()) == 3
+        assert stats["size"] == 2
+        assert stats["checkedout"] == 0
+
+    def test_metrics_survive_dispose(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool)
+        metrics = instrument_engine(engine, PoolMetrics())
+        engine.dispose()
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert metrics.snapshot()["checkout_wait_ms"]["count"] == 1
@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from app.database import ThreadedSession
+from app.models import Branch, Transaction, TransactionType, User, UserRole
+from app.utils.security import create_access_token
+
+
+@pytest.fixture
+def ledger(client, db):
+    """Two branches with two clients each; every client has three transactions."""
+    users = {}
+    for code in ("A", "B"):
+        branch = Branch(
+            name=f"Branch {code}", code=f"BR-{code}", referral_code=f"BR{code}-REF",
+            admin_email=f"admin{code}@example.com", admin_name=f"Admin {code}"
+        )
+        db.add(branch)
+        db.flush()
+        users[f"admin{code}"] = User(
+            email=f"admin{code}@example.com", hashed_password="x", name=f"Admin {code}",
+            role=UserRole.ADMIN, branch_id=branch.id
+        )
+        for n in (1, 2):
+            users[f"client{code}{n}"] = User(
+                email=f"client{code}{n}@example.com", hashed_password="x", name=f"Client {code}{n}",
+                role=UserRole.CLIENT, branch_id=branch.id
+            )
+    users["manager"] = User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)
+    db.add_all(users.values())
+    db.flush()
+    for key, user in users.items():
+        if key.startswith("client"):
+            for amount in ("1.10", "2.20", "3.30"):
+                db.add(Transaction(
+                    user_id=user.id, transaction_type=TransactionType.DEPOSIT, amount=Decimal(amount),
+                    balance_before=Decimal("0"), balance_after=Decimal(amount), description="seed, with comma"
+                ))
+    db.commit()
+
+    def headers(key):
+        user = users[key]
+        token = create_access_token({"user_id": user.id, "email": user.email, "role": user.role.value})
+        return {"Authorization": f"Bearer {token}"}
+
+    return client, headers, users
+
+
+def export(client, headers, **params):
+    return client.get("/api/transactions/export", params=params, headers=headers)
+
+
+class TestTransactionExport:
+    """Test streaming CSV/NDJSON transaction exports."""
+
+    def test_client_exports_own_history_as_csv(self, ledger):
+        client, headers, users = ledger
+        response = export(client, headers("clientA1"))
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["amount"] for row in rows] == ["1.10", "2.20", "3.30"]
+        assert {row["user_email"] for row in rows} == {"clientA1@example.com"}
+        assert rows[0]["transaction_type"] == "deposit"
+        assert rows[0]["description"] == "seed, with comma"
+
+    def test_admin_exports_branch_as_ndjson(self, ledger):
+        client, headers, users = ledger
+        response = export(client, headers("adminA"), scope="branch", format="ndjson")
+
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 6
+        assert {row["branch_id"] for row in rows} == {users["adminA"].branch_id}
+        assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+    def test_resume_after_id(self, ledger):
+        client, headers, users = ledger
+        full = [json.loads(line) for line in export(client, headers("manager"), scope="all", format="ndjson").text.splitlines()]
+        assert len(full) == 12
+
+        resumed = export(client, headers("manager"), scope="all", format="ndjson", after_id=full[4]["id"])
+        assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == [row["id"] for row in full[5:]]
+
+    def test_scope_is_enforced(self, ledger):
+        client, headers, users = ledger
+        other_branch = users["adminB"].branch_id
+        assert export(client, headers("clientA1"), user_id=users["clientB1"].id).status_code == 403
+        assert export(client, headers("clientA1"), scope="branch").status_code == 403
+        assert export(client, headers("adminA"), scope="all").status_code == 403
+        assert export(client, headers("adminA"), scope="branch", branch_id=other_branch).status_code == 403
+        assert export(client, headers("manager"), scope="branch").status_code == 400
+
+    def test_admin_cannot_export_user_of_another_branch(self, ledger):
+        client, headers, users = ledger
+        response = export(client, headers("adminA"), user_id=users["clientB1"].id)
+        assert response.status_code == 200
+        assert response.text.splitlines()[1:] == []
+
+    def test_admin_without_branch_cannot_export(self, ledger, db):
+        client, headers, users = ledger
+        users["adminA"].branch_id = None
+        db.commit()
+        for scope in ("user", "branch"):
+            response = export(client, headers("adminA"), scope=scope, user_id=users["clientB1"].id)
+            assert response.status_code == 403
+            assert response.json()["detail"] == "Admin is not assigned to a branch"
+
+
+class TestThreadedStream:
+    """Test streaming reads through the sync-mode session facade."""
+
+    @pytest.mark.asyncio
+    async def test_partitions(self, ledger, db):
+        session = ThreadedSession(db)
+        result = await session.stream(select(Transaction.id).order_by(Transaction.id))
+        sizes = [len(rows) async for rows in result.partitions(5)]
+        await result.close()
+        assert sizes == [5, 5, 2]
@@ -0,0 +1,139 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from app.middleware.idempotency import IdempotencyStore
+from app.models import Account, Branch, Transaction, TransactionRequest, User, UserRole
+from app.utils.security import create_access_token
+
+
+@pytest.fixture
+def seeded(client, db):
+    branch = Branch(
+        name="Main Branch", code="MAIN-001", referral_code="MAIN001-REF",
+        admin_email="admin@example.com", admin_name="Admin"
+    )
+    db.add(branch)
+    db.flush()
+    manager = User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)
+    customer = User(
+        email="client@example.com", hashed_password="x", name="Client",
+        role=UserRole.CLIENT, branch_id=branch.id
+    )
+    db.add_all([manager, customer])
+    db.flush()
+    db.add(Account(
+        user_id=customer.id, account_number="ACC-0000000001",
+        balance=Decimal("10"), wallet_balance=Decimal("10"), trading_balance=Decimal("0")
+    ))
+    db.commit()
+
+    def headers(user, role, key=None):
+        token = create_access_token({"user_id": user.id, "email": user.email, "role": role})
+        result = {"Authorization": f"Bearer {token}"}
+        if key:
+            result["Idempotency-Key"] = key
+        return result
+
+    return client, headers, manager, customer
+
+
+def transaction_count(db):
+    return db.scalar(select(func.count(Transaction.id)))
+
+
+class TestIdempotencyKeys:
+    """Test that retried postings are applied once."""
+
+    def test_retry_replays_response(self, seeded, db):
+        client, headers, manager, customer = seeded
+        body = {"target_user_id": customer.id, "amount": "5", "notes": "retry"}
+        first = client.post("/api/transactions/manager/deposit-client", json=body, headers=headers(manager, "manager", "k-1"))
+        second = client.post("/api/transactions/manager/deposit-client", json=body, headers=headers(manager, "manager", "k-1"))
+
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert int(second.headers["X-DB-Queries"]) <= 1  # at most the principal lookup
+        assert transaction_count(db) == 1
+
+    def test_without_key_each_call_posts(self, seeded, db):
+        client, headers, manager, customer = seeded
+        body = {"target_user_id": customer.id, "amount": "5", "notes": "no key"}
+        for _ in range(2):
+            assert client.post("/api/transactions/manager/deposit-client", json=body, headers=headers(manager, "manager")).status_code == 200
+        assert transaction_count(db) == 2
+
+    def test_key_reuse_with_different_payload(self, seeded):
+        client, headers, manager, customer = seeded
+        url = "/api/transactions/manager/deposit-client"
+        client.post(url, json={"target_user_id": customer.id, "amount": "5", "notes": "a"}, headers=headers(manager, "manager", "k-2"))
+        response = client.post(url, json={"target_user_id": customer.id, "amount": "6", "notes": "a"}, headers=headers(manager, "manager", "k-2"))
+        assert response.status_code == 422
+
+    def test_csv_reuse_with_different_contents(self, seeded, db):
+        client, headers, manager, customer = seeded
+        url = "/api/transactions/bulk/csv"
+
+        def upload(body):
+            return client.post(
+                url, data={"operation": "deposit", "mode": "atomic"},
+                files={"file": ("credits.csv", body, "text/csv")},
+                headers=headers(manager, "manager", "k-csv")
+            )
+
+        first = upload(f"target_user_id,amount,notes\n{customer.id},1.00,a\n")
+        replayed = upload(f"target_user_id,amount,notes\n{customer.id},1.00,a\n")
+        changed = upload(f"target_user_id,amount,notes\n{customer.id},9.00,a\n")  # same name and size
+
+        assert first.status_code == replayed.status_code == 200
+        assert replayed.headers["Idempotent-Replayed"] == "true"
+        assert changed.status_code == 422
+        assert transaction_count(db) == 1
+
+    def test_client_errors_are_replayed(self, seeded, db):
+        client, headers, manager, customer = seeded
+        body = {"target_user_id": customer.id, "amount": "50", "notes": "too much"}
+        url = "/api/transactions/manager/withdraw-client"
+        first = client.post(url, json=body, headers=headers(manager, "manager", "k-3"))
+        second = client.post(url, json=body, headers=headers(manager, "manager", "k-3"))
+        assert first.status_code == second.status_code == 400
+        assert second.json() == first.json()
+
+    def test_reference_is_the_durable_backstop(self, seeded, db, idempotency_store):
+        client, headers, manager, customer = seeded
+        body = {"target_user_id": customer.id, "amount": "5", "notes": "lost"}
+        url = "/api/transactions/manager/deposit-client"
+        assert client.post(url, json=body, headers=headers(manager, "manager", "k-4")).status_code == 200
+        idempotency_store.clear()  # e.g. a restart, or a retry served by another worker
+
+        response = client.post(url, json=body, headers=headers(manager, "manager", "k-4"))
+        assert response.status_code == 409
+        assert transaction_count(db) == 1
+        db.expire_all()
+        assert db.scalar(select(Account.trading_balance).where(Account.user_id == customer.id)) == Decimal("5")
+
+    def test_keys_are_scoped_to_the_caller(self, seeded, db):
+        client, headers, manager, customer = seeded
+        body = {"request_type": "deposit", "requested_amount": "5"}
+        first = client.post("/api/transactions/request", json=body, headers=headers(customer, "client", "k-5"))
+        retry = client.post("/api/transactions/request", json=body, headers=headers(customer, "client", "k-5"))
+        assert first.status_code == retry.status_code == 201
+        assert retry.json()["request_id"] == first.json()["request_id"]
+        assert db.scalar(select(func.count(TransactionRequest.id))) == 1
+
+        # The same key from another user is a different request
+        other = client.post(
+            "/api/transactions/manager/deposit-client",
+            json={"target_user_id": customer.id, "amount": "5", "notes": "x"},
+            headers=headers(manager, "manager", "k-5")
+        )
+        assert other.status_code == 200
+
+    def test_incomplete_store_cannot_be_created(self):
+        class ReadOnlyStore(IdempotencyStore):
+            async def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            ReadOnlyStore()
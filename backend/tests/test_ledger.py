@@ -0,0 +1,342 @@
+import asyncio
+import random
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, ThreadedSession
+from app.models import (
+    Account, Branch, RequestStatus, RequestType, Transaction, TransactionRequest, TransactionType, User, UserRole,
+)
+from app.services import ledger
+from app.services.ledger import BalanceNotFound, InsufficientFunds
+from app.utils.security import create_access_token
+
+
+@pytest.fixture
+def ledger_db(tmp_path):
+    """File-backed SQLite database with one client account and one admin."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'ledger.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    with Session() as session:
+        branch = Branch(
+            name="Main Branch", code="MAIN-001", referral_code="MAIN001-REF",
+            admin_email="admin@example.com", admin_name="Admin"
+        )
+        session.add(branch)
+        session.flush()
+        client = User(
+            email="client@example.com", hashed_password="x", name="Client",
+            role=UserRole.CLIENT, branch_id=branch.id
+        )
+        admin = User(
+            email="admin@example.com", hashed_password="x", name="Admin",
+            role=UserRole.ADMIN, branch_id=branch.id, admin_balance=Decimal("50")
+        )
+        session.add_all([client, admin])
+        session.flush()
+        session.add(Account(
+            user_id=client.id, account_number="ACC-0000000001",
+            balance=Decimal("100"), wallet_balance=Decimal("100"), trading_balance=Decimal("0")
+        ))
+        session.commit()
+        ids = {"client": client.id, "admin": admin.id, "branch": branch.id}
+    yield Session, ids
+    engine.dispose()
+
+
+def post(Session, fn, *args, **kwargs):
+    """Run one posting in its own session and commit it."""
+    async def run():
+        db = ThreadedSession(Session())
+        try:
+            posting = await fn(db, *args, **kwargs)
+            await db.commit()
+            return posting
+        finally:
+            await db.close()
+    return asyncio.run(run())
+
+
+class TestLedgerPostings:
+    """Test conditional balance updates."""
+
+    def test_deposit_records_transaction(self, ledger_db):
+        Session, ids = ledger_db
+        posting = post(
+            Session, ledger.post_to_account, ids["client"], {ledger.TRADING: Decimal("25")},
+            transaction_type=TransactionType.DEPOSIT, description="test"
+        )
+        assert (posting.balance_before, posting.balance_after) == (Decimal("0"), Decimal("25"))
+        assert posting.balances["balance"] == Decimal("125")
+        assert posting.owner_name == "Client"
+        with Session() as session:
+            entry = session.get(Transaction, posting.transaction_id)
+            assert (entry.amount, entry.balance_after, entry.account_id) == (Decimal("25"), Decimal("25"), posting.account_id)
+
+    def test_overdraft_is_rejected(self, ledger_db):
+        Session, ids = ledger_db
+        with pytest.raises(InsufficientFunds) as exc:
+            post(
+                Session, ledger.post_to_account, ids["client"], {ledger.WALLET: Decimal("-100.01")},
+                transaction_type=TransactionType.WITHDRAW, description="test"
+            )
+        assert exc.value.balance == Decimal("100")
+        with Session() as session:
+            assert session.scalar(select(func.count(Transaction.id))) == 0
+
+    def test_owner_conditions_scope_the_target(self, ledger_db):
+        Session, ids = ledger_db
+        with pytest.raises(BalanceNotFound) as exc:
+            post(
+                Session, ledger.post_to_account, ids["client"], {ledger.TRADING: Decimal("1")},
+                transaction_type=TransactionType.DEPOSIT, description="test",
+                owner_conditions=[User.branch_id == ids["branch"] + 1]
+            )
+        assert not exc.value.owner_found
+
+    def test_admin_balance_posting(self, ledger_db):
+        Session, ids = ledger_db
+        posting = post(
+            Session, ledger.post_to_admin_balance, ids["admin"], Decimal("-20"),
+            transaction_type=TransactionType.WITHDRAW, description="test"
+        )
+        assert (posting.balance_before, posting.balance_after, posting.account_id) == (Decimal("50"), Decimal("30"), None)
+        with pytest.raises(InsufficientFunds):
+            post(
+                Session, ledger.post_to_admin_balance, ids["admin"], Decimal("-31"),
+                transaction_type=TransactionType.WITHDRAW, description="test"
+            )
+
+    def test_concurrent_postings_conserve_money(self, ledger_db):
+        """Hammer one account from many threads; every cent must be accounted for."""
+        Session, ids = ledger_db
+        operations = {
+            "withdraw": ({ledger.WALLET: Decimal("-7")}, TransactionType.WITHDRAW),
+            "deposit": ({ledger.TRADING: Decimal("5")}, TransactionType.DEPOSIT),
+            "transfer": ({ledger.TRADING: Decimal("-3"), ledger.WALLET: Decimal("3")}, TransactionType.TRANSFER),
+        }
+        applied = {name: 0 for name in operations}
+        rejected = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            for _ in range(25):
+                name = rng.choice(list(operations))
+                deltas, transaction_type = operations[name]
+                try:
+                    post(
+                        Session, ledger.post_to_account, ids["client"], deltas,
+                        transaction_type=transaction_type, description=name
+                    )
+                except InsufficientFunds:
+                    rejected.append(name)
+                    continue
+                with lock:
+                    applied[name] += 1
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert rejected  # the wallet runs dry, so some withdrawals must bounce
+        with Session() as session:
+            account = session.scalar(select(Account).where(Account.user_id == ids["client"]))
+            assert account.wallet_balance == 100 - 7 * applied["withdraw"] + 3 * applied["transfer"]
+            assert account.trading_balance == 5 * applied["deposit"] - 3 * applied["transfer"]
+            assert account.wallet_balance >= 0 and account.trading_balance >= 0
+            assert account.balance == account.wallet_balance + account.trading_balance
+            assert session.scalar(select(func.count(Transaction.id))) == sum(applied.values())
+
+
+class TestLedgerEndpoints:
+    """Test the money endpoints on top of the ledger."""
+
+    @pytest.fixture
+    def seeded(self, client, db):
+        branch = Branch(
+            name="Main Branch", code="MAIN-001", referral_code="MAIN001-REF",
+            admin_email="admin@example.com", admin_name="Admin"
+        )
+        db.add(branch)
+        db.flush()
+        manager = User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)
+        customer = User(
+            email="client@example.com", hashed_password="x", name="Client",
+            role=UserRole.CLIENT, branch_id=branch.id
+        )
+        db.add_all([manager, customer])
+        db.flush()
+        db.add(Account(
+            user_id=customer.id, account_number="ACC-0000000001",
+            balance=Decimal("10"), wallet_balance=Decimal("10"), trading_balance=Decimal("0")
+        ))
+        db.commit()
+        token = create_access_token({"user_id": manager.id, "email": manager.email, "role": "manager"})
+        return client, {"Authorization": f"Bearer {token}"}, customer.id
+
+    def test_withdraw_beyond_wallet_is_rejected(self, seeded):
+        client, headers, customer_id = seeded
+        response = client.post(
+            "/api/transactions/manager/withdraw-client",
+            json={"target_user_id": customer_id, "amount": "10.01", "notes": "test"},
+            headers=headers
+        )
+        assert response.status_code == 400
+        assert "Insufficient wallet balance" in response.json()["detail"]
+
+    def test_deposit_to_unknown_client(self, seeded):
+        client, headers, customer_id = seeded
+        response = client.post(
+            "/api/transactions/manager/deposit-client",
+            json={"target_user_id": customer_id + 100, "amount": "5", "notes": "test"},
+            headers=headers
+        )
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Client user not found"
+
+    def test_withdraw_updates_balances(self, seeded):
+        client, headers, customer_id = seeded
+        response = client.post(
+            "/api/transactions/manager/withdraw-client",
+            json={"target_user_id": customer_id, "amount": "4", "notes": "test"},
+            headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["new_wallet_balance"] == 6.0
+        assert response.json()["new_total_balance"] == 6.0
+
+    def test_bulk_withdraw_best_effort(self, seeded, db):
+        client, headers, customer_id = seeded
+        response = client.post(
+            "/api/transactions/bulk",
+            json={
+                "operation": "withdraw",
+                "mode": "best_effort",
+                "entries": [
+                    {"target_user_id": customer_id, "amount": "4", "notes": "a"},
+                    {"target_user_id": customer_id + 100, "amount": "1", "notes": "b"},
+                    {"target_user_id": customer_id, "amount": "4", "notes": "c"},
+                    {"target_user_id": customer_id, "amount": "4", "notes": "d"},
+                ]
+            },
+            headers=headers
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["posted"], body["failed"]) == (2, 2)
+        assert [r["status"] for r in body["results"]] == ["posted", "failed", "posted", "failed"]
+        assert [r["new_balance"] for r in body["results"]] == [6.0, None, 2.0, None]
+        assert body["results"][0]["transaction_id"] != body["results"][2]["transaction_id"]
+        assert "Insufficient wallet balance" in body["results"][3]["error"]
+        db.expire_all()
+        account = db.scalar(select(Account).where(Account.user_id == customer_id))
+        assert (account.wallet_balance, account.balance) == (Decimal("2"), Decimal("2"))
+        entries = {t.id: t for t in db.scalars(select(Transaction)).all()}
+        assert [
+            (entries[r["transaction_id"]].balance_before, entries[r["transaction_id"]].balance_after)
+            for r in body["results"] if r["status"] == "posted"
+        ] == [(Decimal("10"), Decimal("6")), (Decimal("6"), Decimal("2"))]
+
+    def test_bulk_atomic_posts_nothing_on_failure(self, seeded, db):
+        client, headers, customer_id = seeded
+        response = client.post(
+            "/api/transactions/bulk",
+            json={
+                "operation": "withdraw",
+                "entries": [
+                    {"target_user_id": customer_id, "amount": "4", "notes": "a"},
+                    {"target_user_id": customer_id, "amount": "7", "notes": "b"},
+                ]
+            },
+            headers=headers
+        )
+        assert response.status_code == 400
+        assert [r["status"] for r in response.json()["detail"]["results"]] == ["not_applied", "failed"]
+        db.expire_all()
+        assert db.scalar(select(Account.wallet_balance).where(Account.user_id == customer_id)) == Decimal("10")
+        assert db.scalar(select(func.count(Transaction.id))) == 0
+
+    def test_bulk_csv_deposit(self, seeded, db):
+        client, headers, customer_id = seeded
+        other = User(email="other@example.com", hashed_password="x", name="Other", role=UserRole.CLIENT)
+        db.add(other)
+        db.flush()
+        db.add(Account(user_id=other.id, account_number="ACC-0000000002", balance=0, wallet_balance=0, trading_balance=0))
+        db.commit()
+        csv_body = (
+            "target_user_id,amount,notes\n"
+            f"{customer_id},5,month end\n"
+            f"{other.id},2.50,month end\n"
+            f"{other.id},-1,negative\n"
+            f"{customer_id},5,month end\n"
+        )
+        response = client.post(
+            "/api/transactions/bulk/csv",
+            data={"operation": "deposit", "mode": "best_effort"},
+            files={"file": ("credits.csv", csv_body, "text/csv")},
+            headers=headers
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert [r["status"] for r in body["results"]] == ["posted", "posted", "failed", "posted"]
+        assert body["results"][2]["error"].startswith("amount:")
+        db.expire_all()
+        balances = dict(db.execute(select(Account.user_id, Account.trading_balance)).all())
+        assert balances == {customer_id: Decimal("10"), other.id: Decimal("2.50")}
+
+    def test_batch_approve_requests(self, seeded, db):
+        client, headers, customer_id = seeded
+        requests = [
+            TransactionRequest(user_id=customer_id, request_type=RequestType.DEPOSIT, requested_amount=Decimal("20")),
+            TransactionRequest(user_id=customer_id, request_type=RequestType.WITHDRAWAL, requested_amount=Decimal("8")),
+            TransactionRequest(user_id=customer_id, request_type=RequestType.WITHDRAWAL, requested_amount=Decimal("8")),
+            TransactionRequest(user_id=customer_id, request_type=RequestType.DEPOSIT, requested_amount=Decimal("5")),
+            TransactionRequest(
+                user_id=customer_id, request_type=RequestType.DEPOSIT, requested_amount=Decimal("5"),
+                status=RequestStatus.APPROVED
+            ),
+        ]
+        db.add_all(requests)
+        db.commit()
+        ids = [r.id for r in requests]
+        response = client.post(
+            "/api/transactions/approve-requests",
+            json={"items": [
+                {"request_id": ids[0], "action": "approve", "approved_amount": "15"},
+                {"request_id": ids[1], "action": "approve"},
+                {"request_id": ids[2], "action": "approve"},  # wallet only has 10
+                {"request_id": ids[3], "action": "reject", "admin_notes": "duplicate"},
+                {"request_id": ids[4], "action": "approve"},
+                {"request_id": ids[4] + 100, "action": "approve"},
+            ]},
+            headers=headers
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert [r["status"] for r in body["results"]] == ["approved", "approved", "failed", "rejected", "failed", "failed"]
+        assert "Insufficient wallet balance" in body["results"][2]["error"]
+        assert body["results"][4]["error"] == "Request is already approved"
+        assert (body["approved"], body["rejected"], body["failed"]) == (2, 1, 3)
+
+        db.expire_all()
+        account = db.scalar(select(Account).where(Account.user_id == customer_id))
+        assert (account.wallet_balance, account.trading_balance) == (Decimal("2"), Decimal("15"))
+        statuses = [db.get(TransactionRequest, i).status for i in ids]
+        assert statuses == [
+            RequestStatus.APPROVED, RequestStatus.APPROVED, RequestStatus.PENDING,
+            RequestStatus.REJECTED, RequestStatus.APPROVED
+        ]
+        first = db.get(TransactionRequest, ids[0])
+        assert first.approved_amount == Decimal("15")
+        assert first.transaction_id == body["results"][0]["transaction_id"]
+        assert db.get(Transaction, first.transaction_id).amount == Decimal("15")
@@ -0,0 +1,130 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, func, inspect, or_, select, tuple_
+from app.database import Base
+from app.init_db import BASELINE_REVISION, get_alembic_config, run_migrations
+from app.models import (
+    Account, BalanceSnapshot, BranchDailyRollup, TokenRevocation, Trade, Transaction, TransactionRequest, User,
+    RequestStatus, TradeStatus, TransactionType, UserRole,
+)
+from app.services.clients import client_listing
+
+
+# The filters the API runs on every request; each must be served by an index
+HOT_QUERIES = {
+    "account_by_user": select(Account).where(Account.user_id == 1),
+    "history": select(Transaction).where(
+        Transaction.user_id == 1
+    ).order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(51),
+    "history_page": select(Transaction).where(
+        Transaction.user_id == 1,
+        tuple_(Transaction.created_at, Transaction.id) < tuple_("2026-01-01 00:00:00", 500)
+    ).order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(51),
+    "history_by_type": select(Transaction).where(
+        Transaction.user_id == 1,
+        Transaction.transaction_type == TransactionType.DEPOSIT,
+        tuple_(Transaction.created_at, Transaction.id) < tuple_("2026-01-01 00:00:00", 500)
+    ).order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(51),
+    "request_queue": select(TransactionRequest).where(
+        TransactionRequest.status == RequestStatus.PENDING,
+        tuple_(TransactionRequest.created_at, TransactionRequest.id) < tuple_("2026-01-01 00:00:00", 500)
+    ).order_by(TransactionRequest.created_at.desc(), TransactionRequest.id.desc()).limit(51),
+    "claimable_requests": select(TransactionRequest.id).where(
+        TransactionRequest.status == RequestStatus.PENDING,
+        or_(TransactionRequest.claimed_by_id.is_(None), TransactionRequest.claim_expires_at <= "2026-01-01")
+    ).order_by(TransactionRequest.created_at, TransactionRequest.id).limit(10),
+    "client_requests": select(TransactionRequest).where(
+        TransactionRequest.user_id == 1,
+        tuple_(TransactionRequest.created_at, TransactionRequest.id) < tuple_("2026-01-01 00:00:00", 500)
+    ).order_by(TransactionRequest.created_at.desc(), TransactionRequest.id.desc()).limit(51),
+    "all_requests_page": select(TransactionRequest).where(
+        tuple_(TransactionRequest.created_at, TransactionRequest.id) < tuple_("2026-01-01 00:00:00", 500)
+    ).order_by(TransactionRequest.created_at.desc(), TransactionRequest.id.desc()).limit(51),
+    "nearest_snapshot": select(BalanceSnapshot).where(
+        BalanceSnapshot.account_id == 1, BalanceSnapshot.recorded_at <= "2026-01-01"
+    ).order_by(BalanceSnapshot.recorded_at.desc(), BalanceSnapshot.id.desc()).limit(1),
+    "replay_since_snapshot": select(func.sum(Transaction.wallet_delta), func.sum(Transaction.trading_delta)).where(
+        Transaction.account_id == 1, Transaction.id > 500, Transaction.created_at <= "2026-01-01"
+    ),
+    "branch_daily_flows": select(BranchDailyRollup).where(
+        BranchDailyRollup.day >= "2026-01-01", BranchDailyRollup.day <= "2026-01-31"
+    ).order_by(BranchDailyRollup.day, BranchDailyRollup.branch_id),
+    "branch_clients": client_listing().where(User.role == UserRole.CLIENT, User.branch_id == 1).order_by(User.id),
+    "all_clients": client_listing().where(User.role == UserRole.CLIENT).order_by(User.branch_id, User.id),
+    "open_trades": select(Trade).where(Trade.user_id == 1, Trade.status == TradeStatus.OPEN),
+    "recent_revocations": select(TokenRevocation.user_id, TokenRevocation.revoked_at).where(
+        TokenRevocation.revoked_at > "2026-01-01"
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def migrated_engine(tmp_path_factory):
+    """SQLite database built only from the Alembic migrations."""
+    url = f"sqlite:///{tmp_path_factory.mktemp('migrations') / 'migrated.db'}"
+    run_migrations(url)
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+class TestMigrations:
+    """Test that migrations build the schema the models describe."""
+
+    def test_models_match_migrations(self, migrated_engine):
+        with migrated_engine.connect() as conn:
+            diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        assert diff == []
+
+    def test_existing_schema_is_adopted(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'legacy.db'}"
+        # A database built by create_all before migrations: baseline tables, no version table
+        command.upgrade(get_alembic_config(url), BASELINE_REVISION)
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE alembic_version")
+
+        run_migrations(url)
+
+        assert "ix_accounts_user_id" in {ix["name"] for ix in inspect(engine).get_indexes("accounts")}
+        engine.dispose()
+
+    def test_existing_postings_get_column_deltas(self, tmp_path):
+        url = f"sqlite:///{tmp_path / 'deltas.db'}"
+        command.upgrade(get_alembic_config(url), "0006")
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO transactions (user_id, account_id, transaction_type, amount, balance_before, balance_after)"
+                " VALUES (1, 1, 'DEPOSIT', 10, 0, 10), (1, 1, 'WITHDRAW', 3, 10, 7), (1, 1, 'TRANSFER', 4, 10, 6),"
+                " (1, 1, 'BONUS', 1, 0, 1), (2, NULL, 'DEPOSIT', 5, 0, 5)"
+            )
+
+        run_migrations(url)
+
+        with engine.connect() as conn:
+            deltas = conn.execute(
+                select(Transaction.wallet_delta, Transaction.trading_delta).order_by(Transaction.id)
+            ).all()
+        assert deltas == [(None, 10), (-3, None), (4, -4), (None, None), (None, None)]
+        engine.dispose()
+
+
+class TestHotQueryPlans:
+    """Test that hot queries never fall back to a full table scan."""
+
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_query_uses_index(self, migrated_engine, name):
+        statement = HOT_QUERIES[name].compile(
+            dialect=migrated_engine.dialect,
+            compile_kwargs={"literal_binds": True}
+        )
+        with migrated_engine.connect() as conn:
+            plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}")]
+
+        assert plan, f"No query plan for {name}"
+        for step in plan:
+            assert not step.startswith("SCAN"), f"{name} scans a table: {plan}"
+            assert "TEMP B-TREE" not in step, f"{name} sorts without an index: {plan}"
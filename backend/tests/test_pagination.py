@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from app.models import (
+    Branch, RequestStatus, RequestType, Transaction, TransactionRequest, TransactionType, User, UserRole,
+)
+from app.utils.security import create_access_token
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def history(client, db):
+    """A client with 25 transactions, several sharing a timestamp, and 12 requests."""
+    branch = Branch(
+        name="Main Branch", code="MAIN-001", referral_code="MAIN001-REF",
+        admin_email="admin@example.com", admin_name="Admin"
+    )
+    db.add(branch)
+    db.flush()
+    manager = User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)
+    customer = User(
+        email="client@example.com", hashed_password="x", name="Client",
+        role=UserRole.CLIENT, branch_id=branch.id
+    )
+    db.add_all([manager, customer])
+    db.flush()
+    for i in range(25):
+        db.add(Transaction(
+            user_id=customer.id,
+            transaction_type=TransactionType.DEPOSIT if i % 2 else TransactionType.WITHDRAW,
+            amount=Decimal("1"), balance_before=Decimal("0"), balance_after=Decimal("1"),
+            created_at=START + timedelta(minutes=i // 3),  # three rows per timestamp
+        ))
+    for i in range(12):
+        db.add(TransactionRequest(
+            user_id=customer.id,
+            request_type=RequestType.DEPOSIT if i % 3 else RequestType.WITHDRAWAL,
+            requested_amount=Decimal("5"),
+            status=RequestStatus.PENDING if i % 2 else RequestStatus.REJECTED,
+            created_at=START + timedelta(minutes=i // 2),
+        ))
+    db.commit()
+
+    def headers(user, role):
+        token = create_access_token({"user_id": user.id, "email": user.email, "role": role})
+        return {"Authorization": f"Bearer {token}"}
+
+    return client, headers(customer, "client"), headers(manager, "manager")
+
+
+def fetch_all(client, url, headers, params):
+    """Follow X-Next-Cursor to the end; returns the pages' ids."""
+    pages = []
+    params = dict(params)
+    while True:
+        response = client.get(url, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append([row["id"] for row in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        params["cursor"] = cursor
+
+
+class TestHistoryPagination:
+    """Test keyset pagination and filters on /transactions/history."""
+
+    def test_pages_cover_history_once_newest_first(self, history):
+        client, client_headers, _ = history
+        pages = fetch_all(client, "/api/transactions/history", client_headers, {"limit": 4})
+
+        ids = [i for page in pages for i in page]
+        assert [len(page) for page in pages] == [4, 4, 4, 4, 4, 4, 1]
+        assert len(ids) == len(set(ids)) == 25
+        # Ties on created_at are broken by id, newest first
+        assert ids == sorted(ids, reverse=True)
+
+    def test_filters_by_type_and_date_range(self, history):
+        client, client_headers, _ = history
+        pages = fetch_all(client, "/api/transactions/history", client_headers, {
+            "limit": 2,
+            "transaction_type": "deposit",
+            "created_from": (START + timedelta(minutes=2)).isoformat(),
+            "created_to": (START + timedelta(minutes=6)).isoformat(),
+        })
+
+        rows = client.get(
+            "/api/transactions/history", params={"limit": 200}, headers=client_headers
+        ).json()
+        expected = [
+            row["id"] for row in rows
+            if row["transaction_type"] == "deposit"
+            and START + timedelta(minutes=2) <= datetime.fromisoformat(row["created_at"]) < START + timedelta(minutes=6)
+        ]
+        assert [i for page in pages for i in page] == expected
+        assert len(expected) == 6
+
+    def test_invalid_cursor_is_rejected(self, history):
+        client, client_headers, _ = history
+        response = client.get(
+            "/api/transactions/history", params={"cursor": "not-a-cursor"}, headers=client_headers
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    def test_limit_is_bounded(self, history):
+        client, client_headers, _ = history
+        response = client.get("/api/transactions/history", params={"limit": 10000}, headers=client_headers)
+        assert response.status_code == 422
+
+
+class TestRequestPagination:
+    """Test keyset pagination and filters on /transactions/requests."""
+
+    def test_manager_pages_pending_deposits(self, history):
+        client, _, manager_headers = history
+        pages = fetch_all(client, "/api/transactions/requests", manager_headers, {
+            "limit": 2, "status_filter": "pending", "request_type": "deposit",
+        })
+
+        ids = [i for page in pages for i in page]
+        assert len(ids) == len(set(ids)) == 4
+        assert ids == sorted(ids, reverse=True)
+
+    def test_client_pages_own_requests(self, history):
+        client, client_headers, _ = history
+        pages = fetch_all(client, "/api/transactions/requests", client_headers, {"limit": 5})
+        assert [len(page) for page in pages] == [5, 5, 2]
+
+
+class TestListQueryCount:
+    """Test that list endpoints cost the same number of queries however many rows they return."""
+
+    def add_staffed_rows(self, db, count):
+        """Rows each performed/approved by a different staff member."""
+        customer = db.query(User).filter(User.role == UserRole.CLIENT).one()
+        for i in range(count):
+            staff = User(
+                email=f"staff-{count}-{i}@example.com", hashed_password="x",
+                name=f"Staff {i}", role=UserRole.MANAGER
+            )
+            db.add(staff)
+            db.flush()
+            db.add(Transaction(
+                user_id=customer.id, transaction_type=TransactionType.DEPOSIT,
+                amount=Decimal("1"), balance_before=Decimal("0"), balance_after=Decimal("1"),
+                performed_by_id=staff.id, created_at=START + timedelta(hours=1, minutes=i),
+            ))
+            db.add(TransactionRequest(
+                user_id=customer.id, request_type=RequestType.DEPOSIT, requested_amount=Decimal("5"),
+                approved_amount=Decimal("5"), status=RequestStatus.APPROVED, approved_by_id=staff.id,
+                created_at=START + timedelta(hours=1, minutes=i),
+            ))
+        db.commit()
+
+    @pytest.mark.parametrize("url", ["/api/transactions/history", "/api/transactions/requests"])
+    def test_query_count_is_constant(self, history, db, url):
+        client, client_headers, _ = history
+        counts = []
+        for count in (1, 20):
+            self.add_staffed_rows(db, count)
+            client.get(url, params={"limit": 200}, headers=client_headers)  # warm the principal cache
+            response = client.get(url, params={"limit": 200}, headers=client_headers)
+            assert response.status_code == 200
+            named = [row for row in response.json() if row.get("performed_by_name") or row.get("approved_by_name")]
+            assert len(named) == (1 if count == 1 else 21)
+            counts.append(response.headers["X-DB-Queries"])
+
+        assert counts[0] == counts[1] == "1"
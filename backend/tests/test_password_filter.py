@@ -0,0 +1,63 @@
+import hashlib
+import pytest
+from app.cli import main as cli_main
+from app.config import settings
+from app.utils.password_filter import BloomFilter, build_filter, password_digest, reset_breached_password_filter
+from app.utils.security import validate_password_strength
+
+
+@pytest.fixture
+def breached_list(tmp_path):
+    source = tmp_path / "breached.txt"
+    source.write_text("\n".join(["Breached#Pass1", "hunter2"] + [f"leaked-{i}" for i in range(1000)]) + "\n")
+    return source
+
+
+class TestBloomFilter:
+    """Test building and querying the breached-password filter."""
+
+    def test_members_are_found(self, tmp_path):
+        path = str(tmp_path / "f.bloom")
+        words = [f"password-{i}" for i in range(5000)]
+        build_filter((password_digest(w) for w in words), len(words), path, fp_rate=0.001)
+
+        bloom = BloomFilter(path)
+        assert all(w in bloom for w in words)
+        false_positives = sum(f"other-{i}" in bloom for i in range(5000))
+        assert false_positives < 50  # ~5 expected at 0.1%
+        bloom.close()
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "not.bloom"
+        path.write_bytes(b"x" * 64)
+        with pytest.raises(ValueError):
+            BloomFilter(str(path))
+
+    def test_cli_builds_from_sha1_list(self, tmp_path):
+        source = tmp_path / "hashes.txt"
+        source.write_text(hashlib.sha1(b"hunter2").hexdigest().upper() + ":17\n")
+        output = tmp_path / "hashes.bloom"
+
+        assert cli_main(["build-password-filter", str(source), str(output), "--sha1"]) == 0
+        assert "hunter2" in BloomFilter(str(output))
+
+
+class TestBreachedPasswordValidation:
+    """Test validate_password_strength against a configured filter."""
+
+    @pytest.fixture(autouse=True)
+    def configured_filter(self, tmp_path, breached_list, monkeypatch):
+        output = tmp_path / "breached.bloom"
+        cli_main(["build-password-filter", str(breached_list), str(output)])
+        monkeypatch.setattr(settings, "BREACHED_PASSWORDS_FILTER", str(output))
+        reset_breached_password_filter()
+        yield
+        reset_breached_password_filter()
+
+    def test_breached_password_rejected(self):
+        is_valid, error = validate_password_strength("Breached#Pass1")
+        assert is_valid is False
+        assert "breach" in error
+
+    def test_other_password_accepted(self):
+        assert validate_password_strength("Unbreached#Pass1") == (True, "")
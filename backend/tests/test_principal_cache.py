@@ -0,0 +1,98 @@
+import pytest
+from app.config import settings
+from app.models import User, Account, UserRole
+from app.middleware.auth import principal_cache
+from app.utils.cache import TTLCache
+from app.utils.security import create_access_token
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def client_user(db):
+    user = User(
+        email="client@example.com", hashed_password="x", name="Client",
+        role=UserRole.CLIENT, account_number="ACC-10001"
+    )
+    db.add(user)
+    db.flush()
+    db.add(Account(user_id=user.id, account_number="ACC-10001", balance=0, wallet_balance=0, trading_balance=0))
+    db.commit()
+    return user
+
+
+def auth_headers(user: User) -> dict:
+    token = create_access_token({"user_id": user.id, "email": user.email, "role": user.role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestTTLCache:
+    """Test expiry and LRU eviction."""
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.set("a", 1)
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+
+    def test_explicit_expiry_caps_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+        cache.set("a", 1, expires_at=2)
+        clock.now = 2
+        assert cache.get("a") is None
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+class TestPrincipalCache:
+    """Test that authenticated requests reuse the cached principal."""
+
+    def test_second_request_skips_principal_query(self, client, client_user, monkeypatch):
+        monkeypatch.setattr(settings, "DEBUG", True)
+        headers = auth_headers(client_user)
+
+        first = client.get("/api/accounts/me", headers=headers)
+        second = client.get("/api/accounts/me", headers=headers)
+
+        assert first.status_code == second.status_code == 200
+        assert first.headers["X-DB-Queries"] == "2"
+        assert second.headers["X-DB-Queries"] == "1"
+
+    def test_deactivation_invalidates(self, client, db, client_user):
+        headers = auth_headers(client_user)
+        assert client.get("/api/accounts/me", headers=headers).status_code == 200
+        assert principal_cache.get(client_user.id) is not None
+
+        client_user.is_active = False
+        db.commit()
+
+        assert principal_cache.get(client_user.id) is None
+        response = client.get("/api/accounts/me", headers=headers)
+        assert response.status_code == 403
+
+    def test_role_change_invalidates(self, client, db, client_user):
+        headers = auth_headers(client_user)
+        assert client.get("/api/manager/spreads", headers=headers).status_code == 403
+
+        client_user.role = UserRole.MANAGER
+        db.commit()
+
+        response = client.get("/api/manager/spreads", headers=headers)
+        assert response.status_code == 200
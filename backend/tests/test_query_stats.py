@@ -0,0 +1,88 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.middleware.query_stats import (
+    QueryBudgetExceeded,
+    QueryStats,
+    query_budget,
+    query_stats_middleware,
+    start_query_stats,
+)
+
+
+@pytest.fixture
+def budget_app(tmp_path):
+    """Minimal app with one endpoint per budget outcome."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    app = FastAPI()
+    app.middleware("http")(query_stats_middleware)
+
+    def run_queries(count: int):
+        with engine.connect() as conn:
+            for _ in range(count):
+                conn.execute(text("SELECT 1"))
+
+    @app.get("/within")
+    @query_budget(2)
+    def within():
+        run_queries(2)
+        return {}
+
+    @app.get("/over")
+    @query_budget(2)
+    def over():
+        run_queries(3)
+        return {}
+
+    yield TestClient(app)
+    engine.dispose()
+
+
+class TestQueryStats:
+    """Test request-scoped statement counting."""
+
+    def test_counts_statements(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+        stats = start_query_stats()
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT 1"))
+        engine.dispose()
+
+        assert stats.count == 3
+        assert stats.duration > 0
+
+    def test_repeated_statements(self):
+        stats = QueryStats()
+        for _ in range(5):
+            stats.record("SELECT * FROM users WHERE id = ?", 0.001)
+        stats.record("SELECT * FROM accounts", 0.001)
+
+        assert stats.repeated(5) == [("SELECT * FROM users WHERE id = ?", 5)]
+
+
+class TestQueryBudget:
+    """Test query budget headers and strict mode."""
+
+    def test_headers_reported(self, budget_app):
+        response = budget_app.get("/within")
+        assert response.status_code == 200
+        assert response.headers["X-DB-Queries"] == "2"
+        assert response.headers["X-DB-Time"].endswith("ms")
+
+    def test_strict_mode_fails_over_budget(self, budget_app):
+        with pytest.raises(QueryBudgetExceeded, match="issued 3 queries"):
+            budget_app.get("/over")
+
+    def test_non_strict_mode_only_warns(self, budget_app, monkeypatch):
+        from app.config import settings
+        monkeypatch.setattr(settings, "DB_QUERY_BUDGET_STRICT", False)
+        response = budget_app.get("/over")
+        assert response.status_code == 200
+        assert response.headers["X-DB-Queries"] == "3"
+
+    def test_app_endpoint_within_budget(self, client):
+        response = client.get("/api/health/ready")
+        assert response.status_code == 200
+        assert response.headers["X-DB-Queries"] == "1"
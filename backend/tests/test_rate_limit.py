@@ -0,0 +1,111 @@
+import os
+import uuid
+import pytest
+from app.config import settings
+from app.models.user import User, UserRole
+from app.utils.rate_limit import MemoryRateLimitBackend, RateLimitBackend, RedisRateLimitBackend
+from app.utils.security import get_password_hash
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def login_user(db):
+    user = User(
+        email="lockout@example.com", name="Lockout", role=UserRole.CLIENT,
+        hashed_password=get_password_hash("CorrectPass123!")
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def login(client, password: str):
+    return client.post("/api/auth/login", json={"email": "lockout@example.com", "password": password})
+
+
+class TestMemoryBackend:
+    """Test the in-process sliding window and counters."""
+
+    @pytest.mark.asyncio
+    async def test_sliding_window(self):
+        clock = FakeClock()
+        backend = MemoryRateLimitBackend(clock=clock)
+        assert (await backend.hit("k", 2, 10)).allowed
+        clock.now = 5
+        assert (await backend.hit("k", 2, 10)).allowed
+        denied = await backend.hit("k", 2, 10)
+        assert not denied.allowed and denied.retry_after == 5
+
+        clock.now = 10  # the first hit has left the window
+        assert (await backend.hit("k", 2, 10)).allowed
+
+    @pytest.mark.asyncio
+    async def test_counter_expires(self):
+        clock = FakeClock()
+        backend = MemoryRateLimitBackend(clock=clock)
+        assert await backend.incr("c", 60) == 1
+        assert await backend.incr("c", 60) == 2
+        clock.now = 60
+        assert await backend.get("c") == (0, 0.0)
+        assert await backend.incr("c", 60) == 1
+
+    def test_incomplete_backend_cannot_be_created(self):
+        class HitsOnly(RateLimitBackend):
+            async def hit(self, key, limit, window):
+                return None
+
+        with pytest.raises(TypeError):
+            HitsOnly()
+
+
+class TestRateLimits:
+    """Test endpoint limits and per-account lockout."""
+
+    def test_login_limit_per_address(self, client, login_user, monkeypatch):
+        monkeypatch.setattr(settings, "LOGIN_LOCKOUT_THRESHOLD", 100)
+        statuses = [login(client, "WrongPass123!").status_code for _ in range(11)]
+        assert statuses[:10] == [401] * 10
+        assert statuses[10] == 429
+
+    def test_account_locks_after_failures(self, client, login_user):
+        for _ in range(settings.LOGIN_LOCKOUT_THRESHOLD):
+            assert login(client, "WrongPass123!").status_code == 401
+
+        response = login(client, "CorrectPass123!")
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+
+    def test_success_clears_failures(self, client, login_user, rate_limit_backend):
+        login(client, "WrongPass123!")
+        assert login(client, "CorrectPass123!").status_code == 200
+        for _ in range(settings.LOGIN_LOCKOUT_THRESHOLD - 1):
+            login(client, "WrongPass123!")
+        assert login(client, "CorrectPass123!").status_code == 200
+
+
+@pytest.mark.skipif(not os.environ.get("REDIS_TEST_URL"), reason="REDIS_TEST_URL not set")
+class TestRedisBackend:
+    """Test the Lua scripts against a real Redis server."""
+
+    @pytest.mark.asyncio
+    async def test_sliding_window_and_counter(self):
+        backend = RedisRateLimitBackend(os.environ["REDIS_TEST_URL"], prefix=f"test:{uuid.uuid4().hex}:")
+        try:
+            assert (await backend.hit("k", 2, 60)).allowed
+            assert (await backend.hit("k", 2, 60)).allowed
+            denied = await backend.hit("k", 2, 60)
+            assert not denied.allowed and 0 < denied.retry_after <= 60
+
+            assert await backend.incr("c", 60) == 1
+            assert await backend.incr("c", 60) == 2
+            count, ttl = await backend.get("c")
+            assert count == 2 and 0 < ttl <= 60
+        finally:
+            await backend.reset()
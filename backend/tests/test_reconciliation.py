@@ -0,0 +1,123 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+pytest.importorskip("pandas")
+
+from app.database import ThreadedSession  # noqa: E402
+from app.models import Account, Transaction, TransactionType, User, UserRole  # noqa: E402
+from app.services import ledger  # noqa: E402
+from app.services.reconciliation import ReconciliationState, reconcile  # noqa: E402
+
+
+@pytest.fixture
+def books(db):
+    """Two client accounts (one with an opening balance) and an admin, with a few postings each."""
+    admin = User(
+        email="admin@example.com", hashed_password="x", name="Admin",
+        role=UserRole.ADMIN, admin_balance=Decimal("50")
+    )
+    clients = [
+        User(email=f"client{i}@example.com", hashed_password="x", name=f"Client {i}", role=UserRole.CLIENT)
+        for i in range(2)
+    ]
+    db.add_all([admin, *clients])
+    db.flush()
+    accounts = [
+        Account(user_id=clients[0].id, account_number="ACC-0000000001",
+                balance=Decimal("0"), wallet_balance=Decimal("0"), trading_balance=Decimal("0")),
+        Account(user_id=clients[1].id, account_number="ACC-0000000002",
+                balance=Decimal("5000"), wallet_balance=Decimal("5000"), trading_balance=Decimal("0")),
+    ]
+    db.add_all(accounts)
+    db.commit()
+
+    session = ThreadedSession(db)
+
+    def post(user, deltas, kind=TransactionType.DEPOSIT):
+        asyncio.run(ledger.post_to_account(session, user.id, deltas, transaction_type=kind, description="test"))
+        db.commit()
+
+    def post_admin(delta):
+        asyncio.run(ledger.post_to_admin_balance(
+            session, admin.id, Decimal(delta), transaction_type=TransactionType.DEPOSIT, description="test"
+        ))
+        db.commit()
+
+    for client in clients:
+        post(client, {ledger.TRADING: Decimal("100")})
+        post(client, {ledger.TRADING: Decimal("-40"), ledger.WALLET: Decimal("40")}, TransactionType.TRANSFER)
+        post(client, {ledger.WALLET: Decimal("-15")}, TransactionType.WITHDRAW)
+    post_admin("25")
+    post_admin("-10")
+    return post, post_admin, clients, accounts
+
+
+def run(db, state=None, chunk_size=200_000):
+    return reconcile(db.connection(), state, chunk_size)
+
+
+class TestReconciliation:
+    """Test the vectorised ledger reconciliation."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 200_000])
+    def test_consistent_ledger_has_no_discrepancies(self, db, books, chunk_size):
+        report, state = run(db, chunk_size=chunk_size)
+        assert report.empty, report.to_dict("records")
+        assert state.watermark == db.query(Transaction).count()
+
+    def test_detects_balance_not_sum_and_drift(self, db, books):
+        _, _, _, accounts = books
+        db.execute(update(Account).where(Account.id == accounts[0].id).values(
+            wallet_balance=Account.wallet_balance + 1
+        ))
+        db.commit()
+
+        report, _ = run(db)
+        assert sorted(report.check) == ["balance_drift", "balance_not_sum"]
+        drift = report[report.check == "balance_drift"].iloc[0]
+        assert (drift.account_id, drift.column, drift.expected, drift.actual) == (accounts[0].id, "wallet_balance", 25, 26)
+
+    def test_detects_broken_chain(self, db, books):
+        _, _, _, accounts = books
+        deposit, transfer = db.query(Transaction).filter(
+            Transaction.account_id == accounts[1].id, Transaction.transaction_type != TransactionType.WITHDRAW
+        ).order_by(Transaction.id).all()
+        deposit.balance_before += 7
+        deposit.balance_after += 7
+        db.commit()
+
+        report, _ = run(db)
+        assert list(report.check) == ["chain_break"]
+        # The transfer no longer starts where the deposit says the trading balance ended
+        assert (report.iloc[0].transaction_id, report.iloc[0].column) == (transfer.id, "trading_balance")
+        assert (report.iloc[0].expected, report.iloc[0].actual) == (107, 100)
+
+    def test_legacy_rows_without_deltas(self, db, books):
+        db.execute(update(Transaction).values(wallet_delta=None, trading_delta=None))
+        db.commit()
+
+        report, _ = run(db)
+        assert report.empty, report.to_dict("records")
+
+    def test_incremental_run_from_state_file(self, db, books, tmp_path):
+        post, post_admin, clients, accounts = books
+        _, state = run(db)
+        state.save(tmp_path / "state.json")
+
+        post(clients[0], {ledger.WALLET: Decimal("-5")}, TransactionType.WITHDRAW)
+        post_admin("-15")
+        state = ReconciliationState.load(tmp_path / "state.json")
+        report, state = run(db, state)
+        assert report.empty, report.to_dict("records")
+        assert state.watermark == db.query(Transaction).count()
+
+        # A posting whose balance_before ignores the previous run's rows is still caught
+        post(clients[0], {ledger.WALLET: Decimal("-5")}, TransactionType.WITHDRAW)
+        last = db.query(Transaction).order_by(Transaction.id.desc()).first()
+        last.balance_before, last.balance_after = Decimal("30"), Decimal("25")
+        db.commit()
+        report, _ = run(db, state)
+        assert list(report[report.check == "chain_break"].transaction_id) == [last.id]
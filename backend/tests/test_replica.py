@@ -0,0 +1,109 @@
+import pytest
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, get_db, get_read_db, ThreadedSession, ReadOnlySession
+from app.models import User, Account, Branch, Transaction, UserRole, TransactionType
+from app.utils.security import create_access_token
+
+
+def seed(session):
+    branch = Branch(
+        name="Main Branch", code="MAIN-001", referral_code="MAIN001-REF",
+        admin_email="admin@example.com", admin_name="Admin"
+    )
+    session.add(branch)
+    session.flush()
+    manager = User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)
+    client = User(
+        email="client@example.com", hashed_password="x", name="Client",
+        role=UserRole.CLIENT, branch_id=branch.id, account_number="ACC-10001"
+    )
+    session.add_all([manager, client])
+    session.flush()
+    session.add(Account(
+        user_id=client.id, account_number="ACC-10001",
+        balance=0, wallet_balance=0, trading_balance=0
+    ))
+    session.commit()
+    return manager.id, client.id
+
+
+@pytest.fixture
+def replica_setup(tmp_path):
+    """Primary and replica as two separate SQLite files."""
+    engines = {
+        name: create_engine(f"sqlite:///{tmp_path / name}.db", connect_args={"check_same_thread": False})
+        for name in ("primary", "replica")
+    }
+    for eng in engines.values():
+        Base.metadata.create_all(bind=eng)
+
+    primary = sessionmaker(bind=engines["primary"], autoflush=False, expire_on_commit=False)()
+    replica = sessionmaker(bind=engines["replica"], autoflush=False, class_=ReadOnlySession)()
+
+    # The replica is seeded through a writable session, as replication would
+    writer = sessionmaker(bind=engines["replica"])()
+    manager_id, client_id = seed(writer)
+    seed(primary)
+    writer.add(Transaction(
+        user_id=client_id, account_id=1, transaction_type=TransactionType.DEPOSIT,
+        amount=Decimal("10"), balance_before=Decimal("0"), balance_after=Decimal("10"),
+        description="replicated"
+    ))
+    writer.commit()
+    writer.close()
+
+    def override_primary():
+        yield ThreadedSession(primary)
+
+    def override_replica():
+        yield ThreadedSession(replica)
+
+    app.dependency_overrides[get_db] = override_primary
+    app.dependency_overrides[get_read_db] = override_replica
+    with TestClient(app) as test_client:
+        yield test_client, primary, replica, manager_id, client_id
+    app.dependency_overrides.clear()
+    primary.close()
+    replica.close()
+    for eng in engines.values():
+        eng.dispose()
+
+
+def auth_headers(user_id: int, role: str) -> dict:
+    token = create_access_token({"user_id": user_id, "email": "x@example.com", "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestReplicaRouting:
+    """Test that heavy reads go to the replica and writes stay on the primary."""
+
+    def test_history_reads_from_replica(self, replica_setup):
+        client, _, _, _, client_id = replica_setup
+        response = client.get("/api/transactions/history", headers=auth_headers(client_id, "client"))
+        assert response.status_code == 200
+        assert [t["description"] for t in response.json()] == ["replicated"]
+
+    def test_deposit_writes_to_primary(self, replica_setup):
+        client, primary, replica, manager_id, client_id = replica_setup
+        response = client.post(
+            "/api/transactions/manager/deposit-client",
+            json={"target_user_id": client_id, "amount": "25", "notes": "test"},
+            headers=auth_headers(manager_id, "manager")
+        )
+        assert response.status_code == 200
+        assert primary.query(Transaction).count() == 1
+        assert replica.query(Transaction).count() == 1  # only the replicated row
+
+    def test_replica_session_rejects_writes(self, replica_setup):
+        _, _, replica, _, _ = replica_setup
+        replica.add(Branch(
+            name="Other", code="O-1", referral_code="O1-REF",
+            admin_email="o@example.com", admin_name="O"
+        ))
+        with pytest.raises(RuntimeError, match="read-only"):
+            replica.flush()
+        replica.rollback()
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+from app.models import Account, Branch, RequestStatus, RequestType, TransactionRequest, User, UserRole
+from app.utils.security import create_access_token
+
+
+def auth(user):
+    token = create_access_token({"user_id": user.id, "email": user.email, "role": user.role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def queue(client, db):
+    """Two managers, a branch admin, and six pending deposits: four from a branch client, two from a loner."""
+    branch = Branch(
+        name="Branch A", code="BR-A", referral_code="BRA-REF", admin_email="admin@example.com", admin_name="Admin"
+    )
+    db.add(branch)
+    db.flush()
+    users = {
+        "first": User(email="first@example.com", hashed_password="x", name="First", role=UserRole.MANAGER),
+        "second": User(email="second@example.com", hashed_password="x", name="Second", role=UserRole.MANAGER),
+        "admin": User(email="admin@example.com", hashed_password="x", name="Admin",
+                      role=UserRole.ADMIN, branch_id=branch.id),
+        "client": User(email="client@example.com", hashed_password="x", name="Client",
+                       role=UserRole.CLIENT, branch_id=branch.id),
+        "loner": User(email="loner@example.com", hashed_password="x", name="Loner", role=UserRole.CLIENT),
+    }
+    db.add_all(users.values())
+    db.flush()
+    for n, key in enumerate(("client", "loner")):
+        db.add(Account(
+            user_id=users[key].id, account_number=f"ACC-000000000{n}",
+            balance=Decimal("0"), wallet_balance=Decimal("0"), trading_balance=Decimal("0")
+        ))
+    requests = [
+        TransactionRequest(user_id=users[key].id, request_type=RequestType.DEPOSIT, requested_amount=Decimal("10"))
+        for key in ("client", "client", "loner", "client", "loner", "client")
+    ]
+    db.add_all(requests)
+    db.commit()
+    return client, users, [r.id for r in requests]
+
+
+def claim(client, user, limit):
+    response = client.post(f"/api/transactions/requests/claim?limit={limit}", headers=auth(user))
+    assert response.status_code == 200
+    return [r["id"] for r in response.json()]
+
+
+class TestRequestClaims:
+    """Test claiming, leases and how approvals respect them."""
+
+    def test_approvers_get_disjoint_oldest_requests(self, queue):
+        client, users, ids = queue
+        first = claim(client, users["first"], 2)
+        second = claim(client, users["second"], 3)
+        assert first == ids[:2]
+        assert second == ids[2:5]
+        assert claim(client, users["second"], 5) == ids[2:]
+
+    def test_claiming_again_returns_held_requests(self, queue, db):
+        client, users, ids = queue
+        assert claim(client, users["first"], 2) == ids[:2]
+        assert claim(client, users["first"], 2) == ids[:2]
+        assert claim(client, users["first"], 3) == ids[:3]
+        db.expire_all()
+        lease = db.get(TransactionRequest, ids[0])
+        assert lease.claimed_by_id == users["first"].id and lease.claim_expires_at is not None
+
+    def test_expired_lease_can_be_claimed(self, queue, db):
+        client, users, ids = queue
+        claim(client, users["first"], 2)
+        db.execute(
+            update(TransactionRequest)
+            .where(TransactionRequest.id == ids[0])
+            .values(claim_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+        )
+        db.commit()
+        assert claim(client, users["second"], 1) == [ids[0]]
+
+    def test_release_hands_requests_back(self, queue):
+        client, users, ids = queue
+        claim(client, users["first"], 2)
+        response = client.post(
+            "/api/transactions/requests/release",
+            json={"request_ids": ids[:2]},
+            headers=auth(users["second"])
+        )
+        assert response.json()["released"] == 0
+        response = client.post(
+            "/api/transactions/requests/release",
+            json={"request_ids": [ids[1]]},
+            headers=auth(users["first"])
+        )
+        assert response.json()["released"] == 1
+        assert claim(client, users["second"], 1) == [ids[1]]
+
+    def test_admin_claims_only_branch_requests(self, queue):
+        client, users, ids = queue
+        assert claim(client, users["admin"], 10) == [ids[0], ids[1], ids[3], ids[5]]
+        assert claim(client, users["first"], 10) == [ids[2], ids[4]]
+
+    def test_admin_without_branch_cannot_claim(self, queue, db):
+        client, users, ids = queue
+        users["admin"].branch_id = None
+        db.commit()
+        response = client.post("/api/transactions/requests/claim", headers=auth(users["admin"]))
+        assert response.status_code == 403
+        assert claim(client, users["first"], 10) == ids
+
+    def test_claimed_request_cannot_be_decided_by_another_approver(self, queue, db):
+        client, users, ids = queue
+        claim(client, users["first"], 2)
+
+        response = client.post(
+            "/api/transactions/approve-request",
+            json={"request_id": ids[0], "action": "approve"},
+            headers=auth(users["second"])
+        )
+        assert response.status_code == 409
+        response = client.post(
+            "/api/transactions/approve-requests",
+            json={"items": [{"request_id": ids[1], "action": "reject"}, {"request_id": ids[2], "action": "reject"}]},
+            headers=auth(users["second"])
+        )
+        assert [r["error"] for r in response.json()["results"]] == ["Request is claimed by another approver", None]
+
+        response = client.post(
+            "/api/transactions/approve-request",
+            json={"request_id": ids[0], "action": "approve"},
+            headers=auth(users["first"])
+        )
+        assert response.status_code == 200
+        db.expire_all()
+        decided = db.get(TransactionRequest, ids[0])
+        assert decided.status == RequestStatus.APPROVED
+        assert decided.claimed_by_id is None and decided.claim_expires_at is None
@@ -1,11 +1,15 @@
 import pytest
+from datetime import timedelta
+from app.utils import security
 from app.utils.security import (
     get_password_hash,
     verify_password,
     create_access_token,
     create_refresh_token,
     decode_token,
-    generate_account_number
+    forget_user_tokens,
+    token_cache,
+    verify_password_async
 )
 
 
@@ -32,6 +36,22 @@ class TestPasswordHashing:
         # Wrong password should not verify
         assert verify_password("WrongPassword123!", hashed) is False
 
+    @pytest.mark.asyncio
+    async def test_verification_runs_off_the_event_loop(self, monkeypatch):
+        """Test that bcrypt runs on the hashing executor, not the loop thread."""
+        import threading
+        threads = []
+        real_verify = security.pwd_context.verify_and_update
+
+        def recording_verify(*args):
+            threads.append(threading.current_thread().name)
+            return real_verify(*args)
+        monkeypatch.setattr(security.pwd_context, "verify_and_update", recording_verify)
+
+        hashed = get_password_hash("TestPassword123!")
+        assert await verify_password_async("TestPassword123!", hashed) == (True, None)
+        assert threads[0].startswith("password-hash")
+
 
 class TestJWTTokens:
     """Test JWT token generation and validation."""
@@ -71,23 +91,71 @@ class TestJWTTokens:
         assert decoded is None
 
 
+class TestVerifiedTokenCache:
+    """Test the cache of verified token payloads."""
+
+    def test_repeat_decode_skips_verification(self, monkeypatch):
+        token = create_access_token({"user_id": 1, "email": "test@example.com", "role": "client"})
+        assert decode_token(token)["user_id"] == 1
+
+        def fail(*args, **kwargs):
+            raise AssertionError("signature verified twice")
+        monkeypatch.setattr(security.jwt, "decode", fail)
+        assert decode_token(token)["user_id"] == 1
+
+    def test_cached_payload_cannot_be_mutated(self):
+        token = create_access_token({"user_id": 1, "email": "test@example.com", "role": "client"})
+        decode_token(token)["user_id"] = 2
+        assert decode_token(token)["user_id"] == 1
+
+    def test_expired_token_is_not_served(self):
+        token = create_access_token({"user_id": 1}, expires_delta=timedelta(seconds=-1))
+        assert decode_token(token) is None
+        assert len(token_cache) == 0
+
+    def test_revocation_evicts_user_tokens(self):
+        decode_token(create_access_token({"user_id": 1, "role": "client"}))
+        decode_token(create_access_token({"user_id": 2, "role": "client"}))
+        forget_user_tokens(1)
+        assert len(token_cache) == 1
+
+
 class TestAccountNumber:
-    """Test account number generation."""
+    """Test account number allocation."""
+
+    @pytest.fixture
+    def allocator(self, tmp_path):
+        from sqlalchemy import create_engine
+        from app.database import Base
+        from app.services.account_numbers import AccountNumberAllocator
+        engine = create_engine(f"sqlite:///{tmp_path / 'numbers.db'}")
+        Base.metadata.create_all(bind=engine)
+        yield lambda: AccountNumberAllocator(engine, block_size=10)
+        engine.dispose()
 
-    def test_generate_account_number(self):
-        """Test account number generation."""
-        account_num = generate_account_number()
+    def test_generate_account_number(self, allocator):
+        """Test account number format."""
+        account_num = allocator().allocate()
         
-        assert account_num is not None
-        assert account_num.startswith("ACC-")
-        assert len(account_num) == 9  # ACC-XXXXX (9 chars)
+        assert account_num == "ACC-0000000001"
+        assert len(account_num) == 14  # ACC-XXXXXXXXXX (14 chars)
 
-    def test_account_numbers_unique(self):
-        """Test that generated account numbers are unique."""
+    def test_account_numbers_unique(self, allocator):
+        """Test that numbers are unique across workers sharing a database."""
+        workers = [allocator(), allocator()]
         numbers = set()
-        for _ in range(100):
-            num = generate_account_number()
+        for i in range(100):
+            num = workers[i % 2].allocate()
             numbers.add(num)
         
         # Should generate 100 unique numbers
         assert len(numbers) == 100
+
+    def test_numbers_come_from_reserved_blocks(self, allocator):
+        """Test that only one database round trip is made per block."""
+        from unittest import mock
+        worker = allocator()
+        with mock.patch.object(worker, "_reserve_block", wraps=worker._reserve_block) as reserve:
+            for _ in range(25):
+                worker.allocate()
+        assert reserve.call_count == 3
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+from app.main import create_app
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class TestStartup:
+    """Test that app startup stays cheap and side-effect free."""
+
+    def test_import_skips_optional_modules(self):
+        probe = (
+            "import sys, app.main; "
+            "print(','.join(m for m in ('alembic', 'psutil', 'app.api') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        assert output == ""
+
+    def test_factory_serves_health(self):
+        with TestClient(create_app()) as client:
+            assert client.get("/health").json() == {"status": "healthy"}
@@ -0,0 +1,74 @@
+import pytest
+from app.config import settings
+from app.models import User, Account, UserRole
+from app.utils.security import create_access_token, access_token_claims
+
+
+@pytest.fixture(autouse=True)
+def stateless_mode(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_STATELESS", True)
+    monkeypatch.setattr(settings, "DEBUG", True)
+
+
+@pytest.fixture
+def manager(db):
+    user = User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(access_token_claims(user))}"}
+
+
+class TestStatelessAuthorization:
+    """Test claims-only role checks and token revocation."""
+
+    def test_role_check_skips_users_table(self, client, manager):
+        headers = auth_headers(manager)
+        client.get("/api/manager/spreads", headers=headers)  # loads the revocation set
+
+        response = client.get("/api/manager/spreads", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["X-DB-Queries"] == "1"  # the spreads query only
+
+    def test_claims_are_authoritative(self, client, manager):
+        client_claims = dict(access_token_claims(manager), role=UserRole.CLIENT.value)
+        headers = {"Authorization": f"Bearer {create_access_token(client_claims)}"}
+        assert client.get("/api/manager/spreads", headers=headers).status_code == 403
+
+    def test_deactivation_revokes_tokens(self, client, db, manager):
+        headers = auth_headers(manager)
+        assert client.get("/api/manager/spreads", headers=headers).status_code == 200
+
+        manager.is_active = False
+        db.commit()
+
+        assert client.get("/api/manager/spreads", headers=headers).status_code == 401
+
+    def test_role_change_revokes_tokens(self, client, db, manager):
+        headers = auth_headers(manager)
+        manager.role = UserRole.ADMIN
+        db.commit()
+
+        assert client.get("/api/manager/spreads", headers=headers).status_code == 401
+
+    def test_other_workers_load_revocations(self, client, db, manager):
+        from app.middleware.auth import revocation_list
+        headers = auth_headers(manager)
+        manager.is_active = False
+        db.commit()
+
+        # A worker that did not make the change only learns about it from the table
+        revocation_list.clear()
+        assert client.get("/api/manager/spreads", headers=headers).status_code == 401
+
+    def test_token_issued_in_the_revocation_second_is_valid(self, client, db, manager):
+        stale = auth_headers(manager)
+        manager.branch_id = 7
+        db.commit()
+        fresh = auth_headers(manager)  # almost always within the same whole second as the revocation
+
+        assert client.get("/api/manager/spreads", headers=fresh).status_code == 200
+        assert client.get("/api/manager/spreads", headers=stale).status_code == 401
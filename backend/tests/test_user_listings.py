@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+from app.models import Account, Branch, User, UserRole
+from app.utils.security import create_access_token
+
+
+def auth(user):
+    token = create_access_token({"user_id": user.id, "email": user.email, "role": user.role.value})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def staff(client, db):
+    """Two branches with an admin and three clients each, an unassigned admin and client, and a manager."""
+    users = {"manager": User(email="manager@example.com", hashed_password="x", name="Manager", role=UserRole.MANAGER)}
+    for code in ("A", "B"):
+        branch = Branch(
+            name=f"Branch {code}", code=f"BR-{code}", referral_code=f"BR{code}-REF",
+            admin_email=f"admin{code}@example.com", admin_name=f"Admin {code}"
+        )
+        db.add(branch)
+        db.flush()
+        users[f"admin{code}"] = User(
+            email=f"admin{code}@example.com", hashed_password="x", name=f"Admin {code}",
+            role=UserRole.ADMIN, branch_id=branch.id, admin_balance=Decimal("50")
+        )
+        for n in (1, 2, 3):
+            users[f"client{code}{n}"] = User(
+                email=f"client{code}{n}@example.com", hashed_password="x", name=f"Client {code}{n}",
+                role=UserRole.CLIENT, branch_id=branch.id, account_number=f"ACC-{code}{n}"
+            )
+    users["drifter"] = User(email="drifter@example.com", hashed_password="x", name="Drifter", role=UserRole.ADMIN)
+    users["loner"] = User(email="loner@example.com", hashed_password="x", name="Loner", role=UserRole.CLIENT)
+    db.add_all(users.values())
+    db.flush()
+    for n, key in enumerate(["clientA1", "clientA2", "clientB1", "clientB2", "clientB3", "loner"]):
+        db.add(Account(
+            user_id=users[key].id, account_number=f"ACC-00000000{n:02d}",
+            balance=Decimal(n), wallet_balance=Decimal(n), trading_balance=Decimal("0")
+        ))
+    # A second account is never the one listed
+    db.add(Account(
+        user_id=users["clientA1"].id, account_number="ACC-0000000099",
+        balance=Decimal("99"), wallet_balance=Decimal("99"), trading_balance=Decimal("0")
+    ))
+    db.commit()
+    return client, users
+
+
+class TestUserListings:
+    """Test that staff listings run a fixed number of queries however many rows they return."""
+
+    def test_manager_lists_admins(self, staff):
+        client, users = staff
+        response = client.get("/api/manager/admins", headers=auth(users["manager"]))
+        assert response.status_code == 200
+        assert {(row["email"], row["branch_name"]) for row in response.json()} == {
+            ("adminA@example.com", "Branch A"), ("adminB@example.com", "Branch B"), ("drifter@example.com", None)
+        }
+
+    def test_manager_lists_clients(self, staff):
+        client, users = staff
+        response = client.get("/api/manager/clients", headers=auth(users["manager"]))
+        assert response.status_code == 200
+        rows = {row["email"]: row for row in response.json()}
+        assert len(rows) == 7
+        assert (rows["clientA1@example.com"]["balance"], rows["clientA1@example.com"]["branch_name"]) == (0, "Branch A")
+        assert (rows["clientA3@example.com"]["balance"], rows["clientA3@example.com"]["account_number"]) == (0, "ACC-A3")
+        assert (rows["loner@example.com"]["wallet_balance"], rows["loner@example.com"]["branch_name"]) == (5, None)
+
+    def test_admin_lists_branch_clients(self, staff):
+        client, users = staff
+        response = client.get("/api/admin/branch-clients", headers=auth(users["adminB"]))
+        assert response.status_code == 200
+        assert [(row["email"], row["balance"]) for row in response.json()] == [
+            ("clientB1@example.com", 2), ("clientB2@example.com", 3), ("clientB3@example.com", 4)
+        ]